@@ -0,0 +1,153 @@
+from __future__ import annotations
+import csv
+import logging
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from Modules.constants import PROFESSIONS
+import Modules.engine as engine
+import Modules.objects.item as item
+import Modules.roster as roster
+
+logger = logging.getLogger(__name__)
+
+class Catalogue:
+    """
+    One dataset's prices, e.g. for one platform, over a shared recipe structure.
+
+    Recipes, artisans, tools, supplements and their setup tables live in the CostEngine,
+    which any number of catalogues can share. Each catalogue only holds its own price
+    vector and its own cached results. The version goes up whenever a price changes so
+    anything cached against an older version can be told apart.
+    """
+    def __init__(self, name: str, cost_engine: 'engine.CostEngine', prices: np.ndarray = None):
+        self.name = name
+        self.engine = cost_engine
+        if prices is None:
+            prices = cost_engine.get_prices()
+        self.prices = np.asarray(prices, dtype=float).copy()
+        self.version = 0
+        self.evaluation: 'engine.CostEvaluation' = None
+        self.roster_optimiser: 'roster.RosterOptimiser' = None
+
+    @classmethod
+    def load_csv(cls, name: str, cost_engine: 'engine.CostEngine', file_loc: str) -> Catalogue:
+        """
+        Create a catalogue priced from a Resources.csv file. Resources missing from the
+        file are priced at 0, the same as unknown resources.
+        """
+        prices = np.zeros(len(cost_engine.resource_names))
+        with open(file_loc) as f:
+            csvreader = csv.reader(f)
+            header = next(csvreader)
+            for row in csvreader:
+                if any(prof in row[6] for prof in PROFESSIONS):
+                    # Materials aren't resources, the same as MWResource.load_csv
+                    continue
+                resource = item.MWResource(row)
+                index = cost_engine.resource_index.get(resource.name)
+                if index is not None:
+                    prices[index] = resource.price
+        logger.info(f"Loaded {name} prices from {file_loc}.")
+        return cls(name, cost_engine, prices)
+
+    def set_prices(self, prices: Dict[str, float]):
+        """
+        Change the price of some resources by name, dropping cached results.
+        """
+        for name, price in prices.items():
+            self.prices[self.engine.resource_index[name]] = price
+        self.version += 1
+        self.evaluation = None
+        self.roster_optimiser = None
+
+    def evaluate(self) -> 'engine.CostEvaluation':
+        """
+        Returns:
+            CostEvaluation: The optimal cost and setup of every item at this catalogue's prices.
+        """
+        if self.evaluation is None:
+            self.evaluation = self.engine.evaluate(self.prices)
+        return self.evaluation
+
+    def get_cost(self, name: str, high_quality: bool = False) -> float:
+        """
+        Returns:
+            float: The optimal cost of one of the named item.
+        """
+        return float(self.evaluate().get_cost(name, high_quality)[0])
+
+    def get_setup(self, name: str, high_quality: bool = False) -> Tuple:
+        """
+        Returns:
+            Tuple[Artisan, Tool, Supplement]: The optimal setup for the named item.
+        """
+        return self.evaluate().get_setup(name, high_quality)
+
+    def get_roster_optimiser(self) -> 'roster.RosterOptimiser':
+        """
+        Returns:
+            RosterOptimiser: Answers roster queries at this catalogue's prices.
+        """
+        if self.roster_optimiser is None:
+            self.roster_optimiser = roster.RosterOptimiser(self.engine, self.prices)
+        return self.roster_optimiser
+
+    def apply(self):
+        """
+        Make this catalogue's prices the loaded ones, so MWItem.craft and the scripts use
+        them. Cached optimal recipes are dropped as they were priced by another dataset.
+        """
+        for name, price in zip(self.engine.resource_names, self.prices):
+            resource = item.MWResource.OBJECTS.get(name)
+            if resource is None:
+                resource = item.MWResource(name=name)
+                item.MWResource.OBJECTS[name] = resource
+            resource.price = float(price)
+        item.MWItem.RANKINGS.invalidate()
+        logger.info(f"Using {self.name} prices.")
+
+    @staticmethod
+    def evaluate_all(catalogues: List[Catalogue]):
+        """
+        Evaluate every catalogue sharing an engine together as one batch of price vectors.
+        """
+        by_engine: Dict[int, List[Catalogue]] = {}
+        for catalogue in catalogues:
+            if catalogue.evaluation is None:
+                by_engine.setdefault(id(catalogue.engine), []).append(catalogue)
+        for group in by_engine.values():
+            evaluation = group[0].engine.evaluate(np.stack([catalogue.prices for catalogue in group]))
+            for scenario, catalogue in enumerate(group):
+                catalogue.evaluation = engine.CostEvaluation(
+                    catalogue.engine, evaluation.prices[scenario:scenario+1],
+                    evaluation.supplement_costs[scenario:scenario+1],
+                    evaluation.unit_cost[:, scenario:scenario+1],
+                    evaluation.material_cost[scenario:scenario+1],
+                    evaluation.best_setup[:, scenario:scenario+1]
+                )
+
+def load_catalogues(platforms: Dict[str, str], input_dir: str = None) -> Dict[str, Catalogue]:
+    """
+    Load the recipe structure once and a catalogue of prices for each platform.
+
+    platforms maps a name to a folder holding that platform's Resources.csv, only the
+    prices are read from it. The structure is read from input_dir (the Input folder by
+    default) and its prices are left loaded.
+
+    Returns:
+        Dict[str, Catalogue]: A catalogue for each platform, all sharing one CostEngine.
+    """
+    from Modules.util import load_all_files
+    load_all_files(input_dir)
+    cost_engine = engine.CostEngine()
+    output: Dict[str, Catalogue] = {}
+    for name, platform_dir in platforms.items():
+        file_loc = f"{platform_dir}/Resources.csv"
+        if not os.path.isfile(file_loc):
+            logger.error(f"No Resources.csv for {name} in {platform_dir}.")
+            continue
+        output[name] = Catalogue.load_csv(name, cost_engine, file_loc)
+    return output
@@ -23,4 +23,12 @@ ARTISAN_TYPES = {
 FOCUS_MULTIPLIER = 1/430
 
 Recipe = List[Tuple[float, str]]
-"""A list of objects and the quantity required."""
\ No newline at end of file
+"""A list of objects and the quantity required."""
+WARM_UP_ITEMS: List[str] = ["Living Feywood"]
+"""Items calculator.py ranks in the background first while waiting for input."""
+
+WARM_UP_MATERIALS = 20
+"""How many of the materials most used as ingredients are then ranked in the background."""
+
+AUCTION_HOUSE_FEE = 0.1
+"""Share of the sale price the auction house keeps."""
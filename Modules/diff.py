@@ -0,0 +1,261 @@
+from __future__ import annotations
+import csv
+import logging
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from Modules.constants import PROFESSIONS
+import Modules.engine as engine
+import Modules.objects.item as item
+import Modules.objects.recipe as recipe
+from Modules.util import get_dependents, load_all_files
+from Modules.watcher import KEY_COLUMNS, Rows, diff_rows, read_rows
+
+logger = logging.getLogger(__name__)
+
+FILE_KEY_COLUMNS = {
+    **KEY_COLUMNS,
+    "MW Items.csv": 2,
+    "Commissions.csv": 2
+}
+"""The files compared row by row besides the recipes, and the column of the name identifying each row."""
+
+RECIPE_COLUMNS = (0, 1, 2, 3, 4, 5, 7, 8, 16, 17, 18)
+"""The columns of MW Recipes.csv read when loading, the rest are worked out from prices."""
+
+TOLERANCE = 1e-9
+
+def read_recipe_rows(file_loc: str) -> Rows:
+    """
+    Returns:
+        Dict[str, Tuple[Tuple[str, ...], ...]]: The rows of each recipe in an MW Recipes.csv
+            file by its name, only keeping the columns read when loading.
+    """
+    output: Dict[str, Tuple[Tuple[str, ...], ...]] = {}
+    with open(file_loc) as f:
+        csvreader = csv.reader(f)
+        header = next(csvreader)
+        name = None
+        for row in csvreader:
+            row = row + [""] * (max(RECIPE_COLUMNS) + 1 - len(row))
+            if row[2] is not None and row[2] != "":
+                # A tool means the start of the next recipe, the same as MWItem.load_csv
+                name = row[1]
+                output[name] = ()
+            if name is not None:
+                output[name] += (tuple(row[column] for column in RECIPE_COLUMNS),)
+    return output
+
+def read_prices(file_loc: str) -> Dict[str, float]:
+    """
+    Returns:
+        Dict[str, float]: The price of every resource in a Resources.csv file.
+    """
+    output: Dict[str, float] = {}
+    with open(file_loc) as f:
+        csvreader = csv.reader(f)
+        header = next(csvreader)
+        for row in csvreader:
+            if any(prof in row[6] for prof in PROFESSIONS):
+                # Materials aren't resources, the same as MWResource.load_csv
+                continue
+            resource = item.MWResource(row)
+            output[resource.name] = resource.price
+    return output
+
+class CostChange:
+    """An item whose optimal cost or setup differs between two catalogues."""
+
+    __slots__ = ("name", "high_quality", "old_cost", "new_cost", "old_setup", "new_setup")
+
+    def __init__(self, name: str, high_quality: bool, old_cost: float, new_cost: float,
+                 old_setup: Tuple[str, str, str], new_setup: Tuple[str, str, str]):
+        self.name = name
+        self.high_quality = high_quality
+        self.old_cost = old_cost
+        self.new_cost = new_cost
+        self.old_setup = old_setup
+        self.new_setup = new_setup
+
+class CatalogueDiff:
+    """
+    What changed between two Input folders, e.g. before and after a new export.
+
+    Both are loaded and compiled side by side and lined up by name. Every file is
+    compared row by row. Costs are only recalculated for items depending on a changed
+    recipe, price, artisan, tool or supplement (see CostEngine.get_cone), everything
+    else keeps the cost and setup it had in the old catalogue.
+
+    The new catalogue is left loaded afterwards.
+    """
+    def __init__(self, old_dir: str, new_dir: str):
+        self.old_dir = old_dir
+        self.new_dir = new_dir
+        self.rows: Dict[str, Tuple[List[str], List[str], List[str]]] = {}
+        for file_name, key_column in FILE_KEY_COLUMNS.items():
+            self.rows[file_name] = diff_rows(
+                read_rows(f"{old_dir}/{file_name}", key_column), read_rows(f"{new_dir}/{file_name}", key_column)
+            )
+        old_recipes = read_recipe_rows(f"{old_dir}/MW Recipes.csv")
+        new_recipes = read_recipe_rows(f"{new_dir}/MW Recipes.csv")
+        self.rows["MW Recipes.csv"] = diff_rows(old_recipes, new_recipes)
+        old_prices = read_prices(f"{old_dir}/Resources.csv")
+        new_prices = read_prices(f"{new_dir}/Resources.csv")
+        self.prices: List[Tuple[str, float, float]] = [
+            (name, old_prices[name], price) for name, price in new_prices.items()
+            if name in old_prices and old_prices[name] != price
+        ]
+
+        load_all_files(old_dir)
+        self.old_engine = engine.CostEngine()
+        self.old_evaluation = self.old_engine.evaluate()
+        load_all_files(new_dir)
+        self.new_engine = engine.CostEngine()
+        cone = self.get_cone(new_recipes)
+        self.recalculated = len(cone)
+        self.new_evaluation = self.evaluate(cone)
+        self.changes = self.compare(cone)
+        logger.info(
+            f"Recalculated {self.recalculated} of {len(self.new_engine.craftables)} crafted items, "
+            f"{len(self.changes)} changed cost or setup."
+        )
+
+    def get_cone(self, new_recipes: Rows) -> np.ndarray:
+        """
+        Find the crafted items of the new catalogue whose cost may differ from the old one.
+
+        Returns:
+            np.ndarray: Their indices in the new engine, ingredients first.
+        """
+        old, new = self.old_engine, self.new_engine
+        everything = np.arange(len(new.craftables))
+        # Every setup uses a tool and a supplement, and setups are numbered by them
+        for file_name in ["Tools.csv", "Supplements.csv"]:
+            if sum(len(names) for names in self.rows[file_name]) > 0:
+                logger.info(f"{file_name} changed, recalculating everything.")
+                return everything
+        if [tool.name for tool in old.tools] != [tool.name for tool in new.tools] or \
+                [supplement.name for supplement in old.supplements] != [supplement.name for supplement in new.supplements]:
+            return everything
+        new_supplement_costs = new.get_supplement_costs(np.atleast_2d(new.get_prices()))
+        if not np.array_equal(self.old_evaluation.supplement_costs, new_supplement_costs):
+            # Supplements are priced in every setup
+            logger.info("Supplement costs changed, recalculating everything.")
+            return everything
+
+        # Changed recipes, the items using them and the items using removed recipes
+        added, changed, removed = self.rows["MW Recipes.csv"]
+        names: Set[str] = set(added + changed) | get_dependents(added + changed + removed)
+        # Artisan types whose artisans changed
+        added, changed, removed = self.rows["Artisans.csv"]
+        old_artisans = read_rows(f"{self.old_dir}/Artisans.csv", KEY_COLUMNS["Artisans.csv"])
+        new_artisans = read_rows(f"{self.new_dir}/Artisans.csv", KEY_COLUMNS["Artisans.csv"])
+        artisan_types = {new_artisans[name][0] for name in added + changed}
+        artisan_types |= {old_artisans[name][0] for name in changed + removed}
+        if "Any" in artisan_types:
+            # Artisans of any profession are listed under every artisan type, the same as Artisan.load_csv
+            artisan_types |= set(new.artisans.keys())
+        for artisan_type, artisans in new.artisans.items():
+            # Setups are numbered by each type's artisans, so the order and stats have to match
+            if self.get_artisan_stats(old.artisans.get(artisan_type, [])) != self.get_artisan_stats(artisans):
+                artisan_types.add(artisan_type)
+        names |= {
+            craftable.name for craftable, artisan_type in zip(new.craftables, new.artisan_type)
+            if artisan_type in artisan_types
+        }
+        # Items with nothing to copy from the old catalogue
+        names |= {craftable.name for craftable in new.craftables if craftable.name not in old.craftable_index}
+        craftables = [new.craftable_index[name] for name in names if name in new.craftable_index]
+
+        # Resources priced differently, including ones only one of the catalogues has
+        old_prices = self.old_evaluation.prices[0]
+        new_prices = new.get_prices()
+        resources = [
+            index for index, name in enumerate(new.resource_names)
+            if (old_prices[old.resource_index[name]] if name in old.resource_index else 0) != new_prices[index]
+        ]
+        return new.get_cone(resources, craftables)
+
+    @staticmethod
+    def get_artisan_stats(artisans: List['recipe.Artisan']) -> List[Tuple]:
+        """
+        Returns:
+            List[Tuple]: Every field of each artisan, in order.
+        """
+        return [tuple(getattr(artisan, slot) for slot in type(artisan).__slots__) for artisan in artisans]
+
+    def evaluate(self, cone: np.ndarray) -> 'engine.CostEvaluation':
+        """
+        Evaluate the new catalogue, only recalculating the items in cone and copying the
+        rest from the old evaluation.
+
+        Returns:
+            CostEvaluation: The same as evaluating the new engine in full.
+        """
+        old, new = self.old_engine, self.new_engine
+        prices = np.atleast_2d(new.get_prices())
+        supplement_costs = new.get_supplement_costs(prices)
+        unit_cost = np.zeros((2, 1, len(new.craftables)))
+        material_cost = np.zeros((1, len(new.craftables)))
+        best_setup = np.zeros((2, 1, len(new.craftables)), dtype=np.int64)
+        clean = np.ones(len(new.craftables), dtype=bool)
+        clean[cone] = False
+        clean_indices = np.flatnonzero(clean)
+        old_indices = [old.craftable_index[new.craftables[index].name] for index in clean_indices]
+        unit_cost[:, :, clean_indices] = self.old_evaluation.unit_cost[:, :, old_indices]
+        material_cost[:, clean_indices] = self.old_evaluation.material_cost[:, old_indices]
+        best_setup[:, :, clean_indices] = self.old_evaluation.best_setup[:, :, old_indices]
+        for index in cone:
+            new._evaluate_item(index, prices, supplement_costs, unit_cost, material_cost, best_setup)
+        return engine.CostEvaluation(new, prices, supplement_costs, unit_cost, material_cost, best_setup)
+
+    def compare(self, cone: np.ndarray) -> List[CostChange]:
+        """
+        Returns:
+            List[CostChange]: The recalculated items in both catalogues whose cost or setup
+                changed, biggest relative change first.
+        """
+        output: List[CostChange] = []
+        for index in cone:
+            name = self.new_engine.craftables[index].name
+            if name not in self.old_engine.craftable_index:
+                continue
+            for high_quality in engine.QUALITIES:
+                old_cost = float(self.old_evaluation.get_cost(name, high_quality)[0])
+                new_cost = float(self.new_evaluation.get_cost(name, high_quality)[0])
+                old_setup = tuple(entry.name for entry in self.old_evaluation.get_setup(name, high_quality))
+                new_setup = tuple(entry.name for entry in self.new_evaluation.get_setup(name, high_quality))
+                if abs(new_cost - old_cost) > TOLERANCE * max(abs(old_cost), 1) or old_setup != new_setup:
+                    output.append(CostChange(name, high_quality, old_cost, new_cost, old_setup, new_setup))
+        output.sort(key=lambda change: abs(change.new_cost - change.old_cost) / max(abs(change.old_cost), 1), reverse=True)
+        return output
+
+    def pretty_print(self, count: int = 20):
+        """
+        Print in the console the changed rows, prices and the biggest cost changes.
+        """
+        print(f"\nChanges from {self.old_dir} to {self.new_dir}")
+        print("-"*144)
+        for file_name, (added, changed, removed) in self.rows.items():
+            print(f"{file_name}: {len(added)} added, {len(changed)} changed, {len(removed)} removed")
+            for label, names in [("Added", added), ("Changed", changed), ("Removed", removed)]:
+                if len(names) > 0:
+                    shown = ", ".join(names[:count])
+                    print(f"    {label}: {shown}{f' and {len(names) - count} more' if len(names) > count else ''}")
+        print(f"\n{len(self.prices)} resource prices changed")
+        for name, old_price, new_price in self.prices[:count]:
+            print(f"    {name}: {'{:,}'.format(round(old_price))} -> {'{:,}'.format(round(new_price))} AD")
+
+        print(
+            f"\nRecalculated {self.recalculated} of {len(self.new_engine.craftables)} crafted items, "
+            f"{len(self.changes)} costs or setups changed"
+        )
+        print("-"*144)
+        for change in self.changes[:count]:
+            setup = "same setup" if change.old_setup == change.new_setup else \
+                f"{change.old_setup[0]} + {change.old_setup[2]} -> {change.new_setup[0]} + {change.new_setup[2]}"
+            print(
+                f"{change.name}{' +1' if change.high_quality else ''}: {'{:,}'.format(round(change.old_cost))} -> "
+                f"{'{:,}'.format(round(change.new_cost))} AD ({setup})"
+            )
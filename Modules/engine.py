@@ -0,0 +1,714 @@
+from __future__ import annotations
+import logging
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from Modules.constants import ARTISAN_TYPES, FOCUS_MULTIPLIER
+import Modules.objects.item as item
+import Modules.objects.recipe as recipe
+from Modules.util import find_mw_object
+
+logger = logging.getLogger(__name__)
+
+QUALITIES = [False, True]
+"""Normal and high quality, in the order they are laid out in setup tables."""
+
+def get_name(entry) -> str:
+    """
+    Returns:
+        str: The name of a crafted item, artisan, tool or supplement, or the entry itself
+            on engines that only keep names (see SharedEngine).
+    """
+    return entry if isinstance(entry, str) else entry.name
+
+def pretty_print_entry(entry) -> str:
+    """
+    Returns:
+        str: The pretty_print of an artisan, tool or supplement, or just its name on
+            engines that only keep names (see SharedEngine).
+    """
+    return entry if isinstance(entry, str) else entry.pretty_print()
+
+class SetupTable:
+    """
+    The expected outcome of crafting a recipe with every setup of an artisan type.
+
+    Each array has shape (2, setups), normal quality first then +1. Multipliers are per
+    craft, before dividing by the quantity the recipe produces.
+    """
+
+    __slots__ = ("multiplier", "attempts", "failures", "normal_results", "high_quality_results")
+
+    CACHE: Dict[Tuple[str, float, float, bool], SetupTable] = {}
+    """Tables shared by every recipe with the same artisan type, proficiency, focus and dab hand."""
+
+    SOURCES: Tuple[Dict, Dict, Dict] = None
+    """The artisan, tool and supplement registries the cached tables were built from."""
+
+    INDICES: Tuple[Dict[str, Dict[str, int]], Dict[str, int], Dict[str, int]] = None
+    """Position of each artisan (per artisan type), tool and supplement in the tables."""
+
+    LOCK = Lock()
+
+    def __init__(self, proficiency: float, focus: float, can_dab_hand: bool,
+                 artisan_stats: 'recipe.SetupStats', tool_stats: 'recipe.SetupStats',
+                 supplement_stats: 'recipe.SetupStats'):
+        # Same formulas as MWItem.get_chances and MWItem.get_multipliers, laid out as
+        # (artisans, tools, supplements) then flattened into one setup axis
+        artisan_shape = (-1, 1, 1)
+        tool_shape = (1, -1, 1)
+        supplement_shape = (1, 1, -1)
+        success_chance = (
+            artisan_stats.proficiency.reshape(artisan_shape)
+            + tool_stats.proficiency.reshape(tool_shape)
+            + supplement_stats.proficiency.reshape(supplement_shape)
+        ) / proficiency
+        focus_differential = (
+            focus - artisan_stats.focus.reshape(artisan_shape)
+            - tool_stats.focus.reshape(tool_shape)
+            - supplement_stats.focus.reshape(supplement_shape)
+        )
+        high_quality_chance = np.maximum(1 - (FOCUS_MULTIPLIER * focus_differential), 0.0000001)
+        recycle_chance = 1 - (
+            (1 - artisan_stats.recycle_chance.reshape(artisan_shape))
+            * (1 - supplement_stats.recycle_chance.reshape(supplement_shape))
+            * (1 - tool_stats.recycle_chance.reshape(tool_shape))
+        )
+        dab_hand_chance = 1 - (
+            (1 - artisan_stats.dab_hand_chance.reshape(artisan_shape))
+            * (1 - supplement_stats.dab_hand_chance.reshape(supplement_shape))
+            * (1 - tool_stats.recycle_chance.reshape(tool_shape))
+        )
+        expected_attempts = 1 / success_chance
+        if can_dab_hand:
+            expected_attempts = expected_attempts / (1+dab_hand_chance)
+        quantity_multiplier = (1 + ((expected_attempts - 1) * (1 - recycle_chance)))
+
+        multiplier = [quantity_multiplier, quantity_multiplier / high_quality_chance]
+        attempts = [expected_attempts, expected_attempts / high_quality_chance]
+        failures = []
+        normal_results = []
+        high_quality_results = []
+        for quality_attempts in attempts:
+            failures.append(quality_attempts * (1-success_chance))
+            normal = quality_attempts * (success_chance * (1-high_quality_chance))
+            high_quality = quality_attempts * (success_chance * high_quality_chance)
+            if can_dab_hand:
+                normal = normal * (1+dab_hand_chance)
+                high_quality = high_quality * (1+dab_hand_chance)
+            normal_results.append(normal)
+            high_quality_results.append(high_quality)
+
+        def flatten(arrays: List[np.ndarray]) -> np.ndarray:
+            return np.stack([np.broadcast_to(array, success_chance.shape).ravel() for array in arrays])
+        self.multiplier = flatten(multiplier)
+        self.attempts = flatten(attempts)
+        self.failures = flatten(failures)
+        self.normal_results = flatten(normal_results)
+        self.high_quality_results = flatten(high_quality_results)
+
+    @classmethod
+    def _check_sources(cls):
+        """Start again if artisans, tools or supplements have been reloaded since caching."""
+        sources = (recipe.Artisan.OBJECTS, recipe.Tool.OBJECTS, recipe.Supplement.OBJECTS)
+        if cls.SOURCES is None or any(cached is not current for cached, current in zip(cls.SOURCES, sources)):
+            cls.CACHE = {}
+            cls.SOURCES = sources
+            cls.INDICES = (
+                {
+                    artisan_type: {artisan.name: index for index, artisan in enumerate(artisans)}
+                    for artisan_type, artisans in recipe.Artisan.OBJECTS.items()
+                },
+                {name: index for index, name in enumerate(recipe.Tool.OBJECTS.keys())},
+                {name: index for index, name in enumerate(recipe.Supplement.OBJECTS.keys())}
+            )
+
+    @classmethod
+    def get(cls, artisan_type: str, proficiency: float, focus: float, can_dab_hand: bool) -> SetupTable:
+        """
+        Fetch the table for a requirement class, computing it the first time it is needed.
+
+        Returns:
+            SetupTable: The table for every loaded artisan of the type, tool and supplement.
+        """
+        key = (artisan_type, proficiency, focus, can_dab_hand)
+        with cls.LOCK:
+            cls._check_sources()
+            table = cls.CACHE.get(key)
+            if table is None:
+                table = SetupTable(
+                    proficiency, focus, can_dab_hand,
+                    recipe.SetupStats(recipe.Artisan.OBJECTS.get(artisan_type)),
+                    recipe.SetupStats(list(recipe.Tool.OBJECTS.values())),
+                    recipe.SetupStats(list(recipe.Supplement.OBJECTS.values()))
+                )
+                cls.CACHE[key] = table
+        return table
+
+    @classmethod
+    def get_setup_index(cls, artisan_type: str, artisan: 'recipe.Artisan', tool: 'recipe.Tool',
+                        supplement: 'recipe.Supplement') -> int:
+        """
+        Returns:
+            int: The position of a setup in the tables of an artisan type, or None if any
+                part of it isn't one of the loaded artisans, tools and supplements.
+        """
+        with cls.LOCK:
+            cls._check_sources()
+            artisan_indices, tool_indices, supplement_indices = cls.INDICES
+        artisans = recipe.Artisan.OBJECTS.get(artisan_type)
+        artisan_index = artisan_indices.get(artisan_type, {}).get(artisan.name)
+        tool_index = tool_indices.get(tool.name)
+        supplement_index = supplement_indices.get(supplement.name)
+        if (
+            artisan_index is None or tool_index is None or supplement_index is None
+            or artisans[artisan_index] is not artisan
+            or recipe.Tool.OBJECTS[tool.name] is not tool
+            or recipe.Supplement.OBJECTS[supplement.name] is not supplement
+        ):
+            return None
+        return (artisan_index * len(tool_indices) + tool_index) * len(supplement_indices) + supplement_index
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop every cached table. Call after changing an artisan, tool or supplement in place.
+        """
+        with cls.LOCK:
+            cls.SOURCES = None
+
+class CostEngine:
+    """
+    An array-based copy of the loaded catalogue for calculating many costs at once.
+
+    Resources, crafted items and setups are numbered, recipes are stored as index and
+    quantity arrays, and every setup's multipliers are precomputed. Costs are then just
+    a function of the resource price vector, so many price vectors can be evaluated in
+    one pass. Build it after load_all_files.
+    """
+    def __init__(self):
+        craftables: List[item.MWItem] = list(item.MWItem.OBJECTS.values())
+        from Modules.objects.material import MWMaterial
+        craftables += list(MWMaterial.OBJECTS.values())
+
+        # Number the resources. Unknown names are treated as resources worth 0
+        self.resource_names: List[str] = list(item.MWResource.OBJECTS.keys())
+        self.resource_index: Dict[str, int] = {
+            name: index for index, name in enumerate(self.resource_names)
+        }
+        def resource_id(name: str) -> int:
+            if name not in self.resource_index:
+                self.resource_index[name] = len(self.resource_names)
+                self.resource_names.append(name)
+            return self.resource_index[name]
+
+        # Order crafted items so ingredients always come before the items using them
+        by_name = {craftable.name: craftable for craftable in craftables}
+        visited = set()
+        order: List[item.MWItem] = []
+        for craftable in craftables:
+            if craftable.name in visited:
+                continue
+            visited.add(craftable.name)
+            stack = [(craftable, iter(craftable.recipe))]
+            while len(stack) > 0:
+                current, ingredients = stack[-1]
+                for ingredient in ingredients:
+                    ingredient_object = find_mw_object(ingredient[1])
+                    if ingredient_object.name in by_name and ingredient_object.name not in visited:
+                        visited.add(ingredient_object.name)
+                        stack.append((ingredient_object, iter(ingredient_object.recipe)))
+                        break
+                else:
+                    stack.pop()
+                    order.append(current)
+        self.craftables: List[item.MWItem] = order
+        self.craftable_index: Dict[str, int] = {
+            craftable.name: index for index, craftable in enumerate(order)
+        }
+
+        # Recipes as index/quantity arrays, split into resource and crafted ingredients
+        self.quantity = np.array([craftable.quantity for craftable in order], dtype=float)
+        self.resource_ingredients: List[Tuple[np.ndarray, np.ndarray]] = []
+        self.craftable_ingredients: List[Tuple[np.ndarray, np.ndarray]] = []
+        for craftable in order:
+            resource_entries = []
+            craftable_entries = []
+            for quantity, name in craftable.recipe:
+                ingredient_object = find_mw_object(name)
+                if ingredient_object.name in self.craftable_index:
+                    craftable_entries.append((self.craftable_index[ingredient_object.name], quantity))
+                else:
+                    resource_entries.append((resource_id(ingredient_object.name), quantity))
+            self.resource_ingredients.append(self._entry_arrays(resource_entries))
+            self.craftable_ingredients.append(self._entry_arrays(craftable_entries))
+
+        # Supplements. Each is either bought (a resource) or crafted with a fixed setup
+        # from resources only, the same as Supplement.craft
+        self.supplements: List[recipe.Supplement] = list(recipe.Supplement.OBJECTS.values())
+        self.supplement_index: Dict[str, int] = {
+            supplement.name: index for index, supplement in enumerate(self.supplements)
+        }
+        self.supplement_ingredients: List[Tuple[np.ndarray, np.ndarray]] = []
+        fixed_setup = None
+        for supplement in self.supplements:
+            supplement_object = supplement.object
+            if not isinstance(supplement_object, item.MWItem):
+                self.supplement_ingredients.append(self._entry_arrays([(resource_id(supplement_object.name), 1.0)]))
+                continue
+            if fixed_setup is None:
+                fixed_setup = recipe.Supplement.get_crafting_setup()
+            quantity_multiplier, _ = supplement_object.get_multipliers(*fixed_setup, supplement.high_quality)
+            quantity_multiplier = quantity_multiplier / supplement_object.quantity
+            entries = []
+            for quantity, name in supplement_object.recipe:
+                ingredient_object = find_mw_object(name)
+                if isinstance(ingredient_object, item.MWItem):
+                    raise ValueError(
+                        f"Supplement {supplement.name} is made from crafted {ingredient_object.name}, "
+                        "which would make supplement costs recursive."
+                    )
+                entries.append((resource_id(ingredient_object.name), quantity * quantity_multiplier))
+            self.supplement_ingredients.append(self._entry_arrays(entries))
+        # Resources consumed by one of each supplement, as dense rows
+        self.supplement_consumption = np.zeros((len(self.supplements), len(self.resource_names)))
+        for index, (resources, quantities) in enumerate(self.supplement_ingredients):
+            np.add.at(self.supplement_consumption[index], resources, quantities)
+
+        # Setups for each artisan type, enumerated artisan, tool then supplement
+        # like get_optimal_recipe
+        self.tools: List[recipe.Tool] = list(recipe.Tool.OBJECTS.values())
+        self.artisans: Dict[str, List[recipe.Artisan]] = {}
+        self.setups: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.artisan_type: List[str] = []
+        self.tables: List[SetupTable] = []
+        self.excluded: List[np.ndarray] = []
+        for craftable in order:
+            artisan_type = ARTISAN_TYPES.get(craftable.profession)
+            if artisan_type not in self.setups:
+                artisans = recipe.Artisan.OBJECTS.get(artisan_type)
+                self.artisans[artisan_type] = artisans
+                self.setups[artisan_type] = tuple(
+                    index.ravel() for index in np.meshgrid(
+                        np.arange(len(artisans)), np.arange(len(self.tools)),
+                        np.arange(len(self.supplements)), indexing="ij"
+                    )
+                )
+            self.artisan_type.append(artisan_type)
+            # Recipes with the same requirements share one table
+            self.tables.append(SetupTable.get(
+                artisan_type, craftable.proficiency, craftable.focus, craftable.can_dab_hand
+            ))
+            # An item is never used as a supplement for itself
+            self.excluded.append(self.setups[artisan_type][2] == self.supplement_index.get(craftable.name, -1))
+        # The crafted items using each resource and each crafted item directly
+        self.resource_users: List[List[int]] = [[] for _ in self.resource_names]
+        self.craftable_users: List[List[int]] = [[] for _ in order]
+        for index in range(len(order)):
+            for resource in self.resource_ingredients[index][0]:
+                self.resource_users[resource].append(index)
+            for craftable in self.craftable_ingredients[index][0]:
+                self.craftable_users[craftable].append(index)
+        logger.info(
+            f"Compiled {len(self.craftables)} crafted items and {len(self.resource_names)} resources."
+        )
+
+    @staticmethod
+    def _entry_arrays(entries: List[Tuple[int, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        return (
+            np.array([entry[0] for entry in entries], dtype=np.int64),
+            np.array([entry[1] for entry in entries], dtype=float)
+        )
+
+    def get_setup(self, index: int, setup: int) -> Tuple['recipe.Artisan', 'recipe.Tool', 'recipe.Supplement']:
+        """
+        Returns:
+            Tuple[Artisan, Tool, Supplement]: The setup numbered setup for a crafted item.
+        """
+        artisan_type = self.artisan_type[index]
+        artisans, tools, supplements = self.setups[artisan_type]
+        return (
+            self.artisans[artisan_type][artisans[setup]],
+            self.tools[tools[setup]],
+            self.supplements[supplements[setup]]
+        )
+
+    def get_cone(self, resources: Iterable[int], craftables: Iterable[int] = ()) -> np.ndarray:
+        """
+        Find the crafted items whose cost depends on any of the numbered resources, along
+        with the numbered crafted items and everything depending on them.
+
+        Every setup prices every supplement, so a resource used by a supplement reaches
+        every item.
+
+        Returns:
+            np.ndarray: Indices of the dependent crafted items, ingredients first.
+        """
+        resources = list(resources)
+        if len(resources) > 0 and self.supplement_consumption[:, resources].any():
+            return np.arange(len(self.craftables))
+        cone = set()
+        pending = [user for resource in resources for user in self.resource_users[resource]]
+        pending += list(craftables)
+        while len(pending) > 0:
+            index = pending.pop()
+            if index not in cone:
+                cone.add(index)
+                pending += self.craftable_users[index]
+        # Items are numbered ingredients first
+        return np.array(sorted(cone), dtype=np.int64)
+
+    def get_prices(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The currently loaded price of every resource.
+        """
+        return np.array([
+            item.MWResource.OBJECTS[name].price if name in item.MWResource.OBJECTS else 0
+            for name in self.resource_names
+        ], dtype=float)
+
+    def scenario_prices(self, scenarios: List[Dict[str, float]], prices: np.ndarray = None) -> np.ndarray:
+        """
+        Build a price vector for each scenario by scaling some resource prices.
+
+        Each scenario maps resource names to a price multiplier, e.g.
+        {"Feywood Log": 1.2} for Feywood Logs going up 20%.
+
+        Returns:
+            np.ndarray: Prices of shape (scenarios, resources).
+        """
+        if prices is None:
+            prices = self.get_prices()
+        output = np.tile(prices, (len(scenarios), 1))
+        for index, scenario in enumerate(scenarios):
+            for name, multiplier in scenario.items():
+                output[index, self.resource_index[name]] *= multiplier
+        return output
+
+    def get_supplement_costs(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The cost of one of each supplement, shape (scenarios, supplements).
+        """
+        output = np.zeros((prices.shape[0], len(self.supplements)))
+        for index, (resources, quantities) in enumerate(self.supplement_ingredients):
+            output[:, index] = prices[:, resources] @ quantities
+        return output
+
+    def evaluate(self, prices: np.ndarray = None,
+                 masks: Dict[str, np.ndarray] = None) -> 'CostEvaluation':
+        """
+        Find the optimal setup and cost of every crafted item under each price vector.
+
+        Items are visited once, ingredients first, and every scenario and setup of an
+        item is costed in one array operation. masks optionally limits the setups that
+        may be used, per artisan type, as a boolean array over setups or one row per
+        scenario (see Roster.get_masks).
+
+        Returns:
+            CostEvaluation: The costs and optimal setups for every scenario.
+        """
+        if prices is None:
+            prices = self.get_prices()
+        prices = np.atleast_2d(np.asarray(prices, dtype=float))
+        scenarios = prices.shape[0]
+        supplement_costs = self.get_supplement_costs(prices)
+        unit_cost = np.zeros((2, scenarios, len(self.craftables)))
+        material_cost = np.zeros((scenarios, len(self.craftables)))
+        best_setup = np.zeros((2, scenarios, len(self.craftables)), dtype=np.int64)
+        for index in range(len(self.craftables)):
+            self._evaluate_item(index, prices, supplement_costs, unit_cost, material_cost, best_setup, masks)
+        return CostEvaluation(self, prices, supplement_costs, unit_cost, material_cost, best_setup, masks)
+
+    def _evaluate_item(self, index: int, prices: np.ndarray, supplement_costs: np.ndarray,
+                       unit_cost: np.ndarray, material_cost: np.ndarray, best_setup: np.ndarray,
+                       masks: Dict[str, np.ndarray] = None):
+        """
+        Find the optimal setup and cost of one crafted item in place, given its ingredients'.
+        """
+        every_scenario = np.arange(prices.shape[0])
+        resources, resource_quantities = self.resource_ingredients[index]
+        craftables, craftable_quantities = self.craftable_ingredients[index]
+        resource_cost = prices[:, resources] @ resource_quantities
+        # Cost of one craft's ingredients, and the part of it spent on materials
+        base_cost = resource_cost + unit_cost[0][:, craftables] @ craftable_quantities
+        base_material_cost = resource_cost + material_cost[:, craftables] @ craftable_quantities
+        table = self.tables[index]
+        setup_supplements = supplement_costs[:, self.setups[self.artisan_type[index]][2]]
+        for quality in range(2):
+            setup_costs = (
+                base_cost[:, None] * (table.multiplier[quality] / self.quantity[index])
+                + (table.attempts[quality] / self.quantity[index]) * setup_supplements
+            )
+            setup_costs[:, self.excluded[index]] = np.inf
+            if masks is not None:
+                setup_costs = np.where(masks[self.artisan_type[index]], setup_costs, np.inf)
+            best = np.argmin(setup_costs, axis=1)
+            best_setup[quality, :, index] = best
+            unit_cost[quality, :, index] = setup_costs[every_scenario, best]
+        material_cost[:, index] = (
+            base_material_cost * table.multiplier[0][best_setup[0, :, index]] / self.quantity[index]
+        )
+
+class CostEvaluation:
+    """
+    The optimal cost and setup of every crafted item under one or more price vectors.
+
+    Arrays are indexed by (scenario, crafted item), with a leading quality axis where the
+    cost differs between normal and +1.
+    """
+    def __init__(self, engine: CostEngine, prices: np.ndarray, supplement_costs: np.ndarray,
+                 unit_cost: np.ndarray, material_cost: np.ndarray, best_setup: np.ndarray,
+                 masks: Dict[str, np.ndarray] = None):
+        self.engine = engine
+        self.prices = prices
+        self.supplement_costs = supplement_costs
+        self.unit_cost = unit_cost
+        self.material_cost = material_cost
+        self.best_setup = best_setup
+        self.masks = masks
+        self.consumption: Dict[int, np.ndarray] = {}
+
+    def update(self, prices: np.ndarray) -> CostEvaluation:
+        """
+        Evaluate new prices for the same scenarios, only recalculating the items that
+        depend on a resource whose price changed (see CostEngine.get_cone).
+
+        Returns:
+            CostEvaluation: The new costs and setups, this evaluation is left as it was.
+        """
+        prices = np.atleast_2d(np.asarray(prices, dtype=float))
+        engine = self.engine
+        cone = engine.get_cone(np.flatnonzero((prices != self.prices).any(axis=0)))
+        supplement_costs = engine.get_supplement_costs(prices)
+        unit_cost = self.unit_cost.copy()
+        material_cost = self.material_cost.copy()
+        best_setup = self.best_setup.copy()
+        for index in cone:
+            engine._evaluate_item(index, prices, supplement_costs, unit_cost, material_cost, best_setup, self.masks)
+        return CostEvaluation(engine, prices, supplement_costs, unit_cost, material_cost, best_setup, self.masks)
+
+    def get_cost(self, name: str, high_quality: bool = False) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The cost of one of the named item in each scenario.
+        """
+        return self.unit_cost[int(high_quality), :, self.engine.craftable_index[name]]
+
+    def get_setup(self, name: str, high_quality: bool = False,
+                  scenario: int = 0) -> Tuple['recipe.Artisan', 'recipe.Tool', 'recipe.Supplement']:
+        """
+        Returns:
+            Tuple[Artisan, Tool, Supplement]: The optimal setup for the named item in a scenario.
+        """
+        index = self.engine.craftable_index[name]
+        return self.engine.get_setup(index, self.best_setup[int(high_quality), scenario, index])
+
+    def get_outcome(self, name: str, high_quality: bool = False,
+                    scenario: int = 0) -> Tuple[float, float, float]:
+        """
+        Returns:
+            Tuple[float, float, float]: The expected attempts, normal results and +1 results
+                per craft with the optimal setup for the named item in a scenario.
+        """
+        index = self.engine.craftable_index[name]
+        quality = int(high_quality)
+        setup = self.best_setup[quality, scenario, index]
+        table = self.engine.tables[index]
+        return (
+            float(table.attempts[quality, setup]),
+            float(table.normal_results[quality, setup]),
+            float(table.high_quality_results[quality, setup])
+        )
+
+    def get_setup_costs(self, name: str, high_quality: bool = False) -> np.ndarray:
+        """
+        Cost every setup for the named item, given the optimal cost of its ingredients.
+
+        Returns:
+            np.ndarray: Costs of shape (scenarios, setups), excluded or masked setups cost inf.
+        """
+        engine = self.engine
+        index = engine.craftable_index[name]
+        resources, resource_quantities = engine.resource_ingredients[index]
+        craftables, craftable_quantities = engine.craftable_ingredients[index]
+        base_cost = (
+            self.prices[:, resources] @ resource_quantities
+            + self.unit_cost[0][:, craftables] @ craftable_quantities
+        )
+        table = engine.tables[index]
+        quality = int(high_quality)
+        setup_costs = (
+            base_cost[:, None] * (table.multiplier[quality] / engine.quantity[index])
+            + (table.attempts[quality] / engine.quantity[index])
+            * self.supplement_costs[:, engine.setups[engine.artisan_type[index]][2]]
+        )
+        setup_costs[:, engine.excluded[index]] = np.inf
+        if self.masks is not None:
+            setup_costs = np.where(self.masks[engine.artisan_type[index]], setup_costs, np.inf)
+        return setup_costs
+
+    def get_pareto_setups(self, name: str, high_quality: bool = False,
+                          scenario: int = 0) -> List[Tuple[int, float]]:
+        """
+        Find the setups that trade cost against +1 results and attempts, the same as
+        MWItem.get_pareto_recipes but from the setup costs rather than a ranking.
+
+        Returns:
+            List[Tuple[int, float]]: The non-dominated setups (see CostEngine.get_setup)
+                and their unit cost, cheapest first.
+        """
+        index = self.engine.craftable_index[name]
+        quality = int(high_quality)
+        costs = self.get_setup_costs(name, high_quality)[scenario]
+        table = self.engine.tables[index]
+        # pareto_indices needs the setups sorted by cost, ties kept in setup order
+        order = np.argsort(costs, kind="stable")
+        order = order[np.isfinite(costs[order])]
+        positions = recipe.pareto_indices(
+            costs[order],
+            table.high_quality_results[quality, order],
+            table.attempts[quality, order]
+        )
+        return [(int(order[position]), float(costs[order[position]])) for position in positions]
+
+    def pretty_print(self, name: str, high_quality: bool = False, labels: List[str] = None):
+        """
+        Print in the console the cost and optimal setup of an item in every scenario.
+        """
+        costs = self.get_cost(name, high_quality)
+        print(f"\n{name}{' +1' if high_quality else ''}")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        for scenario in range(len(costs)):
+            label = labels[scenario] if labels is not None else f"Scenario {scenario}"
+            artisan, _, supplement = self.get_setup(name, high_quality, scenario)
+            print(f"{label}: {'{:,}'.format(round(costs[scenario]))} AD: {pretty_print_entry(artisan)} + {pretty_print_entry(supplement)}")
+
+    def get_consumption(self, scenario: int = 0) -> np.ndarray:
+        """
+        Find the resources consumed by crafting one of every item with its optimal setups.
+
+        Costs are linear in resource prices while the setups stay fixed, so these are
+        also the rates at which each item's cost changes with each resource price.
+        Every item is visited once, ingredients first.
+
+        Returns:
+            np.ndarray: Consumption of shape (2, crafted items, resources).
+        """
+        if scenario in self.consumption:
+            return self.consumption[scenario]
+        engine = self.engine
+        output = np.zeros((2, len(engine.craftables), len(engine.resource_names)))
+        for index in range(len(engine.craftables)):
+            base_consumption = self._get_base_consumption(index, output)
+            table = engine.tables[index]
+            supplements = engine.setups[engine.artisan_type[index]][2]
+            for quality in range(2):
+                setup = self.best_setup[quality, scenario, index]
+                output[quality, index] = (
+                    base_consumption * (table.multiplier[quality][setup] / engine.quantity[index])
+                    + (table.attempts[quality][setup] / engine.quantity[index])
+                    * engine.supplement_consumption[supplements[setup]]
+                )
+        self.consumption[scenario] = output
+        return output
+
+    def _get_base_consumption(self, index: int, consumption: np.ndarray) -> np.ndarray:
+        # Resources in one craft's ingredients, crafted ingredients are always normal quality
+        engine = self.engine
+        resources, resource_quantities = engine.resource_ingredients[index]
+        craftables, craftable_quantities = engine.craftable_ingredients[index]
+        output = craftable_quantities @ consumption[0][craftables]
+        np.add.at(output, resources, resource_quantities)
+        return output
+
+    def get_sensitivity(self, name: str, high_quality: bool = False, scenario: int = 0) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: d(cost)/d(price) of the named item for every resource, with every
+                optimal setup held fixed.
+        """
+        return self.get_consumption(scenario)[int(high_quality), self.engine.craftable_index[name]]
+
+    def get_thresholds(self, name: str, high_quality: bool = False,
+                       scenario: int = 0) -> List[Tuple[str, float, float, Tuple]]:
+        """
+        Find the resource prices at which the named item's optimal setup changes.
+
+        Each resource's price is moved on its own, with the setups of the item's
+        ingredients held fixed. Both rises and drops are checked.
+
+        Returns:
+            List[Tuple[str, float, float, Tuple[Artisan, Tool, Supplement]]]: The resource,
+                its current price, the price at which the setup changes and the new setup.
+        """
+        engine = self.engine
+        index = engine.craftable_index[name]
+        quality = int(high_quality)
+        best = self.best_setup[quality, scenario, index]
+        setup_costs = self.get_setup_costs(name, high_quality)[scenario]
+        table = engine.tables[index]
+        supplements = engine.setups[engine.artisan_type[index]][2]
+        base_consumption = self._get_base_consumption(index, self.get_consumption(scenario))
+        # Rate each setup's cost changes with each resource price, shape (setups, resources)
+        slopes = (
+            (table.multiplier[quality] / engine.quantity[index])[:, None] * base_consumption[None, :]
+            + (table.attempts[quality] / engine.quantity[index])[:, None]
+            * engine.supplement_consumption[supplements]
+        )
+        cost_gap = (setup_costs - setup_costs[best])[:, None]
+        slope_gap = slopes - slopes[best]
+        valid = np.isfinite(setup_costs)
+        valid[best] = False
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = -cost_gap / slope_gap
+        prices = self.prices[scenario]
+        output = []
+        for rising in [True, False]:
+            if rising:
+                # A setup catches up when its cost rises slower than the best setup's
+                candidates = valid[:, None] & (slope_gap < 0)
+            else:
+                candidates = valid[:, None] & (slope_gap > 0) & (prices[None, :] + change >= 0)
+            distance = np.where(candidates, np.abs(change), np.inf)
+            closest = np.argmin(distance, axis=0)
+            for resource in np.flatnonzero(np.isfinite(distance[closest, np.arange(len(prices))])):
+                setup = closest[resource]
+                output.append((
+                    engine.resource_names[resource],
+                    float(prices[resource]),
+                    float(prices[resource] + change[setup, resource]),
+                    engine.get_setup(index, setup)
+                ))
+        return output
+
+    def pretty_print_sensitivity(self, name: str, high_quality: bool = False,
+                                 scenario: int = 0, count: int = 10):
+        """
+        Print in the console the resources an item's cost depends on most, and the
+        prices at which its optimal setup would change.
+        """
+        sensitivity = self.get_sensitivity(name, high_quality, scenario)
+        prices = self.prices[scenario]
+        share = sensitivity * prices
+        order = np.lexsort((-sensitivity, -share))
+        order = order[sensitivity[order] > 0][:count]
+        print(f"\n{name}{' +1' if high_quality else ''}: {'{:,}'.format(round(self.get_cost(name, high_quality)[scenario]))} AD")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        artisan, _, supplement = self.get_setup(name, high_quality, scenario)
+        print(f"Optimal setup: {pretty_print_entry(artisan)} + {pretty_print_entry(supplement)}")
+        print("Most sensitive resource prices (AD per 1 AD price change, AD of the cost):")
+        for resource in order:
+            print(f"  {self.engine.resource_names[resource]}: {round(float(sensitivity[resource]), 4)}, {'{:,}'.format(round(float(share[resource])))}")
+        thresholds = self.get_thresholds(name, high_quality, scenario)
+        if len(thresholds) == 0:
+            print("No single resource price change alters the optimal setup.")
+            return
+        print("Optimal setup changes when:")
+        thresholds.sort(key=lambda entry: abs(entry[2] - entry[1]) / max(entry[1], 1))
+        for resource_name, price, threshold, (artisan, _, supplement) in thresholds[:count]:
+            direction = "rises above" if threshold > price else "drops below"
+            print(f"  {resource_name} {direction} {'{:,}'.format(round(threshold))} AD (now {'{:,}'.format(round(price))}): {pretty_print_entry(artisan)} + {pretty_print_entry(supplement)}")
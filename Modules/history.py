@@ -0,0 +1,195 @@
+from __future__ import annotations
+import csv
+from datetime import date, datetime
+import logging
+import os
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import Modules.engine as engine
+from Modules.constants import PROFESSIONS
+
+logger = logging.getLogger(__name__)
+
+DATED_PRICE_HEADER = re.compile(r"AH Price \((\d+)-(\d+)-(\d+)\)")
+"""Header of an old price column in Resources.csv, dated day-month-year."""
+
+class PriceHistory:
+    """
+    Dated snapshots of every resource's price.
+
+    Snapshots are stored as the changes from the previous date only, so a resource whose
+    price hasn't moved costs nothing extra to keep. Optimal costs are cached per date,
+    adding or replacing a snapshot only recalculates that date.
+    """
+    def __init__(self, resource_names: List[str]):
+        self.resource_names = resource_names
+        self.resource_index: Dict[str, int] = {
+            name: index for index, name in enumerate(resource_names)
+        }
+        self.dates: List[date] = []
+        # Resource indices and new prices for each date, relative to the date before
+        self.changes: Dict[date, Tuple[np.ndarray, np.ndarray]] = {}
+        self.results: Dict[date, Tuple[np.ndarray, np.ndarray]] = {}
+        self.engine: 'engine.CostEngine' = None
+
+    def add_snapshot(self, snapshot_date: date, prices: np.ndarray):
+        """
+        Add (or replace) the price of every resource on a date.
+        """
+        prices = np.asarray(prices, dtype=float)
+        # Materialise the neighbours before the deltas around the new date change,
+        # including the delta of the snapshot being replaced
+        later_dates = [d for d in self.dates if d > snapshot_date]
+        following = later_dates[0] if len(later_dates) > 0 else None
+        following_prices = self.get_prices(following) if following is not None else None
+        previous_prices = self._prices_before(snapshot_date)
+        if snapshot_date not in self.changes:
+            self.dates.append(snapshot_date)
+            self.dates.sort()
+        self.changes[snapshot_date] = self._delta(previous_prices, prices)
+        if following is not None:
+            self.changes[following] = self._delta(prices, following_prices)
+        self.results.pop(snapshot_date, None)
+
+    def _delta(self, previous: np.ndarray, current: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        changed = np.flatnonzero(previous != current)
+        return changed, current[changed]
+
+    def _prices_before(self, snapshot_date: date) -> np.ndarray:
+        prices = np.zeros(len(self.resource_names))
+        for current_date in self.dates:
+            if current_date >= snapshot_date:
+                break
+            changed, values = self.changes[current_date]
+            prices[changed] = values
+        return prices
+
+    def get_prices(self, snapshot_date: date) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The price of every resource on the given snapshot date.
+        """
+        prices = self._prices_before(snapshot_date)
+        changed, values = self.changes[snapshot_date]
+        prices[changed] = values
+        return prices
+
+    def get_matrix(self, dates: List[date] = None) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Prices of shape (dates, resources), one row per snapshot date.
+        """
+        if dates is None:
+            dates = self.dates
+        wanted = set(dates)
+        output = []
+        prices = np.zeros(len(self.resource_names))
+        for current_date in self.dates:
+            changed, values = self.changes[current_date]
+            prices[changed] = values
+            if current_date in wanted:
+                output.append(prices.copy())
+        return np.array(output).reshape(len(output), len(self.resource_names))
+
+    def evaluate(self, cost_engine: 'engine.CostEngine'):
+        """
+        Calculate every item's optimal cost on every snapshot date not already cached.
+
+        All missing dates are evaluated together as one batch of price scenarios.
+        """
+        if cost_engine is not self.engine:
+            self.engine = cost_engine
+            self.results = {}
+        missing = [d for d in self.dates if d not in self.results]
+        if len(missing) == 0:
+            return
+        logger.info(f"Calculating optimal costs for {len(missing)} price snapshots.")
+        prices = self.get_matrix(missing)
+        # The engine may know extra resources (unknown names) that are priced at 0
+        if prices.shape[1] < len(cost_engine.resource_names):
+            prices = np.pad(prices, ((0, 0), (0, len(cost_engine.resource_names) - prices.shape[1])))
+        evaluation = cost_engine.evaluate(prices)
+        for scenario, snapshot_date in enumerate(missing):
+            self.results[snapshot_date] = (
+                evaluation.unit_cost[:, scenario, :],
+                evaluation.best_setup[:, scenario, :]
+            )
+
+    def get_cost_history(self, cost_engine: 'engine.CostEngine', name: str,
+                         high_quality: bool = False) -> List[Tuple[date, float, Tuple]]:
+        """
+        Returns:
+            List[Tuple[date, float, Tuple[Artisan, Tool, Supplement]]]: The optimal cost and
+                setup for the named item on each snapshot date.
+        """
+        self.evaluate(cost_engine)
+        index = self.engine.craftable_index[name]
+        quality = int(high_quality)
+        output = []
+        for snapshot_date in self.dates:
+            unit_cost, best_setup = self.results[snapshot_date]
+            output.append((
+                snapshot_date,
+                float(unit_cost[quality, index]),
+                self.engine.get_setup(index, best_setup[quality, index])
+            ))
+        return output
+
+    def load_csv(self, file_loc: str, current_date: date = None):
+        """
+        Add the snapshots found in a Resources.csv export.
+
+        The old dated "AH Price (d-m-yyyy)" columns each become a snapshot, blank cells in
+        them take the current price. The current "AH Price" column is dated current_date,
+        or the file's modified date.
+        """
+        if current_date is None:
+            current_date = date.fromtimestamp(os.path.getmtime(file_loc))
+        with open(file_loc) as f:
+            csvreader = csv.reader(f)
+            header = next(csvreader)
+            columns: Dict[int, date] = {4: current_date}
+            for column, title in enumerate(header):
+                match = DATED_PRICE_HEADER.fullmatch(title.strip())
+                if match is not None:
+                    day, month, year = (int(group) for group in match.groups())
+                    columns[column] = date(year, month, day)
+            snapshots = {column: np.zeros(len(self.resource_names)) for column in columns}
+            for row in csvreader:
+                if any(prof in row[6] for prof in PROFESSIONS):
+                    # Materials aren't resources, the same as MWResource.load_csv
+                    continue
+                if row[1] not in self.resource_index:
+                    continue
+                current_value = row[4]
+                for column in columns:
+                    value = row[column] if column < len(row) else ""
+                    if value == "":
+                        # Old columns only record some prices, assume the rest were as now
+                        value = current_value
+                    snapshots[column][self.resource_index[row[1]]] = float(value.replace(",", "")) if value != "" else 0
+        for column, snapshot_date in columns.items():
+            self.add_snapshot(snapshot_date, snapshots[column])
+
+    def load_directory(self, directory: str):
+        """
+        Add a snapshot for every Resources.csv export in a directory named by date,
+        e.g. "2018-09-13.csv". Only the current price column of each is used.
+        """
+        if not os.path.isdir(directory):
+            return
+        for file_name in sorted(os.listdir(directory)):
+            stem, extension = os.path.splitext(file_name)
+            if extension != ".csv":
+                continue
+            try:
+                snapshot_date = datetime.strptime(stem, "%Y-%m-%d").date()
+            except ValueError:
+                logger.warning(f"Skipping {file_name}, it isn't named by date.")
+                continue
+            history = PriceHistory(self.resource_names)
+            history.load_csv(f"{directory}/{file_name}", snapshot_date)
+            self.add_snapshot(snapshot_date, history.get_prices(snapshot_date))
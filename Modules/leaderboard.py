@@ -0,0 +1,148 @@
+from __future__ import annotations
+import csv
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from Modules.constants import AUCTION_HOUSE_FEE
+import Modules.engine as engine
+
+logger = logging.getLogger(__name__)
+
+def parse_price(value: str) -> float:
+    """
+    Returns:
+        float: A price cell as a number, or None if it is blank or not a number.
+    """
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+def load_sell_prices(file_loc: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Read the "AH price" and "AH price +1" columns of an MW Items.csv file.
+
+    Returns:
+        Dict[str, Tuple[float, float]]: The normal and +1 sell price of every item with
+            at least one, missing prices are None.
+    """
+    output: Dict[str, Tuple[float, float]] = {}
+    with open(file_loc) as f:
+        csvreader = csv.reader(f)
+        header = next(csvreader)
+        for row in csvreader:
+            prices = (parse_price(row[3]), parse_price(row[4]))
+            if prices != (None, None):
+                output[row[2]] = prices
+    return output
+
+class LeaderboardEntry:
+    """The expected profit of crafting one item at one quality with its optimal setup."""
+
+    __slots__ = ("name", "high_quality", "cost", "revenue", "margin", "margin_per_attempt")
+
+    def __init__(self, name: str, high_quality: bool, cost: float, revenue: float, margin_per_attempt: float):
+        self.name = name
+        self.high_quality = high_quality
+        self.cost = cost
+        self.revenue = revenue
+        self.margin = revenue - cost
+        self.margin_per_attempt = margin_per_attempt
+
+class Leaderboard:
+    """
+    The profit of every sellable item at both qualities, crafted with optimal setups.
+
+    Costs come from one CostEngine evaluation. Crafting for normal quality sells
+    whatever comes out, normal or +1. Crafting for +1 sells the +1 and the normal
+    results made along the way. Revenue is after the auction house fee. Margin per
+    attempt spreads the profit of each craft over its expected attempts.
+
+    Changing resource prices only recalculates the items depending on them, and
+    changing sell prices only the items whose price changed.
+    """
+    def __init__(self, cost_engine: 'engine.CostEngine', sell_prices: Dict[str, Tuple[float, float]],
+                 prices: np.ndarray = None, fee: float = AUCTION_HOUSE_FEE):
+        self.engine = cost_engine
+        self.sell_prices = dict(sell_prices)
+        self.fee = fee
+        self.evaluation = cost_engine.evaluate(prices)
+        self.entries: Dict[Tuple[str, bool], LeaderboardEntry] = {}
+        self.score(list(self.sell_prices.keys()))
+
+    def score(self, names: List[str]):
+        """
+        Recalculate the entries of the named items.
+        """
+        for name in names:
+            for high_quality in engine.QUALITIES:
+                self.entries.pop((name, high_quality), None)
+            normal_price, high_quality_price = self.sell_prices.get(name, (None, None))
+            if name not in self.engine.craftable_index or (normal_price is None and high_quality_price is None):
+                continue
+            # Without a price for one quality, assume it sells for the same as the other
+            if normal_price is None:
+                normal_price = high_quality_price
+            if high_quality_price is None:
+                high_quality_price = normal_price
+            quantity = self.engine.quantity[self.engine.craftable_index[name]]
+            for high_quality in engine.QUALITIES:
+                cost = float(self.evaluation.get_cost(name, high_quality)[0])
+                attempts, normal_results, high_quality_results = self.evaluation.get_outcome(name, high_quality)
+                if high_quality:
+                    # Per +1, along with the normal results made on the way
+                    made = high_quality_results
+                    revenue = high_quality_price + normal_price * normal_results / high_quality_results
+                else:
+                    # Per item, whichever quality it comes out as
+                    made = normal_results + high_quality_results
+                    revenue = (normal_price * normal_results + high_quality_price * high_quality_results) / made
+                revenue *= 1 - self.fee
+                margin_per_attempt = (revenue - cost) * quantity * made / attempts
+                self.entries[(name, high_quality)] = LeaderboardEntry(
+                    name, high_quality, cost, revenue, margin_per_attempt
+                )
+
+    def set_prices(self, prices: Dict[str, float]):
+        """
+        Change the price of some resources by name, rescoring only the items using them.
+        """
+        new_prices = self.evaluation.prices.copy()
+        for name, price in prices.items():
+            new_prices[0, self.engine.resource_index[name]] = price
+        changed = [self.engine.resource_index[name] for name in prices]
+        self.evaluation = self.evaluation.update(new_prices)
+        cone = self.engine.get_cone(changed)
+        names = [engine.get_name(self.engine.craftables[index]) for index in cone]
+        self.score([name for name in names if name in self.sell_prices])
+
+    def set_sell_prices(self, sell_prices: Dict[str, Tuple[float, float]]):
+        """
+        Change the normal and +1 sell price of some items, rescoring only those items.
+        """
+        self.sell_prices.update(sell_prices)
+        self.score(list(sell_prices.keys()))
+
+    def rank(self, count: int = 20, by: str = "margin") -> List[LeaderboardEntry]:
+        """
+        Returns:
+            List[LeaderboardEntry]: The count most profitable crafts by margin or by
+                margin_per_attempt, best first.
+        """
+        return sorted(self.entries.values(), key=lambda entry: getattr(entry, by), reverse=True)[:count]
+
+    def pretty_print(self, count: int = 20, by: str = "margin"):
+        """
+        Print in the console the most profitable crafts.
+        """
+        print(f"\nMost profitable crafts by {by.replace('_', ' ')}")
+        print("-"*144)
+        for entry in self.rank(count, by):
+            artisan, _, supplement = self.evaluation.get_setup(entry.name, entry.high_quality)
+            print(
+                f"{'{:,}'.format(round(entry.margin))} AD margin ({'{:,}'.format(round(entry.margin_per_attempt))} per attempt, "
+                f"costs {'{:,}'.format(round(entry.cost))}, sells for {'{:,}'.format(round(entry.revenue))}): "
+                f"{entry.name}{' +1' if entry.high_quality else ''}: {engine.pretty_print_entry(artisan)} + {engine.pretty_print_entry(supplement)}"
+            )
@@ -0,0 +1,140 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import Future
+import logging
+from threading import Lock, local
+from typing import Any, Callable, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+class Cancelled(Exception):
+    """
+    Raised when a computation is abandoned part way. It is never cached, anyone else
+    waiting on the same key computes it themselves instead.
+    """
+    pass
+
+class SingleFlight:
+    """
+    A bounded memo where each key is only ever computed once at a time.
+
+    The first caller for a key computes it. Anyone else asking for the same key while
+    it is being computed waits on the same future instead of computing it again.
+    Finished results are kept in least recently used order up to max_size.
+
+    Keys should include the version (see invalidate), so results priced by an old
+    dataset are never handed out.
+    """
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.version = 0
+        self.lock = Lock()
+        self.results: OrderedDict[Hashable, Future] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Keys being computed by the current thread and the threads it started
+        self.chain = local()
+
+    def get_chain(self) -> Tuple[Hashable, ...]:
+        """
+        Returns:
+            Tuple: The keys the current thread is in the middle of computing, outermost first.
+        """
+        return getattr(self.chain, "keys", ())
+
+    def run_in_chain(self, chain: Tuple[Hashable, ...], function: Callable, *args) -> Any:
+        """
+        Run a function as part of the computation of the keys in chain. Use this for work
+        handed to other threads, so a key needing itself is still caught.
+        """
+        previous = self.get_chain()
+        self.chain.keys = chain
+        try:
+            return function(*args)
+        finally:
+            self.chain.keys = previous
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Fetch the result for a key, computing it if no one has yet.
+
+        A key that (directly or through its dependencies) needs itself raises
+        RecursionError rather than waiting on itself forever.
+
+        Returns:
+            Any: The result of compute for this key.
+        """
+        chain = self.get_chain()
+        if key in chain:
+            raise RecursionError(f"{key} depends on itself via {' -> '.join(str(entry) for entry in chain)}.")
+        with self.lock:
+            future = self.results.get(key)
+            if future is not None:
+                self.hits += 1
+                self.results.move_to_end(key)
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self.results[key] = future
+                version = self.version
+                owner = True
+        if not owner:
+            try:
+                return future.result()
+            except Cancelled:
+                # Whoever started it gave up, so start again
+                return self.get(key, compute)
+
+        try:
+            result = self.run_in_chain(chain + (key,), compute)
+        except BaseException as e:
+            # Let waiters see the failure, but don't cache it
+            with self.lock:
+                if self.results.get(key) is future:
+                    del self.results[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        with self.lock:
+            if self.results.get(key) is future:
+                if self.version != version:
+                    # Invalidated while computing, only the callers already waiting get it
+                    del self.results[key]
+                else:
+                    self.results.move_to_end(key)
+        self._evict()
+        return result
+
+    def _evict(self):
+        with self.lock:
+            finished = [key for key, future in self.results.items() if future.done()]
+            excess = len(finished) - self.max_size
+            # Oldest first, results still being computed are never evicted
+            for key in finished[:max(excess, 0)]:
+                del self.results[key]
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop the results of just the keys matching predicate. Results of those keys still
+        being computed finish for their current callers but are then discarded.
+
+        Returns:
+            int: How many results were dropped.
+        """
+        with self.lock:
+            keys = [key for key in self.results if predicate(key)]
+            for key in keys:
+                del self.results[key]
+        return len(keys)
+
+    def invalidate(self):
+        """
+        Start a new version, dropping every finished result. Results still being
+        computed finish for their current callers but are then discarded.
+        """
+        with self.lock:
+            self.version += 1
+            for key in [key for key, future in self.results.items() if future.done()]:
+                del self.results[key]
+        logger.debug(f"Memo invalidated, now at version {self.version}.")
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from Modules.constants import FOCUS_MULTIPLIER
+import Modules.objects.recipe as recipe
+
+DEFAULT_REQUIREMENT = 1400
+"""Proficiency and focus requirement of the highest tier recipes."""
+
+QUALITY_MODES: List[Optional[bool]] = [False, True, None]
+"""Normal quality, high quality and aggregate quality, in the order they are printed."""
+
+def calculate_multiplier(artisan: 'recipe.Artisan', tool: 'recipe.Tool',
+                         supplement: 'recipe.Supplement', can_dab_hand: bool = True,
+                         high_quality: Optional[bool] = False,
+                         proficiency_requirement: float = DEFAULT_REQUIREMENT,
+                         focus_requirement: float = DEFAULT_REQUIREMENT) -> float:
+    """
+    Calculate the material cost multiplier of a single artisan/tool/supplement combo.
+
+    A high_quality of None returns the aggregate of the normal and +1 multipliers.
+
+    Returns:
+        float: The expected quantity of materials consumed per successful craft.
+    """
+    success_chance = (artisan.proficiency + tool.proficiency + supplement.proficiency)/proficiency_requirement
+    high_quality_chance = max(1 - (FOCUS_MULTIPLIER * (focus_requirement - artisan.focus - tool.focus - supplement.focus)), 0.0001)
+    recycle_chance = artisan.recycle_chance + supplement.recycle_chance
+    dab_hand_chance = artisan.dab_hand_chance + supplement.dab_hand_chance
+    if not can_dab_hand:
+        dab_hand_chance = 0
+    normal_multiplier = (1 + (((1/success_chance - 1) * (1-recycle_chance))))/(1+dab_hand_chance)
+    high_quality_multiplier = normal_multiplier / high_quality_chance
+    # Take average of both multipliers, with a bias towards the normal quality one
+    # This is because it is generaly about 2-2.5x lower than the high quality multiplier
+    # (a sort of normalisation)
+    aggregate_multiplier = ((normal_multiplier * 3) + high_quality_multiplier) / 4
+    if high_quality is None:
+        return aggregate_multiplier
+    if high_quality:
+        return high_quality_multiplier
+    else:
+        return normal_multiplier
+
+class MultiplierTable:
+    """
+    The cost multiplier of every artisan/tool/supplement combo for one artisan type.
+
+    All six tables (can/can't dab hand x normal/+1/aggregate quality) are computed at
+    once for every requested proficiency/focus requirement. Each table is an array of
+    shape (requirements, artisans, tools, supplements).
+    """
+    def __init__(self, artisans: List['recipe.Artisan'], tools: List['recipe.Tool'],
+                 supplements: List['recipe.Supplement'],
+                 requirements: Iterable[Tuple[float, float]] = ((DEFAULT_REQUIREMENT, DEFAULT_REQUIREMENT),),
+                 artisan_stats: 'recipe.SetupStats' = None):
+        self.artisans = artisans
+        self.tools = tools
+        self.supplements = supplements
+        self.requirements: List[Tuple[float, float]] = list(requirements)
+        self.tables: Dict[Tuple[bool, Optional[bool]], np.ndarray] = {}
+
+        if artisan_stats is None:
+            artisan_stats = recipe.SetupStats(artisans)
+        tool_stats = recipe.SetupStats(tools)
+        supplement_stats = recipe.SetupStats(supplements)
+        # Lay each component's stats along its own axis so they broadcast together
+        artisan_shape = (1, -1, 1, 1)
+        tool_shape = (1, 1, -1, 1)
+        supplement_shape = (1, 1, 1, -1)
+        requirement_shape = (-1, 1, 1, 1)
+        proficiency_requirement = np.array([r[0] for r in self.requirements], dtype=float).reshape(requirement_shape)
+        focus_requirement = np.array([r[1] for r in self.requirements], dtype=float).reshape(requirement_shape)
+
+        proficiency = (
+            artisan_stats.proficiency.reshape(artisan_shape)
+            + tool_stats.proficiency.reshape(tool_shape)
+            + supplement_stats.proficiency.reshape(supplement_shape)
+        )
+        focus = (
+            artisan_stats.focus.reshape(artisan_shape)
+            + tool_stats.focus.reshape(tool_shape)
+            + supplement_stats.focus.reshape(supplement_shape)
+        )
+        # Tools don't contribute to recycle or dab hand in this model
+        recycle_chance = (
+            artisan_stats.recycle_chance.reshape(artisan_shape)
+            + supplement_stats.recycle_chance.reshape(supplement_shape)
+        )
+        dab_hand_chance = (
+            artisan_stats.dab_hand_chance.reshape(artisan_shape)
+            + supplement_stats.dab_hand_chance.reshape(supplement_shape)
+        )
+        success_chance = proficiency / proficiency_requirement
+        high_quality_chance = np.maximum(1 - (FOCUS_MULTIPLIER * (focus_requirement - focus)), 0.0001)
+
+        base_multiplier = 1 + ((1/success_chance - 1) * (1-recycle_chance))
+        for can_dab_hand in [True, False]:
+            if can_dab_hand:
+                normal_multiplier = base_multiplier / (1+dab_hand_chance)
+            else:
+                normal_multiplier = base_multiplier * np.ones_like(dab_hand_chance)
+            high_quality_multiplier = normal_multiplier / high_quality_chance
+            self.tables[(can_dab_hand, False)] = normal_multiplier
+            self.tables[(can_dab_hand, True)] = high_quality_multiplier
+            self.tables[(can_dab_hand, None)] = ((normal_multiplier * 3) + high_quality_multiplier) / 4
+
+    def get_table(self, can_dab_hand: bool = True, high_quality: Optional[bool] = False,
+                  requirement: int = 0) -> np.ndarray:
+        """
+        Fetch the multiplier table for one mode and requirement.
+
+        Returns:
+            np.ndarray: Multipliers of shape (artisans, tools, supplements).
+        """
+        return self.tables[(can_dab_hand, high_quality)][requirement]
+
+    def top(self, count: int = 10, can_dab_hand: bool = True, high_quality: Optional[bool] = False,
+            requirement: int = 0) -> List[Tuple['recipe.Artisan', 'recipe.Tool', 'recipe.Supplement', float]]:
+        """
+        Find the combos with the lowest multiplier.
+
+        Only the requested rows are sorted, the rest of the table is partitioned away.
+
+        Returns:
+            List[Tuple[Artisan, Tool, Supplement, float]]: The best combos, best first.
+        """
+        table = self.get_table(can_dab_hand, high_quality, requirement)
+        flat = table.ravel()
+        count = min(count, flat.size)
+        if count <= 0:
+            return []
+        if count < flat.size:
+            best = np.argpartition(flat, count - 1)[:count]
+        else:
+            best = np.arange(flat.size)
+        # Break ties by position so the order matches a stable sort of the full table
+        best = best[np.lexsort((best, flat[best]))]
+        output = []
+        for index in best:
+            artisan_index, tool_index, supplement_index = np.unravel_index(index, table.shape)
+            output.append([
+                self.artisans[artisan_index],
+                self.tools[tool_index],
+                self.supplements[supplement_index],
+                float(flat[index])
+            ])
+        return output
+
+def sweep(artisan_types: Iterable[str] = None,
+          requirements: Iterable[Tuple[float, float]] = ((DEFAULT_REQUIREMENT, DEFAULT_REQUIREMENT),),
+          tools: List['recipe.Tool'] = None,
+          supplements: List['recipe.Supplement'] = None) -> Dict[str, MultiplierTable]:
+    """
+    Compute the multiplier tables for many artisan types and requirements in one call.
+
+    Defaults to every loaded artisan type, tool and supplement.
+
+    Returns:
+        Dict[str, MultiplierTable]: The tables for each artisan type.
+    """
+    if artisan_types is None:
+        artisan_types = list(recipe.Artisan.OBJECTS.keys())
+    if tools is None:
+        tools = list(recipe.Tool.OBJECTS.values())
+    if supplements is None:
+        supplements = list(recipe.Supplement.OBJECTS.values())
+    requirements = list(requirements)
+    output: Dict[str, MultiplierTable] = {}
+    for artisan_type in artisan_types:
+        artisans = recipe.Artisan.OBJECTS.get(artisan_type)
+        if not artisans:
+            continue
+        output[artisan_type] = MultiplierTable(
+            artisans, tools, supplements, requirements, recipe.Artisan.STATS.get(artisan_type)
+        )
+    return output
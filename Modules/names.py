@@ -0,0 +1,118 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import defaultdict
+import heapq
+import logging
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+def normalise(name: str) -> str:
+    """
+    Returns:
+        str: The name in lower case with punctuation dropped and spaces collapsed, so
+            "Fey'd Leaf Branches" and "feyd leaf  branches" are the same.
+    """
+    return " ".join(re.sub(r"[^\w\s]", "", name.lower()).split())
+
+def get_trigrams(text: str) -> Set[str]:
+    """
+    Returns:
+        Set[str]: Every 3 character run of the normalised text, padded so the start
+            of each word counts for more.
+    """
+    padded = f"  {text} "
+    return {padded[index:index+3] for index in range(len(padded) - 2)}
+
+class NameIndex:
+    """
+    A trigram index over the names of everything in the catalogue, for looking names
+    up without typing them exactly.
+
+    Each trigram maps to the names containing it, so a search only looks at names sharing
+    at least one trigram with the query rather than at every name. Built by load_all_files.
+    """
+
+    INDEX: NameIndex = None
+    """The index of the loaded catalogue."""
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = list(dict.fromkeys(names))
+        self.normalised: List[str] = [normalise(name) for name in self.names]
+        self.trigram_counts: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for index, text in enumerate(self.normalised):
+            trigrams = get_trigrams(text)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.postings[trigram].append(index)
+        self.postings = dict(self.postings)
+        # First name with each normalised form, and the forms sorted for completion
+        self.exact: Dict[str, str] = {}
+        for name, text in zip(self.names, self.normalised):
+            self.exact.setdefault(text, name)
+        self.sorted: List[Tuple[str, str]] = sorted(zip(self.normalised, self.names))
+        logger.debug(f"Indexed {len(self.names)} names by {len(self.postings)} trigrams.")
+
+    def lookup(self, name: str) -> str:
+        """
+        Returns:
+            str: The name matching this one apart from case and punctuation, or None.
+        """
+        return self.exact.get(normalise(name))
+
+    def search(self, query: str, count: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the names most like the query, however badly it is typed.
+
+        Names are scored by the share of trigrams they have in common with the query
+        (the Dice coefficient), so 1 is an exact match.
+
+        Returns:
+            List[Tuple[str, float]]: Up to count names and their scores, best first.
+        """
+        trigrams = get_trigrams(normalise(query))
+        shared: Dict[int, int] = defaultdict(int)
+        for trigram in trigrams:
+            for index in self.postings.get(trigram, ()):
+                shared[index] += 1
+        scores = (
+            (2 * matches / (len(trigrams) + self.trigram_counts[index]), index)
+            for index, matches in shared.items()
+        )
+        return [(self.names[index], score) for score, index in heapq.nlargest(count, scores)]
+
+    def complete(self, prefix: str, count: int = 50) -> List[str]:
+        """
+        Returns:
+            List[str]: Up to count names starting with the prefix, ignoring case and
+                punctuation, in alphabetical order.
+        """
+        text = normalise(prefix)
+        # Keep a trailing space so "iron " doesn't also complete to "ironwood"
+        if prefix[-1:].isspace() and text != "":
+            text += " "
+        output = []
+        for normalised, name in self.sorted[bisect_left(self.sorted, (text, "")):]:
+            if not normalised.startswith(text) or len(output) >= count:
+                break
+            output.append(name)
+        return output
+
+def build_name_index() -> NameIndex:
+    """
+    Index the names of every loaded item, material, resource and supplement.
+
+    Returns:
+        NameIndex: The new index, also kept as NameIndex.INDEX.
+    """
+    from Modules.objects.recipe import Supplement
+    from Modules.objects.item import MWItem, MWResource
+    from Modules.objects.material import MWMaterial
+
+    NameIndex.INDEX = NameIndex(
+        list(MWItem.OBJECTS.keys()) + list(MWMaterial.OBJECTS.keys())
+        + list(MWResource.OBJECTS.keys()) + list(Supplement.OBJECTS.keys())
+    )
+    return NameIndex.INDEX
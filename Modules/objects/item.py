@@ -2,10 +2,13 @@ from __future__ import annotations
 from abc import ABCMeta, abstractclassmethod, abstractmethod
 import csv
 import logging
-from threading import Lock, Thread
+from threading import Thread
 from typing import List, Dict, Tuple
 
 from Modules.constants import ARTISAN_TYPES, FOCUS_MULTIPLIER, PROFESSIONS, Recipe
+import Modules.engine as engine
+from Modules.memo import Cancelled, SingleFlight
+import Modules.query as query
 import Modules.objects.recipe as recipe
 from Modules.util import aggregate_tuple_lists, find_mw_object
 
@@ -19,6 +22,8 @@ class MWObject(metaclass=ABCMeta):
     
     OBJECTS: Dict[str, "MWObject"] = {}
     
+    __slots__ = ("name", "price")
+    
     def __init__(self):
         self.name: str = None
         self.price: float = None
@@ -56,6 +61,12 @@ class MWItem(MWObject):
     
     OBJECTS: Dict[str, "MWItem"] = {}
     
+    RANKINGS = SingleFlight(max_size=1024)
+    """Setup rankings of items and materials, keyed by (name, high quality, dataset version)."""
+    
+    __slots__ = ("quantity", "can_dab_hand", "proficiency", "focus", "unlock", "profession",
+                 "recipe", "commission")
+    
     def __init__(self, data: List[List[str]]):
         super().__init__()
         # Name is on the first column
@@ -79,11 +90,6 @@ class MWItem(MWObject):
             self.commission: float = float(data[0][16])
         except:
             self.commission: float = 0
-        
-        self.optimal_recipes: List[Tuple[recipe.MWRecipe, float]] = None
-        self.hq_optimal_recipes: List[Tuple[recipe.MWRecipe, float]] = None
-        
-        self.lock = Lock()
     
     @classmethod
     def load_csv(cls, file_loc):
@@ -119,92 +125,112 @@ class MWItem(MWObject):
         Returns:
             List[Tuple[MWRecipe, float]]: A list of the top recipes and their overall cost.
         """
-        RECIPE_QUANTITY = 10
-        """Quantity of recipes to output. Default: Top 10."""
-        if high_quality and self.hq_optimal_recipes is not None:
-            return self.hq_optimal_recipes[:RECIPE_QUANTITY]
-        if not high_quality and self.optimal_recipes is not None:
-            return self.optimal_recipes[:RECIPE_QUANTITY]
-        else:
-            self.get_optimal_recipe(high_quality)
-            if high_quality:
-                return self.hq_optimal_recipes[:RECIPE_QUANTITY]
-            else:
-                return self.optimal_recipes[:RECIPE_QUANTITY]
+        RECIPE_QUANTITY = recipe.RecipeRanking.KEEP
+        """Quantity of recipes to output. Default: Top 10, all of which are kept in full."""
+        return self.get_ranking(high_quality)[:RECIPE_QUANTITY]
+    
+    def get_pareto_recipes(self, high_quality: bool) -> List[Tuple[recipe.MWRecipe, float]]:
+        """
+        Find the setups that trade cost against +1 results and attempts.
+        
+        Returns:
+            List[Tuple[MWRecipe, float]]: The non-dominated recipes and their cost, cheapest first.
+        """
+        return self.get_ranking(high_quality).pareto_frontier()
     
     def get_optimal_recipe(self, high_quality: bool) -> recipe.MWRecipe:
         """
         Determine the optimal setup for crafting this item.
         
+        Returns:
+            MWRecipe: A recipe representing the setup used and material cost to craft this.
+        """
+        return self.get_ranking(high_quality)[0][0]
+    
+    def get_ranking(self, high_quality: bool) -> recipe.RecipeRanking:
+        """
+        Fetch the ranking of every setup for crafting this item, calculating it if needed.
+        
+        Rankings are memoised in MWItem.RANKINGS. Concurrent requests for the same ranking
+        share one calculation instead of each waiting on a lock and then recalculating.
+        
+        Returns:
+            RecipeRanking: Every setup ranked by cost, cheapest first.
+        """
+        # Work left over from a cancelled query shouldn't start new rankings
+        query.check()
+        key = (self.name, high_quality, MWItem.RANKINGS.version)
+        return MWItem.RANKINGS.get(key, lambda: self.rank_setups(high_quality))
+    
+    def rank_setups(self, high_quality: bool) -> recipe.RecipeRanking:
+        """
         Attempt to craft this item with every known combination of artisan, tool and
         supplement. Then rank the results by lowest cost.
         In the process it will also calculate the optimal recipe for all required
         materials, and use the best one in calculating this recipe.
         
         Returns:
-            MWRecipe: A recipe representing the setup used and material cost to craft this.
+            RecipeRanking: Every setup ranked by cost, cheapest first.
         """
-        with self.lock:
-            # First check if we already calculated the optimal recipes for this item
-            # To prevent massive runtimes we cache the best recipes once calculated.
-            if high_quality and self.hq_optimal_recipes is not None:
-                return self.hq_optimal_recipes[0][0]
-            if not high_quality and self.optimal_recipes is not None:
-                return self.optimal_recipes[0][0]
-            else:
-                print(f"Calculating optimal recipe for {self.name}.")
-                # Determine the best artisan, tool and supplement to use
-                artisans = recipe.Artisan.OBJECTS.get(ARTISAN_TYPES.get(self.profession))
-                tools = list(recipe.Tool.OBJECTS.values())
-                supplements = list(recipe.Supplement.OBJECTS.values())
-                
-                ranking_list: List[Tuple[recipe.MWRecipe, float]] = []
-                # Generate a thread for each combination of artisan tool and supplement
-                threads: List[Thread] = []
-                # Define function for threads to execute
-                def add_craft_to_list(artisan, tool, supplement, quantity, hq):
-                    """Craft self with the given setup and append to the output list."""
-                    new_recipe = self.craft(artisan, tool, supplement, quantity, hq)
-                    ranking_list.append([new_recipe, new_recipe.get_cost()])
-                for artisan in artisans:
-                    for tool in tools:
-                        for supplement in supplements:
-                            if supplement.name == self.name:
-                                # Don't allow use of this item as a supplement to avoid infinite recursion
-                                continue
-                            thread = Thread(target=lambda: add_craft_to_list(artisan, tool, supplement, 1, high_quality))
-                            thread.start()
-                            threads.append(thread)
-                
-                # Wait for all the threads
-                for thread in threads:
-                    thread.join()
-                
-                ranking_list.sort(key=lambda recipe: recipe[1])
-                if high_quality:
-                    self.hq_optimal_recipes = ranking_list
-                    return ranking_list[0][0]
-                else:
-                    self.optimal_recipes = ranking_list
-                    return ranking_list[0][0]
-                        
+        query.check()
+        logger.debug(f"Calculating optimal recipe for {self.name}.")
+        # Determine the best artisan, tool and supplement to use
+        artisans = recipe.Artisan.OBJECTS.get(ARTISAN_TYPES.get(self.profession))
+        tools = list(recipe.Tool.OBJECTS.values())
+        supplements = list(recipe.Supplement.OBJECTS.values())
+        
+        ranking_list: List[Tuple[recipe.MWRecipe, float]] = []
+        # Generate a thread for each combination of artisan tool and supplement
+        threads: List[Thread] = []
+        # Threads work on behalf of this ranking, so a material needing itself is caught,
+        # and on behalf of the query that asked for it, so they can be cancelled
+        chain = MWItem.RANKINGS.get_chain()
+        active_query = query.current()
+        # Define function for threads to execute
+        def add_craft_to_list(artisan, tool, supplement, quantity, hq):
+            """Craft self with the given setup and append to the output list."""
+            try:
+                query.check()
+                new_recipe = self.craft(artisan, tool, supplement, quantity, hq)
+            except Cancelled:
+                return
+            ranking_list.append([new_recipe, new_recipe.get_cost()])
+            query.count(candidates=1)
+        for artisan in artisans:
+            for tool in tools:
+                for supplement in supplements:
+                    if supplement.name == self.name:
+                        # Don't allow use of this item as a supplement to avoid infinite recursion
+                        continue
+                    thread = Thread(
+                        target=MWItem.RANKINGS.run_in_chain,
+                        args=(chain, query.run_as, active_query, add_craft_to_list,
+                              artisan, tool, supplement, 1, high_quality)
+                    )
+                    thread.start()
+                    threads.append(thread)
+        
+        # Wait for all the threads
+        for thread in threads:
+            thread.join()
+        # A cancelled ranking is missing setups, so it mustn't be memoised
+        query.check()
+        query.count(rankings=1)
+        
+        ranking_list.sort(key=lambda recipe: recipe[1])
+        # Only the top recipes are kept in full, the rest are stored as records
+        return recipe.RecipeRanking(
+            self, high_quality, artisans, tools, supplements, ranking_list
+        )
     
-    def craft(self, artisan: recipe.Artisan = None, tool: recipe.Tool = None,
-              supplement: recipe.Supplement = None,
-              quantity: float = 1, high_quality: bool = False) -> recipe.MWRecipe:
+    def get_chances(self, artisan: recipe.Artisan, tool: recipe.Tool,
+                    supplement: recipe.Supplement) -> Tuple[float, float, float, float]:
         """
-        Craft a given quantity of this item using the given artisan, tool and supplement.
-        
-        If no setup is provided, it will instead return the optimal recipe for this item.
+        Calculate the chances involved in crafting this item with the given setup.
         
         Returns:
-            MWRecipe: A recipe representing the setup and cost to craft this item.
+            Tuple[float, float, float, float]: The success, +1, recycle and dab hand chances.
         """
-        if artisan is None and tool is None and supplement is None:
-            optimal_recipe = self.get_optimal_recipe(high_quality)
-            return optimal_recipe.multiply(quantity)
-        output = super().craft(artisan, tool, supplement, quantity, high_quality)
-        
         success_chance = (artisan.proficiency + tool.proficiency + supplement.proficiency)/self.proficiency
         focus_differential = self.focus - artisan.focus - tool.focus - supplement.focus
         high_quality_chance = max(
@@ -213,7 +239,21 @@ class MWItem(MWObject):
         )
         recycle_chance = 1 - ((1-artisan.recycle_chance) * (1-supplement.recycle_chance) * (1-tool.recycle_chance))
         dab_hand_chance = 1 - ((1-artisan.dab_hand_chance) * (1-supplement.dab_hand_chance) * (1-tool.recycle_chance))
+        return success_chance, high_quality_chance, recycle_chance, dab_hand_chance
     
+    def calculate_outcome(self, artisan: recipe.Artisan, tool: recipe.Tool, supplement: recipe.Supplement,
+                          high_quality: bool) -> Tuple[float, float, float, float, float]:
+        """
+        Calculate the expected outcome of one craft of this item with the given setup, from scratch.
+        
+        Returns:
+            Tuple[float, float, float, float, float]: The multiplier applied to the recipe's
+                ingredients, the expected number of attempts (supplements consumed), failures,
+                normal results and +1 results.
+        """
+        success_chance, high_quality_chance, recycle_chance, dab_hand_chance = self.get_chances(
+            artisan, tool, supplement
+        )
         # Calculate expected number of attempts to get a success of any quality
         expected_attempts = 1 / success_chance
         
@@ -230,6 +270,68 @@ class MWItem(MWObject):
             # because you can only recycle actual failures, not normal results
             quantity_multiplier = quantity_multiplier / high_quality_chance
             expected_attempts = expected_attempts / high_quality_chance
+
+        failures = expected_attempts * (1-success_chance)
+        normal_results = expected_attempts * (success_chance * (1-high_quality_chance))
+        high_quality_results = expected_attempts * (success_chance * high_quality_chance)
+        if self.can_dab_hand:
+            normal_results *= (1+dab_hand_chance)
+            high_quality_results *= (1+dab_hand_chance)
+        return quantity_multiplier, expected_attempts, failures, normal_results, high_quality_results
+    
+    def get_outcome(self, artisan: recipe.Artisan, tool: recipe.Tool, supplement: recipe.Supplement,
+                    high_quality: bool) -> Tuple[float, float, float, float, float]:
+        """
+        The expected outcome of one craft of this item with the given setup. Read from the
+        table shared by every recipe with the same requirements, so it is only calculated
+        once per requirement class until the artisans, tools or supplements change.
+        
+        Returns:
+            Tuple[float, float, float, float, float]: The same as calculate_outcome.
+        """
+        artisan_type = ARTISAN_TYPES.get(self.profession)
+        index = engine.SetupTable.get_setup_index(artisan_type, artisan, tool, supplement)
+        if index is None:
+            # Not one of the loaded setups, so not in any table
+            return self.calculate_outcome(artisan, tool, supplement, high_quality)
+        table = engine.SetupTable.get(artisan_type, self.proficiency, self.focus, self.can_dab_hand)
+        quality = int(high_quality)
+        return (
+            float(table.multiplier[quality, index]), float(table.attempts[quality, index]),
+            float(table.failures[quality, index]), float(table.normal_results[quality, index]),
+            float(table.high_quality_results[quality, index])
+        )
+    
+    def get_multipliers(self, artisan: recipe.Artisan, tool: recipe.Tool,
+                        supplement: recipe.Supplement, high_quality: bool) -> Tuple[float, float]:
+        """
+        The expected consumption of one craft of this item with the given setup.
+        
+        Returns:
+            Tuple[float, float]: The multiplier applied to the recipe's ingredients and the
+                expected number of attempts (supplements consumed).
+        """
+        return self.get_outcome(artisan, tool, supplement, high_quality)[:2]
+    
+    def craft(self, artisan: recipe.Artisan = None, tool: recipe.Tool = None,
+              supplement: recipe.Supplement = None,
+              quantity: float = 1, high_quality: bool = False) -> recipe.MWRecipe:
+        """
+        Craft a given quantity of this item using the given artisan, tool and supplement.
+        
+        If no setup is provided, it will instead return the optimal recipe for this item.
+        
+        Returns:
+            MWRecipe: A recipe representing the setup and cost to craft this item.
+        """
+        if artisan is None and tool is None and supplement is None:
+            optimal_recipe = self.get_optimal_recipe(high_quality)
+            return optimal_recipe.multiply(quantity)
+        output = super().craft(artisan, tool, supplement, quantity, high_quality)
+        
+        quantity_multiplier, expected_attempts, failures, normal_results, high_quality_results = self.get_outcome(
+            artisan, tool, supplement, high_quality
+        )
         # Adjust multiplier based on quantity to craft and quantity output by the recipe
         quantity_multiplier = quantity_multiplier * quantity / self.quantity
 
@@ -264,12 +366,9 @@ class MWItem(MWObject):
         
         # Add meta-data to recipe
         output.attempts = expected_attempts
-        output.failures = expected_attempts * (1-success_chance)
-        output.normal_results = expected_attempts * (success_chance * (1-high_quality_chance))
-        output.high_quality_results = expected_attempts * (success_chance * high_quality_chance)
-        if output.result.can_dab_hand:
-            output.normal_results *= (1+dab_hand_chance)
-            output.high_quality_results *= (1+dab_hand_chance)
+        output.failures = failures
+        output.normal_results = normal_results
+        output.high_quality_results = high_quality_results
         
         return output
     
@@ -324,6 +423,8 @@ class MWResource(MWObject):
     
     OBJECTS: Dict[str, "MWResource"] = {}
     
+    __slots__ = ()
+    
     def __init__(self, data: List[str] = None, name = None):
         super().__init__()
         self.price = 0
@@ -8,6 +8,8 @@ class MWMaterial(MWItem):
     
     OBJECTS: Dict[str, "MWMaterial"] = {}
     
+    __slots__ = ()
+    
     @classmethod
     def load_csv(cls, file_loc):
         cls.OBJECTS = {}
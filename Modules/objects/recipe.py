@@ -1,9 +1,13 @@
 from __future__ import annotations
 from abc import abstractstaticmethod
+from bisect import bisect_left, bisect_right
 from copy import deepcopy, copy
 import csv
 from random import random, seed
-from typing import List, Dict, Tuple
+from typing import List, Dict, Sequence, Tuple
+
+import numpy as np
+
 from Modules.constants import Recipe
 import Modules.objects.item as item
 
@@ -15,6 +19,8 @@ class Tool():
     
     OBJECTS: Dict[str, "Tool"] = {}
     
+    __slots__ = ("profession", "name", "proficiency", "focus", "dab_hand_chance", "recycle_chance")
+    
     def __init__(self, data: List[str]):
         self.profession = data[0]
         self.name = data[1]
@@ -53,6 +59,9 @@ class Supplement():
     
     OBJECTS: Dict[str, "Supplement"] = {}
     
+    __slots__ = ("high_quality", "name", "proficiency", "focus", "dab_hand_chance",
+                 "recycle_chance", "object", "supplement_recipe")
+    
     def __init__(self, data: List[str]):
         if data[0][-3:] == " +1":
             self.high_quality = True
@@ -92,6 +101,18 @@ class Supplement():
             supplement_ability_str = ""
         return f"{self.name} ({int(self.proficiency)}/{int(self.focus)}{supplement_ability_str})"
 
+    @staticmethod
+    def get_crafting_setup() -> Tuple[Artisan, Tool, Supplement]:
+        """
+        Returns:
+            Tuple[Artisan, Tool, Supplement]: The fixed setup supplements are crafted with.
+        """
+        return (
+            next(x for x in Artisan.OBJECTS.get("Alchemist") if x.name == "Beatrice"),
+            Tool.OBJECTS.get("Forgehammer of Gond"),
+            Supplement.OBJECTS.get("Wintergreen Tea +1")
+        )
+
     def craft(self, quantity: float = 1) -> MWRecipe:
         """
         Calculate the resource costs for crafting this supplement.
@@ -105,10 +126,9 @@ class Supplement():
             MWRecipe: A recipe representing the costs to craft this supplement.
         """
         if self.supplement_recipe is None:
+            artisan, tool, supplement = Supplement.get_crafting_setup()
             self.supplement_recipe = self.object.craft(
-                    next(x for x in Artisan.OBJECTS.get("Alchemist") if x.name == "Beatrice"),
-                    Tool.OBJECTS.get("Forgehammer of Gond"),
-                    Supplement.OBJECTS.get("Wintergreen Tea +1"),
+                    artisan, tool, supplement,
                     1, self.high_quality
             )
         rand = random()
@@ -150,6 +170,12 @@ class Artisan():
         "Tailor": []
     }
     
+    STATS: Dict[str, "SetupStats"] = {}
+    """The stats of each artisan type's artisans, in the same order as OBJECTS."""
+    
+    __slots__ = ("profession", "name", "rarity", "dab_hand_chance", "recycle_chance",
+                 "proficiency", "focus")
+    
     def __init__(self, data: List[str]):
         self.profession = data[0]
         self.name = data[1]
@@ -174,6 +200,9 @@ class Artisan():
                     cls.OBJECTS[new_artisan.profession].append(new_artisan)
                 else:
                     cls.OBJECTS[new_artisan.profession] = [new_artisan]
+        cls.STATS = {
+            artisan_type: SetupStats(artisans) for artisan_type, artisans in cls.OBJECTS.items()
+        }
     
     def pretty_print(self) -> str:
         """
@@ -190,6 +219,155 @@ class Artisan():
             artisan_ability_str = ""
         return f"{self.name} [{self.rarity}] ({int(self.proficiency)}/{int(self.focus)}{artisan_ability_str})"
 
+def pareto_indices(costs: Sequence[float], high_quality_results: Sequence[float],
+                   attempts: Sequence[float]) -> List[int]:
+    """
+    Find the setups that aren't beaten on cost, +1 results and attempts all at once.
+    
+    The setups must already be sorted by cost. Keeps a staircase of the best (+1 results,
+    attempts) seen so far, so each setup is tested for dominance with a binary search.
+    
+    Returns:
+        List[int]: The positions of the non-dominated setups, cheapest first.
+    """
+    output: List[int] = []
+    removed = set()
+    # Staircase of the frontier so far, sorted by +1 results descending.
+    # Attempts are then also descending, otherwise a point would be dominated.
+    # +1 results are stored negated so the lists are ascending for bisect.
+    staircase_hq: List[float] = []
+    staircase_attempts: List[float] = []
+    staircase_entries: List[int] = []
+    for index in range(len(costs)):
+        # Round off floating point noise so setups with equal stats compare as equal
+        hq = round(float(high_quality_results[index]), 9)
+        index_attempts = round(float(attempts[index]), 9)
+        # Every earlier entry is at least as cheap. Among those with at least as many
+        # +1 results, the one with the fewest attempts is the last of that prefix.
+        prefix_end = bisect_right(staircase_hq, -hq)
+        if prefix_end > 0 and staircase_attempts[prefix_end - 1] <= index_attempts:
+            continue
+        # Remove entries this one dominates. They have no more +1 results and at least as
+        # many attempts, so they sit in a contiguous run from the insertion point.
+        # Only equally cheap entries are removed from the output, the rest still cost less.
+        start = bisect_left(staircase_hq, -hq)
+        end = start
+        while end < len(staircase_attempts) and staircase_attempts[end] >= index_attempts:
+            dominated = staircase_entries[end]
+            if costs[dominated] >= costs[index]:
+                removed.add(dominated)
+            end += 1
+        staircase_hq[start:end] = [-hq]
+        staircase_attempts[start:end] = [index_attempts]
+        staircase_entries[start:end] = [index]
+        output.append(index)
+    return [index for index in output if index not in removed]
+
+class SetupStats:
+    """
+    The stats of a list of artisans, tools or supplements in contiguous arrays.
+    
+    Entry i of each array belongs to entry i of the list it was built from.
+    """
+    
+    __slots__ = ("proficiency", "focus", "dab_hand_chance", "recycle_chance")
+    
+    def __init__(self, objects: List):
+        self.proficiency = np.array([obj.proficiency for obj in objects], dtype=float)
+        self.focus = np.array([obj.focus for obj in objects], dtype=float)
+        self.dab_hand_chance = np.array([obj.dab_hand_chance for obj in objects], dtype=float)
+        self.recycle_chance = np.array([obj.recycle_chance for obj in objects], dtype=float)
+
+RANKING_DTYPE = np.dtype([
+    ("artisan", np.int16),
+    ("tool", np.int16),
+    ("supplement", np.int16),
+    ("cost", np.float64),
+    ("attempts", np.float64),
+    ("failures", np.float64),
+    ("normal_results", np.float64),
+    ("high_quality_results", np.float64)
+])
+"""Fixed layout of one ranked setup: indices into the setup lists and the recipe stats."""
+
+class RecipeRanking:
+    """
+    Every setup for crafting an item, ranked by cost, stored as fixed-layout records.
+    
+    Only the best few recipes are kept as full MWRecipe objects with their material lists.
+    Indexing and slicing behave like the list of [MWRecipe, cost] it replaces, other
+    recipes are crafted again when they are looked up.
+    """
+    
+    KEEP = 10
+    """Quantity of full recipes kept. Default: Top 10."""
+    
+    __slots__ = ("item", "high_quality", "artisans", "tools", "supplements", "records", "recipes")
+    
+    def __init__(self, item: 'item.MWItem', high_quality: bool, artisans: List[Artisan],
+                 tools: List[Tool], supplements: List[Supplement],
+                 ranking_list: List[Tuple['MWRecipe', float]]):
+        self.item = item
+        self.high_quality = high_quality
+        self.artisans = artisans
+        self.tools = tools
+        self.supplements = supplements
+        artisan_index = {id(artisan): index for index, artisan in enumerate(artisans)}
+        tool_index = {id(tool): index for index, tool in enumerate(tools)}
+        supplement_index = {id(supplement): index for index, supplement in enumerate(supplements)}
+        self.records = np.array([
+            (
+                artisan_index[id(recipe_rank[0].artisan)],
+                tool_index[id(recipe_rank[0].tool)],
+                supplement_index[id(recipe_rank[0].supplement)],
+                recipe_rank[1],
+                recipe_rank[0].attempts,
+                recipe_rank[0].failures,
+                recipe_rank[0].normal_results,
+                recipe_rank[0].high_quality_results
+            ) for recipe_rank in ranking_list
+        ], dtype=RANKING_DTYPE)
+        self.recipes: List[Tuple['MWRecipe', float]] = ranking_list[:self.KEEP]
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < len(self.recipes):
+            return self.recipes[index]
+        record = self.records[index]
+        output = self.item.craft(
+            self.artisans[record["artisan"]],
+            self.tools[record["tool"]],
+            self.supplements[record["supplement"]],
+            1, self.high_quality
+        )
+        return [output, float(record["cost"])]
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def pareto_frontier(self) -> List[Tuple['MWRecipe', float]]:
+        """
+        Find the setups that aren't beaten on every front by another setup.
+        
+        Only the recipes on the frontier are crafted, the search runs on the records.
+        
+        Returns:
+            List[Tuple[MWRecipe, float]]: The non-dominated recipes and costs, cheapest first.
+        """
+        indices = pareto_indices(
+            self.records["cost"],
+            self.records["high_quality_results"],
+            self.records["attempts"]
+        )
+        return [self[int(index)] for index in indices]
+
 class MWRecipe:
     """
     Represents a way of crafting a given item, and the associated costs.
@@ -199,6 +377,11 @@ class MWRecipe:
     consumed. Also provides stats about the crafting such as how many failures would be
     expected, how many normal or +1 results would be made as a by-product.
     """
+    
+    __slots__ = ("result", "quantity", "artisan", "tool", "supplement", "materials",
+                 "supplements", "supplement_materials", "high_quality", "failures",
+                 "normal_results", "high_quality_results", "attempts")
+    
     def __init__(self, result: item.MWItem = None, quantity = 1, artisan: Artisan = None,
                  tool: Tool = None, supplement: Supplement = None, high_quality: bool = False):
         self.result: item.MWItem = result
@@ -274,6 +457,35 @@ class MWRecipe:
         for recipe_rank in input:
             print(f"{'{:,}'.format(round(recipe_rank[1]))} AD ({round(recipe_rank[0].normal_results, 2)} Normal, {round(recipe_rank[0].high_quality_results, 2)} +1): {recipe_rank[0].artisan.pretty_print()} + {recipe_rank[0].supplement.pretty_print()}")
     
+    @staticmethod
+    def pareto_frontier(input: List[Tuple['MWRecipe', float]]) -> List[Tuple['MWRecipe', float]]:
+        """
+        Find the setups that aren't beaten on every front by another setup.
+        
+        Setups are compared on AD cost (lower is better), expected +1 results (higher is
+        better) and attempts (lower is better). The input must already be sorted by cost,
+        as the rankings from get_optimal_recipe are, so the frontier is found in one pass.
+        
+        Returns:
+            List[Tuple[MWRecipe, float]]: The non-dominated recipes and costs, cheapest first.
+        """
+        indices = pareto_indices(
+            [recipe_rank[1] for recipe_rank in input],
+            [recipe_rank[0].high_quality_results for recipe_rank in input],
+            [recipe_rank[0].attempts for recipe_rank in input]
+        )
+        return [input[index] for index in indices]
+    
+    @staticmethod
+    def pretty_print_frontier(input: List[Tuple['MWRecipe', float]]):
+        """
+        Print a concise summary of each recipe on a pareto frontier.
+        """
+        print("\nPareto frontier (AD cost vs +1 results vs attempts):")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        for recipe_rank in input:
+            print(f"{'{:,}'.format(round(recipe_rank[1]))} AD ({round(recipe_rank[0].attempts, 2)} Attempts, {round(recipe_rank[0].normal_results, 2)} Normal, {round(recipe_rank[0].high_quality_results, 2)} +1): {recipe_rank[0].artisan.pretty_print()} + {recipe_rank[0].supplement.pretty_print()}")
+    
     def quick_print(self):
         """
         Print in the console a summary of the artisan and supplement used.
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import logging
+from typing import Dict, List, Tuple
+
+from Modules.constants import Recipe
+import Modules.objects.item as item
+import Modules.objects.recipe as recipe
+from Modules.util import find_mw_object
+
+logger = logging.getLogger(__name__)
+
+class OrderPlan:
+    """
+    Everything needed to fill a bulk order, crafting with the optimal setups.
+
+    Contains the consolidated shopping list of resources, the supplements consumed and the
+    resources those supplements are made from, and the schedule of crafts in the order they
+    must happen (ingredients before the items that use them).
+    """
+    def __init__(self):
+        self.materials: Dict[str, float] = {}
+        self.supplements: Dict[str, float] = {}
+        self.supplement_materials: Dict[str, float] = {}
+        self.schedule: List[Tuple['recipe.MWRecipe', float]] = []
+
+    def get_cost(self) -> float:
+        """
+        Calculates the total cost of this plan.
+
+        Returns:
+            float: the total cost in AD to fill the order.
+        """
+        cost: float = 0.0
+        for name, quantity in self.materials.items():
+            cost += quantity * find_mw_object(name).price
+        for name, quantity in self.supplement_materials.items():
+            cost += quantity * find_mw_object(name).price
+        return cost
+
+    def pretty_print(self):
+        """
+        Print in the console the craft schedule and shopping list.
+        """
+        print("\nCrafting schedule:")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        for scheduled_recipe, quantity in self.schedule:
+            print(f"  {round(quantity, 2)}x {scheduled_recipe.result.name}{' +1' if scheduled_recipe.high_quality else ''}: {scheduled_recipe.artisan.pretty_print()} + {scheduled_recipe.supplement.pretty_print()}")
+        print("\nShopping list:")
+        cost: float = 0.0
+        for name, quantity in sorted(self.materials.items()):
+            print(f"  {round(quantity, 2)}x {name}")
+            cost += quantity * find_mw_object(name).price
+        print(f"Material AD cost: {'{:,}'.format(round(cost))}")
+        print("\nSupplements used:")
+        for name, quantity in sorted(self.supplements.items()):
+            print(f"  {round(quantity, 2)}x {name}")
+        print("Materials consumed by supplements:")
+        supplement_cost: float = 0.0
+        for name, quantity in sorted(self.supplement_materials.items()):
+            print(f"  {round(quantity, 2)}x {name}")
+            supplement_cost += quantity * find_mw_object(name).price
+        print(f"Supplement AD cost: {'{:,}'.format(round(supplement_cost))}")
+        print(f"\nTotal AD cost: {'{:,}'.format(round(cost + supplement_cost))}")
+
+def parse_order_line(line: str) -> Tuple[float, str]:
+    """
+    Read an order line such as "50x Hardened Feywood" or "Fey'd Leaf Branches +1".
+
+    Returns:
+        Tuple[float, str]: The quantity and name (including any +1) ordered.
+    """
+    quantity_str, _, name = line.strip().partition("x ")
+    try:
+        return [float(quantity_str), name.strip()]
+    except ValueError:
+        return [1.0, line.strip()]
+
+def plan_order(order: Recipe) -> OrderPlan:
+    """
+    Work out how to fill an order of many items at once.
+
+    The order is a list of quantities and names, names may end in " +1" to order the high
+    quality version. Sub-materials shared between ordered items are totalled up and
+    crafted once, each with its own optimal setup. Every item in the order's dependency
+    tree is visited a fixed number of times so the work grows linearly with the order.
+
+    Returns:
+        OrderPlan: The schedule of crafts and consolidated shopping list.
+    """
+    # Total up repeated lines. Keys are (name, high quality)
+    demand: Dict[Tuple[str, bool], float] = {}
+    for quantity, name in order:
+        high_quality = name[-3:] == " +1"
+        if high_quality:
+            name = name[:-3]
+        mw_object = find_mw_object(name)
+        if not isinstance(mw_object, item.MWItem):
+            # Resources can't be crafted, and only crafted items have a +1 version
+            high_quality = False
+        key = (mw_object.name, high_quality)
+        demand[key] = demand.get(key, 0) + quantity
+
+    # Order crafted items so each comes after everything that consumes it
+    visited = set()
+    post_order: List[str] = []
+    for name, _ in demand.keys():
+        if name in visited:
+            continue
+        visited.add(name)
+        mw_object = find_mw_object(name)
+        ingredients = mw_object.recipe if isinstance(mw_object, item.MWItem) else []
+        stack = [(name, iter(ingredients))]
+        while len(stack) > 0:
+            current_name, ingredients = stack[-1]
+            for ingredient in ingredients:
+                ingredient_object = find_mw_object(ingredient[1])
+                if ingredient_object.name not in visited and isinstance(ingredient_object, item.MWItem):
+                    visited.add(ingredient_object.name)
+                    stack.append((ingredient_object.name, iter(ingredient_object.recipe)))
+                    break
+            else:
+                stack.pop()
+                post_order.append(current_name)
+
+    output = OrderPlan()
+    schedule: List[Tuple['recipe.MWRecipe', float]] = []
+    for name in reversed(post_order):
+        mw_object = find_mw_object(name)
+        if not isinstance(mw_object, item.MWItem):
+            output.materials[name] = output.materials.get(name, 0) + demand.get((name, False), 0)
+            continue
+        for high_quality in [True, False]:
+            quantity = demand.get((name, high_quality), 0)
+            if quantity <= 0:
+                continue
+            optimal_recipe = mw_object.get_optimal_recipe(high_quality)
+            schedule.append((optimal_recipe, quantity))
+            quantity_multiplier, expected_attempts = mw_object.get_multipliers(
+                optimal_recipe.artisan, optimal_recipe.tool, optimal_recipe.supplement, high_quality
+            )
+            quantity_multiplier = quantity_multiplier * quantity / mw_object.quantity
+            supplement_name = optimal_recipe.supplement.name
+            output.supplements[supplement_name] = (
+                output.supplements.get(supplement_name, 0)
+                + expected_attempts * quantity / mw_object.quantity
+            )
+            for quantity_per_craft, ingredient_name in mw_object.recipe:
+                ingredient_name = find_mw_object(ingredient_name).name
+                if isinstance(find_mw_object(ingredient_name), item.MWItem):
+                    key = (ingredient_name, False)
+                    demand[key] = demand.get(key, 0) + quantity_per_craft * quantity_multiplier
+                else:
+                    output.materials[ingredient_name] = (
+                        output.materials.get(ingredient_name, 0)
+                        + quantity_per_craft * quantity_multiplier
+                    )
+
+    # Supplements are crafted with a fixed setup, so only their resources are listed
+    for supplement_name, quantity in output.supplements.items():
+        supplement_recipe = recipe.Supplement.OBJECTS.get(supplement_name).craft(quantity)
+        for material_quantity, material_name in supplement_recipe.materials:
+            output.supplement_materials[material_name] = (
+                output.supplement_materials.get(material_name, 0) + material_quantity
+            )
+
+    # Crafts were found consumers first, they have to happen ingredients first
+    output.schedule = list(reversed(schedule))
+    logger.debug(f"Planned {len(order)} order lines with {len(output.schedule)} crafts.")
+    return output
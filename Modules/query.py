@@ -0,0 +1,113 @@
+from __future__ import annotations
+import logging
+from threading import Event, Lock, Thread, local
+from typing import Any, Callable
+
+from Modules.memo import Cancelled
+
+logger = logging.getLogger(__name__)
+
+_current = local()
+
+class Query:
+    """
+    A calculation run in the background that can be cancelled and reports progress.
+
+    Calculations check in with check() and count() as they go, including on the threads
+    they start (see run_as). Cancelling makes the next check raise Cancelled, so
+    rankings already finished stay memoised while the unfinished ones are dropped.
+    """
+    def __init__(self, function: Callable, *args):
+        self.function = function
+        self.args = args
+        self.cancelled = Event()
+        self.finished = Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.lock = Lock()
+        self.candidates = 0
+        self.rankings = 0
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def start(self) -> Query:
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = run_as(self, self.function, *self.args)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self) -> str:
+        """
+        Returns:
+            str: How many setups have been tried and rankings finished so far.
+        """
+        return f"{'{:,}'.format(self.candidates)} setups tried, {self.rankings} materials resolved"
+
+    def wait(self, interval: float = 0.5, report: bool = True) -> Any:
+        """
+        Wait for the result, printing progress every interval seconds. Ctrl-C cancels
+        the query and raises Cancelled rather than stopping the program.
+
+        Returns:
+            Any: What the function returned.
+        """
+        reported = False
+        try:
+            while not self.finished.wait(interval):
+                if report:
+                    print(f"\r{self.progress()}", end="", flush=True)
+                    reported = True
+        except KeyboardInterrupt:
+            self.cancel()
+            if reported:
+                print()
+            raise Cancelled("Query cancelled")
+        if reported:
+            print(f"\r{self.progress()}")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def current() -> Query:
+    """
+    Returns:
+        Query: The query the current thread is working for, if any.
+    """
+    return getattr(_current, "query", None)
+
+def run_as(query: Query, function: Callable, *args) -> Any:
+    """
+    Run a function on behalf of a query, e.g. on a thread the query's work started.
+    """
+    previous = current()
+    _current.query = query
+    try:
+        return function(*args)
+    finally:
+        _current.query = previous
+
+def check():
+    """
+    Raise Cancelled if the current thread's query has been cancelled.
+    """
+    query = current()
+    if query is not None and query.cancelled.is_set():
+        raise Cancelled("Query cancelled")
+
+def count(candidates: int = 0, rankings: int = 0):
+    """
+    Add to the current thread's query progress.
+    """
+    query = current()
+    if query is not None:
+        with query.lock:
+            query.candidates += candidates
+            query.rankings += rankings
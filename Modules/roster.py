@@ -0,0 +1,404 @@
+from __future__ import annotations
+import logging
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+import Modules.engine as engine
+import Modules.objects.recipe as recipe
+
+logger = logging.getLogger(__name__)
+
+class Roster:
+    """
+    The artisans, tools and supplements an account owns, by name.
+
+    A category left as None means everything loaded in it is owned.
+    """
+    def __init__(self, artisans: Iterable[str] = None, tools: Iterable[str] = None,
+                 supplements: Iterable[str] = None, supplement_stock: Dict[str, float] = None):
+        """
+        supplement_stock optionally limits how many of some supplements can be used.
+        """
+        self.artisans: Set[str] = None if artisans is None else set(artisans)
+        self.tools: Set[str] = None if tools is None else set(tools)
+        self.supplements: Set[str] = None if supplements is None else set(supplements)
+        self.supplement_stock: Dict[str, float] = dict(supplement_stock) if supplement_stock else {}
+
+    def copy(self) -> Roster:
+        return Roster(self.artisans, self.tools, self.supplements, self.supplement_stock)
+
+    def get_key(self) -> Tuple:
+        """
+        Returns:
+            Tuple: A hashable key of the owned entries, ignoring stock limits.
+        """
+        return tuple(
+            None if names is None else frozenset(names)
+            for names in [self.artisans, self.tools, self.supplements]
+        )
+
+    @staticmethod
+    def _owns(names: Set[str], name: str) -> bool:
+        return names is None or name in names
+
+    def owns(self, name: str) -> bool:
+        """
+        Returns:
+            bool: Whether the named artisan, tool or supplement is in this roster.
+        """
+        if name in recipe.Supplement.OBJECTS:
+            return self._owns(self.supplements, name)
+        if name in recipe.Tool.OBJECTS:
+            return self._owns(self.tools, name)
+        return self._owns(self.artisans, name)
+
+    def add(self, name: str):
+        """
+        Add an artisan, tool or supplement by name.
+        """
+        if name in recipe.Supplement.OBJECTS:
+            if self.supplements is not None:
+                self.supplements.add(name)
+        elif name in recipe.Tool.OBJECTS:
+            if self.tools is not None:
+                self.tools.add(name)
+        elif self.artisans is not None:
+            self.artisans.add(name)
+
+    def remove(self, name: str):
+        """
+        Remove an artisan, tool or supplement by name.
+        """
+        if name in recipe.Supplement.OBJECTS:
+            if self.supplements is None:
+                self.supplements = set(recipe.Supplement.OBJECTS.keys())
+            self.supplements.discard(name)
+        elif name in recipe.Tool.OBJECTS:
+            if self.tools is None:
+                self.tools = set(recipe.Tool.OBJECTS.keys())
+            self.tools.discard(name)
+        else:
+            if self.artisans is None:
+                self.artisans = {
+                    artisan.name for artisans in recipe.Artisan.OBJECTS.values() for artisan in artisans
+                }
+            self.artisans.discard(name)
+
+    def get_masks(self, cost_engine: 'engine.CostEngine',
+                  artisan_types: Iterable[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Mark the setups of each artisan type that only use owned artisans, tools and
+        supplements.
+
+        Returns:
+            Dict[str, np.ndarray]: A boolean array over setups for each artisan type.
+        """
+        if artisan_types is None:
+            artisan_types = cost_engine.setups.keys()
+        tool_owned = np.array([self._owns(self.tools, tool.name) for tool in cost_engine.tools], dtype=bool)
+        supplement_owned = np.array(
+            [self._owns(self.supplements, supplement.name) for supplement in cost_engine.supplements], dtype=bool
+        )
+        output: Dict[str, np.ndarray] = {}
+        for artisan_type in artisan_types:
+            artisans, tools, supplements = cost_engine.setups[artisan_type]
+            artisan_owned = np.array(
+                [self._owns(self.artisans, artisan.name) for artisan in cost_engine.artisans[artisan_type]], dtype=bool
+            )
+            output[artisan_type] = artisan_owned[artisans] & tool_owned[tools] & supplement_owned[supplements]
+        return output
+
+class RosterCosts:
+    """
+    The optimal cost and setup of every crafted item using only a roster's setups.
+
+    The cost of every setup of every item is kept, whether owned or not, so a change to
+    the roster only re-picks the best setup of the affected items. Setup costs are
+    only recalculated for items whose ingredients changed cost. Costs built from
+    another roster's share its setup costs wherever they are unchanged.
+    """
+    def __init__(self, cost_engine: 'engine.CostEngine', roster: Roster,
+                 prices: np.ndarray = None, base: RosterCosts = None):
+        """
+        Costs built from a base use its prices, so prices can't be given as well.
+        """
+        if prices is not None and base is not None:
+            raise ValueError("Costs built from a base use the base's prices, don't give prices as well.")
+        self.engine = cost_engine
+        self.roster = roster.copy()
+        if base is not None:
+            self.prices = base.prices
+            self.supplement_costs = base.supplement_costs
+            self.masks = base.masks
+            self.setup_costs: List[np.ndarray] = list(base.setup_costs)
+            self.unit_cost = base.unit_cost.copy()
+            self.best_setup = base.best_setup.copy()
+            masks = dict(base.masks)
+            for artisan_type, mask in self.roster.get_masks(cost_engine).items():
+                if not np.array_equal(mask, base.masks[artisan_type]):
+                    masks[artisan_type] = mask
+            self._walk(masks, commit=True)
+            self.masks = masks
+            return
+        if prices is None:
+            prices = cost_engine.get_prices()
+        self.prices = np.asarray(prices, dtype=float)
+        self.supplement_costs = cost_engine.get_supplement_costs(self.prices[None, :])[0]
+        count = len(cost_engine.craftables)
+        self.masks = self.roster.get_masks(cost_engine)
+        self.setup_costs = [None] * count
+        self.unit_cost = np.full((2, count), np.inf)
+        self.best_setup = np.zeros((2, count), dtype=np.int64)
+        self._walk(self.masks, commit=True, everything=True)
+
+    def _cost_setups(self, index: int, ingredient_costs: np.ndarray) -> np.ndarray:
+        # Same as CostEngine.evaluate for a single price vector, shape (2, setups)
+        cost_engine = self.engine
+        resources, resource_quantities = cost_engine.resource_ingredients[index]
+        _, craftable_quantities = cost_engine.craftable_ingredients[index]
+        base_cost = self.prices[resources] @ resource_quantities + ingredient_costs @ craftable_quantities
+        table = cost_engine.tables[index]
+        quantity = cost_engine.quantity[index]
+        supplement_costs = self.supplement_costs[cost_engine.setups[cost_engine.artisan_type[index]][2]]
+        output = base_cost * (table.multiplier / quantity) + (table.attempts / quantity) * supplement_costs
+        output[:, cost_engine.excluded[index]] = np.inf
+        return output
+
+    def _walk(self, masks: Dict[str, np.ndarray], commit: bool = False,
+              everything: bool = False) -> Dict[int, np.ndarray]:
+        """
+        Re-pick the best setups after the setup masks change.
+
+        Items are visited ingredients first. Only items of an artisan type whose mask
+        changed, or with an ingredient whose cost changed, are looked at.
+
+        Returns:
+            Dict[int, np.ndarray]: The new normal and +1 unit cost of each item that changed.
+        """
+        cost_engine = self.engine
+        changed: Dict[int, np.ndarray] = {}
+        for index in range(len(cost_engine.craftables)):
+            artisan_type = cost_engine.artisan_type[index]
+            craftables, _ = cost_engine.craftable_ingredients[index]
+            ingredients_changed = any(craftable in changed for craftable in craftables)
+            if not (everything or ingredients_changed or masks[artisan_type] is not self.masks[artisan_type]):
+                continue
+            if everything or ingredients_changed:
+                ingredient_costs = self.unit_cost[0][craftables]
+                for position, craftable in enumerate(craftables):
+                    if craftable in changed:
+                        ingredient_costs[position] = changed[craftable][0]
+                setup_costs = self._cost_setups(index, ingredient_costs)
+            else:
+                setup_costs = self.setup_costs[index]
+            allowed_costs = np.where(masks[artisan_type], setup_costs, np.inf)
+            best = np.argmin(allowed_costs, axis=1)
+            unit_cost = allowed_costs[[0, 1], best]
+            # Unchanged inputs give exactly the same costs, so no tolerance is needed
+            if everything or unit_cost[0] != self.unit_cost[0, index] or unit_cost[1] != self.unit_cost[1, index]:
+                changed[index] = unit_cost
+            if commit:
+                self.setup_costs[index] = setup_costs
+                self.best_setup[:, index] = best
+                self.unit_cost[:, index] = unit_cost
+        return changed
+
+    def _get_masks(self, roster: Roster, name: str) -> Dict[str, np.ndarray]:
+        # Only the artisan types the named entry can be used by get new masks
+        cost_engine = self.engine
+        if name in recipe.Supplement.OBJECTS or name in recipe.Tool.OBJECTS:
+            artisan_types = list(cost_engine.setups.keys())
+        else:
+            artisan_types = [
+                artisan_type for artisan_type, artisans in cost_engine.artisans.items()
+                if any(artisan.name == name for artisan in artisans)
+            ]
+        masks = dict(self.masks)
+        masks.update(roster.get_masks(cost_engine, artisan_types))
+        return masks
+
+    def add(self, name: str):
+        """
+        Add an artisan, tool or supplement to the roster, updating only the affected items.
+        """
+        self.roster.add(name)
+        masks = self._get_masks(self.roster, name)
+        self._walk(masks, commit=True)
+        self.masks = masks
+
+    def remove(self, name: str):
+        """
+        Remove an artisan, tool or supplement from the roster, updating only the affected items.
+        """
+        self.roster.remove(name)
+        masks = self._get_masks(self.roster, name)
+        self._walk(masks, commit=True)
+        self.masks = masks
+
+    def get_setup(self, name: str, high_quality: bool = False) -> Tuple[float, Tuple]:
+        """
+        Returns:
+            Tuple[float, Tuple[Artisan, Tool, Supplement]]: The optimal unit cost and setup
+                of the named item, or inf and None if the roster can't craft it.
+        """
+        index = self.engine.craftable_index[name]
+        quality = int(high_quality)
+        unit_cost = float(self.unit_cost[quality, index])
+        if unit_cost == np.inf:
+            # Every setup was filtered out, so best_setup is meaningless
+            return unit_cost, None
+        return unit_cost, self.engine.get_setup(index, self.best_setup[quality, index])
+
+    def get_supplement_use(self, name: str, high_quality: bool = False) -> Dict[str, float]:
+        """
+        Calculate the supplements used crafting one of an item, including its crafted
+        ingredients, with the optimal setups. Items the roster can't craft use nothing.
+
+        Returns:
+            Dict[str, float]: Expected number of each supplement used.
+        """
+        cost_engine = self.engine
+        use = np.zeros(len(cost_engine.supplements))
+        # Quantity needed of each crafted item, pushed from the item down to ingredients
+        demand: Dict[Tuple[int, int], float] = {
+            (cost_engine.craftable_index[name], int(high_quality)): 1.0
+        }
+        for index in reversed(range(cost_engine.craftable_index[name] + 1)):
+            for quality in [1, 0]:
+                quantity = demand.pop((index, quality), 0)
+                if quantity == 0 or self.unit_cost[quality, index] == np.inf:
+                    continue
+                setup = self.best_setup[quality, index]
+                table = cost_engine.tables[index]
+                supplement = cost_engine.setups[cost_engine.artisan_type[index]][2][setup]
+                use[supplement] += quantity * table.attempts[quality][setup] / cost_engine.quantity[index]
+                multiplier = quantity * table.multiplier[quality][setup] / cost_engine.quantity[index]
+                craftables, quantities = cost_engine.craftable_ingredients[index]
+                for craftable, ingredient_quantity in zip(craftables, quantities):
+                    demand[(craftable, 0)] = demand.get((craftable, 0), 0) + multiplier * ingredient_quantity
+        return {
+            cost_engine.supplements[supplement].name: float(use[supplement])
+            for supplement in np.flatnonzero(use)
+        }
+
+class MarginalAnalysis(RosterCosts):
+    """
+    Works out how much AD each artisan or supplement would save if it were added to a
+    roster, across a weighted set of items.
+    """
+    def __init__(self, cost_engine: 'engine.CostEngine', roster: Roster,
+                 weights: Dict[str, float], prices: np.ndarray = None, base: RosterCosts = None):
+        """
+        weights maps item names (ending in " +1" for high quality) to how many are crafted.
+        """
+        super().__init__(cost_engine, roster, prices, base)
+        self.weights: List[Tuple[int, int, float]] = []
+        for name, weight in weights.items():
+            high_quality = name[-3:] == " +1"
+            if high_quality:
+                name = name[:-3]
+            self.weights.append((cost_engine.craftable_index[name], int(high_quality), weight))
+
+    def get_saving(self, name: str) -> float:
+        """
+        Calculate the AD saved across the weighted items by adding one artisan, tool
+        or supplement to the roster. Negative if removing an owned entry.
+
+        Returns:
+            float: The weighted AD saved, inf if it makes a weighted item craftable.
+        """
+        roster = self.roster.copy()
+        if roster.owns(name):
+            roster.remove(name)
+        else:
+            roster.add(name)
+        changed = self._walk(self._get_masks(roster, name))
+        saving: float = 0.0
+        for index, quality, weight in self.weights:
+            if index in changed:
+                old_cost = self.unit_cost[quality, index]
+                new_cost = changed[index][quality]
+                if old_cost != new_cost:
+                    saving += weight * (old_cost - new_cost)
+        return saving
+
+    def rank(self, candidates: Iterable[str] = None) -> List[Tuple[str, float]]:
+        """
+        Rank artisans and supplements by the AD they would save. Defaults to every
+        loaded artisan and supplement not in the roster.
+
+        Returns:
+            List[Tuple[str, float]]: Names and weighted AD saved, best first.
+        """
+        if candidates is None:
+            candidates = []
+            for artisans in recipe.Artisan.OBJECTS.values():
+                candidates += [artisan.name for artisan in artisans if artisan.name not in candidates]
+            candidates += list(recipe.Supplement.OBJECTS.keys())
+            candidates = [name for name in candidates if not self.roster.owns(name)]
+        output = [(name, self.get_saving(name)) for name in candidates]
+        output.sort(key=lambda entry: -entry[1])
+        return output
+
+    def pretty_print(self, count: int = 10):
+        """
+        Print in the console the artisans and supplements worth acquiring next.
+        """
+        print("\nBest artisans and supplements to acquire next (weighted AD saved):")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        for name, saving in self.rank()[:count]:
+            if saving == np.inf:
+                print(f"{name}: makes new items craftable")
+            else:
+                print(f"{name}: {'{:,}'.format(round(saving))}")
+
+class RosterOptimiser:
+    """
+    Answers optimal setup queries for many rosters from one set of setup costs.
+
+    The setup costs with everything owned are calculated once. Each roster's costs are
+    found from them by filtering out the setups it doesn't own, and are kept for
+    later queries with the same roster.
+    """
+    def __init__(self, cost_engine: 'engine.CostEngine', prices: np.ndarray = None):
+        self.engine = cost_engine
+        self.base = RosterCosts(cost_engine, Roster(), prices)
+        self.costs: Dict[Tuple, RosterCosts] = {}
+
+    def get_costs(self, roster: Roster) -> RosterCosts:
+        """
+        Returns:
+            RosterCosts: The optimal costs of every item using only the roster's setups.
+        """
+        key = roster.get_key()
+        if key not in self.costs:
+            self.costs[key] = RosterCosts(self.engine, roster, base=self.base)
+        return self.costs[key]
+
+    def get_setup(self, roster: Roster, name: str, high_quality: bool = False,
+                  quantity: float = 1) -> Tuple[float, Tuple]:
+        """
+        Find the optimal setup for crafting an item with a roster.
+
+        If crafting the quantity would use more of a supplement than the roster has in
+        stock, that supplement is left out and the item is costed again.
+
+        Returns:
+            Tuple[float, Tuple[Artisan, Tool, Supplement]]: The optimal unit cost and setup,
+                or inf and None if the roster can't craft it.
+        """
+        costs = self.get_costs(roster)
+        while True:
+            use = costs.get_supplement_use(name, high_quality)
+            short = [
+                supplement for supplement, count in use.items()
+                if supplement in roster.supplement_stock and count * quantity > roster.supplement_stock[supplement]
+            ]
+            if len(short) == 0:
+                return costs.get_setup(name, high_quality)
+            logger.debug(f"Not enough {', '.join(short)} in stock for {quantity}x {name}.")
+            limited_roster = costs.roster.copy()
+            for supplement in short:
+                limited_roster.remove(supplement)
+            costs = self.get_costs(limited_roster)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+import json
+import logging
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import Modules.engine as engine
+
+logger = logging.getLogger(__name__)
+
+ALIGNMENT = 64
+"""Byte boundary every array in a shared block starts on."""
+
+class Ragged:
+    """
+    Rows of different lengths stored as flat arrays and row offsets, read like a list of rows.
+
+    With one values array each row is an array, with several it is a tuple of arrays,
+    the same as CostEngine's lists of (indices, quantities).
+    """
+    def __init__(self, offsets: np.ndarray, *values: np.ndarray):
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        if len(self.values) == 1:
+            return self.values[0][start:end]
+        return tuple(values[start:end] for values in self.values)
+
+    @staticmethod
+    def flatten(rows: Sequence, dtypes: Sequence[type]) -> List[np.ndarray]:
+        """
+        Returns:
+            List[np.ndarray]: The row offsets then the concatenated values of rows, each
+                row being an array or a tuple of arrays of the given dtypes.
+        """
+        rows = [row if isinstance(row, tuple) else (row,) for row in rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(row[0]) for row in rows])
+        return [offsets] + [
+            np.concatenate([np.asarray(row[column], dtype=dtype) for row in rows] + [np.zeros(0, dtype=dtype)])
+            for column, dtype in enumerate(dtypes)
+        ]
+
+class SelfExclusion:
+    """The setups each crafted item can't use, as CostEngine.excluded, worked out on demand."""
+    def __init__(self, setups: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                 artisan_type: List[str], self_supplement: np.ndarray):
+        self.setups = setups
+        self.artisan_type = artisan_type
+        self.self_supplement = self_supplement
+
+    def __len__(self) -> int:
+        return len(self.artisan_type)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.setups[self.artisan_type[index]][2] == self.self_supplement[index]
+
+class SharedEngine(engine.CostEngine):
+    """
+    A CostEngine whose arrays live in one block of shared memory.
+
+    One process compiles the catalogue as usual and publishes it, optionally along with
+    an evaluation. Other processes attach to the block by name and get read-only views
+    of the same memory, so they start without loading the Input folder, without
+    pickling or copying anything, and every worker shares one copy of the arrays.
+
+    Attached engines evaluate, update and answer cost, setup and outcome queries like
+    the original. Only names are kept, not the objects behind them: craftables,
+    supplements, tools and artisans are lists of names, so get_setup returns the names
+    of the artisan, tool and supplement, and the CostEvaluation and Leaderboard
+    printers show just the names. Anything needing the loaded catalogue as well isn't
+    supported on an attached engine: store.save_store, and the roster module's
+    RosterCosts, MarginalAnalysis and RosterOptimiser.
+
+    Before Python 3.13 the block is tracked by the process that created it and the
+    processes it started, so attach from workers started by the publishing process,
+    e.g. a multiprocessing Pool. Call unlink in the publishing process when done.
+    """
+    def __init__(self, block: SharedMemory, owner: bool = False):
+        self.block = block
+        self.owner = owner
+        header_length = int(np.ndarray((1,), dtype=np.int64, buffer=block.buf)[0])
+        header = json.loads(bytes(block.buf[8:8 + header_length]).decode())
+        arrays: Dict[str, np.ndarray] = {}
+        for name, (offset, dtype, shape) in header["arrays"].items():
+            array = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+
+        self.resource_names: List[str] = header["resource_names"]
+        self.resource_index: Dict[str, int] = {name: index for index, name in enumerate(self.resource_names)}
+        self.craftables: List[str] = header["craftable_names"]
+        self.craftable_index: Dict[str, int] = {name: index for index, name in enumerate(self.craftables)}
+        self.supplements: List[str] = header["supplement_names"]
+        self.supplement_index: Dict[str, int] = {name: index for index, name in enumerate(self.supplements)}
+        self.tools: List[str] = header["tool_names"]
+        artisan_types: List[str] = header["artisan_types"]
+        self.artisans: Dict[str, List[str]] = dict(zip(artisan_types, header["artisan_names"]))
+
+        self.quantity = arrays["quantity"]
+        self.resource_ingredients = Ragged(*(arrays[f"resource_ingredients_{part}"] for part in range(3)))
+        self.craftable_ingredients = Ragged(*(arrays[f"craftable_ingredients_{part}"] for part in range(3)))
+        self.supplement_ingredients = Ragged(*(arrays[f"supplement_ingredients_{part}"] for part in range(3)))
+        self.supplement_consumption = arrays["supplement_consumption"]
+        self.resource_users = Ragged(*(arrays[f"resource_users_{part}"] for part in range(2)))
+        self.craftable_users = Ragged(*(arrays[f"craftable_users_{part}"] for part in range(2)))
+
+        setup_offsets, setup_indices = arrays["setup_offsets"], arrays["setup_indices"]
+        self.setups: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {
+            artisan_type: tuple(setup_indices[:, setup_offsets[index]:setup_offsets[index + 1]])
+            for index, artisan_type in enumerate(artisan_types)
+        }
+        self.artisan_type: List[str] = [artisan_types[index] for index in arrays["artisan_type"]]
+        table_offsets, table_values = arrays["table_offsets"], arrays["table_values"]
+        tables: List[engine.SetupTable] = []
+        for index in range(len(table_offsets) - 1):
+            # Views of the shared values in place of a freshly calculated table
+            table = engine.SetupTable.__new__(engine.SetupTable)
+            for slot, values in zip(engine.SetupTable.__slots__, table_values):
+                setattr(table, slot, values[:, table_offsets[index]:table_offsets[index + 1]])
+            tables.append(table)
+        self.tables: List[engine.SetupTable] = [tables[index] for index in arrays["table"]]
+        self.excluded = SelfExclusion(self.setups, self.artisan_type, arrays["self_supplement"])
+
+        self.prices = arrays["prices"]
+        self.evaluation: engine.CostEvaluation = None
+        if header["evaluation"]:
+            self.evaluation = engine.CostEvaluation(
+                self, arrays["evaluation_prices"], arrays["supplement_costs"], arrays["unit_cost"],
+                arrays["material_cost"], arrays["best_setup"]
+            )
+
+    @property
+    def name(self) -> str:
+        """The name other processes attach to."""
+        return self.block.name
+
+    @classmethod
+    def publish(cls, cost_engine: 'engine.CostEngine',
+                evaluation: 'engine.CostEvaluation' = None) -> SharedEngine:
+        """
+        Copy a compiled engine, and optionally an evaluation of it, into a new block of
+        shared memory. Evaluations with masks aren't supported, they depend on a roster.
+
+        Returns:
+            SharedEngine: The published engine, whose name other processes attach to.
+        """
+        if evaluation is not None and evaluation.masks is not None:
+            raise ValueError("Only evaluations without masks can be published.")
+        arrays: Dict[str, np.ndarray] = {"quantity": cost_engine.quantity}
+        for part, array in enumerate(Ragged.flatten(cost_engine.resource_ingredients, [np.int64, float])):
+            arrays[f"resource_ingredients_{part}"] = array
+        for part, array in enumerate(Ragged.flatten(cost_engine.craftable_ingredients, [np.int64, float])):
+            arrays[f"craftable_ingredients_{part}"] = array
+        for part, array in enumerate(Ragged.flatten(cost_engine.supplement_ingredients, [np.int64, float])):
+            arrays[f"supplement_ingredients_{part}"] = array
+        arrays["supplement_consumption"] = cost_engine.supplement_consumption
+        for part, array in enumerate(Ragged.flatten(cost_engine.resource_users, [np.int64])):
+            arrays[f"resource_users_{part}"] = array
+        for part, array in enumerate(Ragged.flatten(cost_engine.craftable_users, [np.int64])):
+            arrays[f"craftable_users_{part}"] = array
+
+        # Setups of every artisan type side by side
+        artisan_types = list(cost_engine.setups.keys())
+        type_index = {artisan_type: index for index, artisan_type in enumerate(artisan_types)}
+        arrays["setup_offsets"] = np.cumsum(
+            [0] + [len(cost_engine.setups[artisan_type][0]) for artisan_type in artisan_types]
+        ).astype(np.int64)
+        arrays["setup_indices"] = np.concatenate(
+            [np.stack(cost_engine.setups[artisan_type]) for artisan_type in artisan_types], axis=1
+        ).astype(np.int64)
+        arrays["artisan_type"] = np.array(
+            [type_index[artisan_type] for artisan_type in cost_engine.artisan_type], dtype=np.int64
+        )
+
+        # Each shared setup table once, side by side
+        unique_tables: Dict[int, int] = {}
+        tables: List[engine.SetupTable] = []
+        for table in cost_engine.tables:
+            if id(table) not in unique_tables:
+                unique_tables[id(table)] = len(tables)
+                tables.append(table)
+        arrays["table"] = np.array([unique_tables[id(table)] for table in cost_engine.tables], dtype=np.int64)
+        arrays["table_offsets"] = np.cumsum([0] + [table.multiplier.shape[1] for table in tables]).astype(np.int64)
+        arrays["table_values"] = np.stack([
+            np.concatenate([getattr(table, slot) for table in tables] + [np.zeros((2, 0))], axis=1)
+            for slot in engine.SetupTable.__slots__
+        ])
+        arrays["self_supplement"] = np.array(
+            [cost_engine.supplement_index.get(name, -1) for name in cls.get_names(cost_engine.craftables)],
+            dtype=np.int64
+        )
+
+        arrays["prices"] = cost_engine.get_prices()
+        if evaluation is not None:
+            arrays["evaluation_prices"] = evaluation.prices
+            arrays["supplement_costs"] = evaluation.supplement_costs
+            arrays["unit_cost"] = evaluation.unit_cost
+            arrays["material_cost"] = evaluation.material_cost
+            arrays["best_setup"] = evaluation.best_setup
+
+        # Lay the arrays out after the header, each on an aligned boundary
+        layout: Dict[str, Tuple[int, str, Tuple[int, ...]]] = {}
+        header = {
+            "resource_names": list(cost_engine.resource_names),
+            "craftable_names": cls.get_names(cost_engine.craftables),
+            "supplement_names": cls.get_names(cost_engine.supplements),
+            "tool_names": cls.get_names(cost_engine.tools),
+            "artisan_types": artisan_types,
+            "artisan_names": [cls.get_names(cost_engine.artisans[artisan_type]) for artisan_type in artisan_types],
+            "evaluation": evaluation is not None,
+            "arrays": layout
+        }
+        for name, array in arrays.items():
+            arrays[name] = np.ascontiguousarray(array)
+        # The header's length depends on the offsets in it, so grow its space until it fits
+        start = 8 + len(json.dumps(header).encode())
+        while True:
+            offset = start
+            for name, array in arrays.items():
+                offset = -(-offset // ALIGNMENT) * ALIGNMENT
+                layout[name] = (offset, array.dtype.str, array.shape)
+                offset += array.nbytes
+            encoded = json.dumps(header).encode()
+            if 8 + len(encoded) <= start:
+                break
+            start = 8 + len(encoded)
+
+        block = SharedMemory(create=True, size=max(offset, 1))
+        np.ndarray((1,), dtype=np.int64, buffer=block.buf)[0] = len(encoded)
+        block.buf[8:8 + len(encoded)] = encoded
+        for name, array in arrays.items():
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf, offset=layout[name][0])[...] = array
+        logger.info(f"Published {len(cost_engine.craftables)} crafted items in {block.name} ({'{:,}'.format(offset)} bytes).")
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> SharedEngine:
+        """
+        Returns:
+            SharedEngine: Read-only views of the engine published under name.
+        """
+        try:
+            block = SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 every block is tracked, see the class docstring
+            block = SharedMemory(name=name)
+        return cls(block)
+
+    @staticmethod
+    def get_names(objects: Sequence) -> List[str]:
+        return [getattr(entry, "name", entry) for entry in objects]
+
+    def get_prices(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The price of every resource when the engine was published.
+        """
+        return np.array(self.prices)
+
+    def unlink(self):
+        """
+        Free the block once every process is done with it. Only the publisher should call
+        this, processes still attached keep their views until they exit.
+        """
+        if self.owner:
+            self.block.unlink()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+import Modules.objects.recipe as recipe
+from Modules.util import find_mw_object
+
+logger = logging.getLogger(__name__)
+
+class SimulationResult:
+    """
+    The outcome of many simulated crafting orders.
+
+    Each array holds one entry per simulated order.
+    """
+    def __init__(self, recipe: 'recipe.MWRecipe', quantity: float, attempts: np.ndarray,
+                 batches: np.ndarray, normal_results: np.ndarray, high_quality_results: np.ndarray,
+                 cost: np.ndarray, ingredients: List[List], supplement_name: str):
+        self.recipe = recipe
+        self.quantity = quantity
+        self.attempts = attempts
+        self.batches = batches
+        self.normal_results = normal_results
+        self.high_quality_results = high_quality_results
+        self.cost = cost
+        self.ingredients = ingredients
+        self.supplement_name = supplement_name
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns:
+            float: The AD cost that the given percentage of orders come in under.
+        """
+        return float(np.percentile(self.cost, percent))
+
+    def shortfall_chance(self, stock: Dict[str, float]) -> Dict[str, float]:
+        """
+        Calculate the chance of running out of each stocked ingredient or supplement.
+
+        Returns:
+            Dict[str, float]: The chance of needing more than the stock of each entry.
+        """
+        output: Dict[str, float] = {}
+        for name, available in stock.items():
+            if name == self.supplement_name:
+                output[name] = float(np.mean(self.attempts > available))
+                continue
+            for entry in self.ingredients:
+                if entry[1] == name:
+                    output[name] = float(np.mean(self.batches * entry[0] > available))
+        return output
+
+    def pretty_print(self, stock: Dict[str, float] = None):
+        """
+        Print in the console a summary of the cost distribution.
+        """
+        print(f"\n{self.quantity}x {self.recipe.result.name}{' +1' if self.recipe.high_quality else ''} ({len(self.cost):,} simulated orders)")
+        print("------------------------------------------------------------------------------------------------------------------------------------------------")
+        print(f"{self.recipe.artisan.pretty_print()} + {self.recipe.supplement.pretty_print()}")
+        print(f"Attempts: {round(float(np.mean(self.attempts)), 2)} mean, {int(np.percentile(self.attempts, 95))} at 95th percentile, {int(np.max(self.attempts))} max")
+        print(f"Results: {round(float(np.mean(self.normal_results)), 2)} Normal, {round(float(np.mean(self.high_quality_results)), 2)} +1 on average")
+        print(f"Mean AD cost: {'{:,}'.format(round(float(np.mean(self.cost))))}")
+        for percent in [50, 90, 95, 99]:
+            print(f"  {percent}th percentile: {'{:,}'.format(round(self.percentile(percent)))}")
+        if stock:
+            print("Chance of running out:")
+            for name, chance in self.shortfall_chance(stock).items():
+                print(f"  {name}: {round(chance * 100, 2)}%")
+
+class CraftSimulator:
+    """
+    Samples the random outcomes of crafting an item with a fixed setup.
+
+    Where MWItem.craft gives the expected attempts and results, this draws success, +1,
+    dab hand and recycle outcomes for every attempt so the spread of costs can be seen.
+    Chances come from the same formulas as MWItem.craft, except that the success and +1
+    chances are capped at 1 here. craft leaves them uncapped, so with proficiency or
+    focus to spare it expects fewer than one attempt per result and the simulated mean
+    comes out higher than its expected cost. Ingredients that are crafted
+    themselves are priced at the expected cost of their optimal recipe.
+    Orders are made of whole crafts, so a small order of an item crafted in batches
+    includes the leftover results.
+    """
+    def __init__(self, recipe: 'recipe.MWRecipe', seed: int = 1):
+        self.recipe = recipe
+        self.item = recipe.result
+        self.rng = np.random.default_rng(seed)
+        (self.success_chance, self.high_quality_chance,
+         self.recycle_chance, self.dab_hand_chance) = self.item.get_chances(
+            recipe.artisan, recipe.tool, recipe.supplement
+        )
+        if not self.item.can_dab_hand:
+            self.dab_hand_chance = 0
+        # Cost of one attempt's worth of ingredients and of one supplement
+        self.batch_cost: float = 0.0
+        for entry in self.item.recipe:
+            self.batch_cost += entry[0] * find_mw_object(entry[1]).craft(quantity=1).get_cost()
+        self.supplement_cost: float = recipe.supplement.craft(1).get_cost()
+
+    def simulate(self, quantity: float = 1, trials: int = 100000) -> SimulationResult:
+        """
+        Simulate crafting the given quantity of the item many times over.
+
+        Every order is simulated at once. Each round samples the attempts needed for the
+        next wanted result (any quality, or +1 only) in every unfinished order.
+
+        Returns:
+            SimulationResult: The attempts, materials and cost of each order.
+        """
+        rng = self.rng
+        high_quality = self.recipe.high_quality
+        success_chance = min(self.success_chance, 1)
+        high_quality_chance = min(self.high_quality_chance, 1)
+        if high_quality:
+            # Only +1 results count, normal results are by-products
+            target_chance = success_chance * high_quality_chance
+            # Chance a non-target attempt was a failure rather than a normal result
+            failure_share = (1 - success_chance) / (1 - target_chance) if target_chance < 1 else 1
+        else:
+            target_chance = success_chance
+            failure_share = 1
+
+        attempts = np.zeros(trials, dtype=np.int64)
+        batches = np.zeros(trials, dtype=np.int64)
+        normal_results = np.zeros(trials)
+        high_quality_results = np.zeros(trials)
+        produced = np.zeros(trials)
+        active = np.arange(trials)
+        while len(active) > 0:
+            count = len(active)
+            # Attempts up to and including the next wanted result
+            round_attempts = rng.geometric(target_chance, count)
+            failures = rng.binomial(round_attempts - 1, failure_share)
+            recycled = rng.binomial(failures, self.recycle_chance)
+            by_products = round_attempts - 1 - failures
+            by_product_dabs = rng.binomial(by_products, self.dab_hand_chance)
+            target_dab = rng.random(count) < self.dab_hand_chance
+            output = self.item.quantity * (1 + target_dab)
+
+            attempts[active] += round_attempts
+            batches[active] += round_attempts - recycled
+            normal_results[active] += (by_products + by_product_dabs) * self.item.quantity
+            if high_quality:
+                high_quality_results[active] += output
+            else:
+                # The wanted result may have been +1 anyway
+                is_high_quality = rng.random(count) < high_quality_chance
+                high_quality_results[active] += np.where(is_high_quality, output, 0)
+                normal_results[active] += np.where(is_high_quality, 0, output)
+            produced[active] += output
+            active = active[produced[active] < quantity]
+
+        cost = batches * self.batch_cost + attempts * self.supplement_cost
+        logger.debug(f"Simulated {trials} orders of {quantity}x {self.item.name} ({int(np.sum(attempts))} crafts).")
+        return SimulationResult(
+            self.recipe, quantity, attempts, batches, normal_results, high_quality_results,
+            cost, self.item.recipe, self.recipe.supplement.name
+        )
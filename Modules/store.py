@@ -0,0 +1,165 @@
+from __future__ import annotations
+from contextlib import closing
+import itertools
+import logging
+import os
+import sqlite3
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE resources (name TEXT PRIMARY KEY, price REAL);
+CREATE TABLE craftables (
+    name TEXT PRIMARY KEY, kind TEXT, profession TEXT, quantity REAL, can_dab_hand INTEGER,
+    proficiency INTEGER, focus INTEGER, unlock TEXT, commission REAL
+);
+CREATE TABLE ingredients (
+    craftable TEXT, position INTEGER, quantity REAL, ingredient TEXT,
+    PRIMARY KEY (craftable, position)
+);
+CREATE TABLE artisans (
+    name TEXT PRIMARY KEY, profession TEXT, rarity TEXT, proficiency REAL, focus REAL,
+    dab_hand_chance REAL, recycle_chance REAL
+);
+CREATE TABLE tools (
+    name TEXT PRIMARY KEY, profession TEXT, proficiency REAL, focus REAL,
+    dab_hand_chance REAL, recycle_chance REAL
+);
+CREATE TABLE supplements (
+    name TEXT PRIMARY KEY, high_quality INTEGER, proficiency REAL, focus REAL,
+    dab_hand_chance REAL, recycle_chance REAL
+);
+CREATE TABLE results (
+    name TEXT, high_quality INTEGER, profession TEXT, cost REAL, attempts REAL,
+    normal_results REAL, high_quality_results REAL, artisan TEXT, tool TEXT, supplement TEXT,
+    PRIMARY KEY (name, high_quality)
+);
+CREATE TABLE commissions (name TEXT PRIMARY KEY, commission_value REAL, cost REAL, cost_per_credit REAL);
+CREATE INDEX craftables_profession ON craftables (profession);
+CREATE INDEX results_profession_cost ON results (profession, high_quality, cost);
+CREATE INDEX results_cost ON results (high_quality, cost);
+CREATE INDEX commissions_value ON commissions (commission_value);
+CREATE INDEX commissions_cost_per_credit ON commissions (cost_per_credit);
+"""
+"""Tables written by save_store. Results are the engine's optimal setups at the loaded prices."""
+
+def save_store(file_loc: str, evaluation: 'engine.CostEvaluation' = None):
+    """
+    Write the loaded catalogue and the optimal recipe of every crafted item, normal and +1,
+    to a SQLite database, replacing whatever was there. Evaluates the loaded prices with a
+    new CostEngine unless an evaluation is given.
+
+    The database is plain SQLite so it can be queried (see find_items and top_commissions,
+    or the sqlite3 command line) without loading the catalogue or the engine.
+    """
+    import Modules.engine as engine
+    import Modules.objects.item as item
+    import Modules.objects.recipe as recipe
+    from Modules.objects.material import MWMaterial
+
+    if evaluation is None:
+        evaluation = engine.CostEngine().evaluate()
+    cost_engine = evaluation.engine
+
+    if os.path.exists(file_loc):
+        os.remove(file_loc)
+    connection = sqlite3.connect(file_loc)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                "INSERT INTO resources VALUES (?, ?)",
+                [(resource.name, resource.price) for resource in item.MWResource.OBJECTS.values()]
+            )
+            craftables = [
+                ("material", craftable) for craftable in MWMaterial.OBJECTS.values()
+            ] + [("item", craftable) for craftable in item.MWItem.OBJECTS.values()]
+            connection.executemany("INSERT INTO craftables VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (craftable.name, kind, craftable.profession, craftable.quantity, craftable.can_dab_hand,
+                 craftable.proficiency, craftable.focus, craftable.unlock, craftable.commission)
+                for kind, craftable in craftables
+            ])
+            connection.executemany("INSERT INTO ingredients VALUES (?, ?, ?, ?)", [
+                (craftable.name, position, quantity, name)
+                for _, craftable in craftables
+                for position, (quantity, name) in enumerate(craftable.recipe)
+            ])
+            # "Any" artisans are listed under every artisan type
+            artisans = {
+                artisan.name: artisan for artisan in itertools.chain(*recipe.Artisan.OBJECTS.values())
+            }
+            connection.executemany("INSERT INTO artisans VALUES (?, ?, ?, ?, ?, ?, ?)", [
+                (artisan.name, artisan.profession, artisan.rarity, artisan.proficiency, artisan.focus,
+                 artisan.dab_hand_chance, artisan.recycle_chance)
+                for artisan in artisans.values()
+            ])
+            connection.executemany("INSERT INTO tools VALUES (?, ?, ?, ?, ?, ?)", [
+                (tool.name, tool.profession, tool.proficiency, tool.focus,
+                 tool.dab_hand_chance, tool.recycle_chance)
+                for tool in recipe.Tool.OBJECTS.values()
+            ])
+            connection.executemany("INSERT INTO supplements VALUES (?, ?, ?, ?, ?, ?)", [
+                (supplement.name, supplement.high_quality, supplement.proficiency, supplement.focus,
+                 supplement.dab_hand_chance, supplement.recycle_chance)
+                for supplement in recipe.Supplement.OBJECTS.values()
+            ])
+
+            results = []
+            for craftable in cost_engine.craftables:
+                for high_quality in engine.QUALITIES:
+                    artisan, tool, supplement = evaluation.get_setup(craftable.name, high_quality)
+                    results.append((
+                        craftable.name, high_quality, craftable.profession,
+                        float(evaluation.get_cost(craftable.name, high_quality)[0]),
+                        *evaluation.get_outcome(craftable.name, high_quality),
+                        artisan.name, tool.name, supplement.name
+                    ))
+            connection.executemany("INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", results)
+
+            commissions = []
+            for commission in item.CommissionItem.OBJECTS.values():
+                name = commission.object.name
+                if name in cost_engine.craftable_index:
+                    cost = float(evaluation.get_cost(name)[0])
+                elif name in cost_engine.resource_index:
+                    cost = float(evaluation.prices[0, cost_engine.resource_index[name]])
+                else:
+                    cost = None
+                cost_per_credit = None if cost is None else cost / commission.commission_value
+                commissions.append((commission.name, commission.commission_value, cost, cost_per_credit))
+            connection.executemany("INSERT INTO commissions VALUES (?, ?, ?, ?)", commissions)
+    finally:
+        connection.close()
+    logger.info(f"Saved {len(cost_engine.craftables)} crafted items and their optimal recipes to {file_loc}.")
+
+def find_items(file_loc: str, profession: str = None, max_cost: float = None,
+               high_quality: bool = False) -> List[Tuple[str, float, str, str, str]]:
+    """
+    Look up crafted items in a saved store, cheapest first.
+
+    Returns:
+        List[Tuple[str, float, str, str, str]]: Name, cost, artisan, tool and supplement of each item.
+    """
+    query = "SELECT name, cost, artisan, tool, supplement FROM results WHERE high_quality = ?"
+    parameters = [high_quality]
+    if profession is not None:
+        query += " AND profession = ?"
+        parameters.append(profession)
+    if max_cost is not None:
+        query += " AND cost <= ?"
+        parameters.append(max_cost)
+    with closing(sqlite3.connect(file_loc)) as connection:
+        return connection.execute(query + " ORDER BY cost", parameters).fetchall()
+
+def top_commissions(file_loc: str, count: int = 20) -> List[Tuple[str, float, float]]:
+    """
+    Returns:
+        List[Tuple[str, float, float]]: Name, commission value and AD per credit of the
+            cheapest commissions per credit in a saved store.
+    """
+    with closing(sqlite3.connect(file_loc)) as connection:
+        return connection.execute(
+            "SELECT name, commission_value, cost_per_credit FROM commissions "
+            "WHERE cost_per_credit IS NOT NULL ORDER BY cost_per_credit LIMIT ?", [count]
+        ).fetchall()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import Modules.objects.item as item
+from Modules.util import find_mw_object
+
+logger = logging.getLogger(__name__)
+
+STATS = ("success_chance", "dab_chance", "recycle_chance",
+         "auxillary_success_chance", "auxillary_dab_chance", "auxillary_recycle_chance")
+"""The stats craft_by_stats takes, in its argument order."""
+
+def stat_grid(**axes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Every combination of the values given for some stats, e.g.
+    stat_grid(success_chance=np.linspace(0.5, 1, 51), recycle_chance=np.linspace(0, 0.5, 51)).
+
+    Returns:
+        Dict[str, np.ndarray]: Each stat's value at every grid point, shaped (len of each axis).
+    """
+    for stat in axes:
+        if stat not in STATS:
+            raise ValueError(f"Unknown stat {stat}, expected one of {', '.join(STATS)}.")
+    grids = np.meshgrid(*(np.asarray(values, dtype=float) for values in axes.values()), indexing="ij")
+    return dict(zip(axes.keys(), grids))
+
+class StatsSurface:
+    """
+    The resources used by craft_by_stats for some items, as a function of the stats.
+
+    craft_by_stats scales each recipe by one multiplier for crafts that can't dab hand,
+    from the success and recycle chances, and another for crafts that can, from the
+    auxillary chances. Every resource quantity is therefore a sum of terms
+    coefficient * main ** a * auxillary ** b. The recipe trees are walked once to collect
+    the terms, then any number of stat configurations are evaluated together with
+    array operations, broadcasting the stats against each other like numpy does.
+    """
+    def __init__(self, objects: List['item.MWObject'], quantity: float = 1):
+        self.names = [entry.name for entry in objects]
+        terms: Dict[Tuple[str, int, int], float] = {}
+        # (object, quantity, crafts without dab hand, crafts with dab hand) on the way to it
+        pending = [(entry, quantity, 0, 0) for entry in objects]
+        while len(pending) > 0:
+            current, current_quantity, main_power, auxillary_power = pending.pop()
+            if not isinstance(current, item.MWItem):
+                key = (current.name, main_power, auxillary_power)
+                terms[key] = terms.get(key, 0) + current_quantity
+                continue
+            if current.can_dab_hand:
+                auxillary_power += 1
+            else:
+                main_power += 1
+            for recipe_entry_quantity, recipe_entry_name in current.recipe:
+                pending.append((
+                    find_mw_object(recipe_entry_name),
+                    recipe_entry_quantity * current_quantity / current.quantity,
+                    main_power, auxillary_power
+                ))
+        self.resource_names: List[str] = sorted({name for name, _, _ in terms})
+        resource_index = {name: index for index, name in enumerate(self.resource_names)}
+        keys = list(terms.keys())
+        self.resource = np.array([resource_index[name] for name, _, _ in keys], dtype=np.int64)
+        self.main_power = np.array([key[1] for key in keys], dtype=np.int64)
+        self.auxillary_power = np.array([key[2] for key in keys], dtype=np.int64)
+        self.coefficient = np.array([terms[key] for key in keys], dtype=float)
+        logger.debug(f"{' + '.join(self.names)}: {len(keys)} terms over {len(self.resource_names)} resources.")
+
+    def get_multipliers(self, success_chance: np.ndarray = 1, dab_chance: np.ndarray = 0,
+                        recycle_chance: np.ndarray = 0, auxillary_success_chance: np.ndarray = None,
+                        auxillary_dab_chance: np.ndarray = None,
+                        auxillary_recycle_chance: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The multiplier of crafts without and with dab
+                hand at every stat configuration, the same as craft_by_stats.
+        """
+        # Auxillary chances default to the given chances, the same as craft_by_stats
+        if auxillary_success_chance is None:
+            auxillary_success_chance = success_chance
+        if auxillary_dab_chance is None:
+            auxillary_dab_chance = dab_chance
+        if auxillary_recycle_chance is None:
+            auxillary_recycle_chance = recycle_chance
+        success_chance, recycle_chance, auxillary_success_chance, auxillary_dab_chance, auxillary_recycle_chance = (
+            np.asarray(stat, dtype=float) for stat in
+            (success_chance, recycle_chance, auxillary_success_chance, auxillary_dab_chance, auxillary_recycle_chance)
+        )
+        main = 1 + ((1/success_chance) - 1) * (1-recycle_chance)
+        auxillary = (1 + ((1/auxillary_success_chance) - 1) * (1-auxillary_recycle_chance)) / (1 + auxillary_dab_chance)
+        return np.broadcast_arrays(main, auxillary)
+
+    def get_materials(self, **stats: np.ndarray) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The quantity of each of resource_names used at every stat
+                configuration, shaped (resources, *stat shape).
+        """
+        main, auxillary = self.get_multipliers(**stats)
+        # Each distinct power is only raised once
+        main_powers = np.stack([main ** power for power in range(self.main_power.max(initial=0) + 1)])
+        auxillary_powers = np.stack([auxillary ** power for power in range(self.auxillary_power.max(initial=0) + 1)])
+        values = self.coefficient.reshape((-1,) + (1,) * main.ndim) * main_powers[self.main_power] * auxillary_powers[self.auxillary_power]
+        output = np.zeros((len(self.resource_names),) + main.shape)
+        np.add.at(output, self.resource, values)
+        return output
+
+    def get_cost(self, prices: np.ndarray = None, **stats: np.ndarray) -> np.ndarray:
+        """
+        Price the resources at every stat configuration, by default at the loaded prices.
+
+        Returns:
+            np.ndarray: The AD cost at every stat configuration, shaped like the stats.
+        """
+        if prices is None:
+            prices = np.array([find_mw_object(name).price for name in self.resource_names], dtype=float)
+        return np.tensordot(prices, self.get_materials(**stats), axes=1)
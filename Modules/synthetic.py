@@ -0,0 +1,164 @@
+from __future__ import annotations
+import csv
+import logging
+import os
+from random import Random
+from typing import Dict, List, Tuple
+
+from Modules.constants import ARTISAN_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Sizes of the real Input data, multiplied by the scale
+RESOURCES = 214
+MATERIALS = 34
+ITEMS = 255
+ARTISANS_PER_TYPE = 27
+SUPPLEMENTS = 20
+
+REQUIREMENTS = [(1400, 1400), (1400, 1400), (1050, 1126)]
+"""Proficiency and focus requirements recipes are drawn from, as in the real data."""
+
+CLASSES = ["Barbarian", "Bard", "Cleric", "Fighter", "Paladin", "Ranger", "Rogue", "Warlock", "Wizard"]
+
+SKILLS = ["Dab Hand", "Recycle", "Virtuoso", "Miracle Worker"]
+
+RARITIES = ["Common", "Rare", "Epic"]
+
+def _pad(row: List, width: int) -> List:
+    return row + [""] * (width - len(row))
+
+def generate_catalogue(output_dir: str, scale: float = 10, depth: int = 3,
+                       roster_scale: float = 1, tools: int = 1, seed: int = 1) -> Dict[str, int]:
+    """
+    Write a made-up Input folder shaped like the real one but scale times bigger.
+
+    Materials are arranged in depth layers, each made from the layer below and
+    resources, and items are made from materials of any layer, so the longest chain
+    of crafted ingredients is depth long. The numbers of artisans and supplements are
+    multiplied by roster_scale. Forgehammer of Gond, Beatrice and Wintergreen Tea +1
+    are always included as supplements are crafted with them. load_all_files reads the
+    folder like the real one.
+
+    Returns:
+        Dict[str, int]: How many of each kind of object were written.
+    """
+    random = Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    professions = list(ARTISAN_TYPES.keys())
+    depth = max(depth, 1)
+
+    # Resources, including the ones bought as supplements
+    resources: List[Tuple[str, float]] = []
+    for index in range(int(RESOURCES * scale)):
+        resources.append((f"Synthetic Resource {index}", round(random.lognormvariate(7, 1.5))))
+    supplements: List[str] = ["Wintergreen Tea +1"]
+    for index in range(int(SUPPLEMENTS * roster_scale) - 1):
+        supplements.append(f"Synthetic Supplement {index}" + (" +1" if index % 2 else ""))
+    for name in sorted({supplement.replace(" +1", "") for supplement in supplements}):
+        resources.append((name, round(random.lognormvariate(8, 1))))
+    with open(f"{output_dir}/Resources.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(_pad(["Resource", "Resource", "MW?", "New", "AH Price", "AH Price +1", "Source"], 32))
+        for name, price in resources:
+            writer.writerow(_pad([name, name, "Yes", "No", f"{price:,}", "", "Gathering"], 32))
+
+    # Materials in layers, then the items made from them
+    material_count = max(int(MATERIALS * scale), depth)
+    layers: List[List[str]] = [[] for _ in range(depth)]
+    recipes: List[Tuple[str, str, bool, List[Tuple[int, str]]]] = []
+    for index in range(material_count):
+        # Every layer gets at least one material so the depth is reached
+        layer = index if index < depth else random.randrange(depth)
+        name = f"Synthetic Material {index}"
+        ingredients = [(random.randint(1, 20), random.choice(resources)[0]) for _ in range(random.randint(1, 3))]
+        if layer > 0:
+            ingredients.insert(0, (random.randint(1, 5), random.choice(layers[layer - 1])))
+        layers[layer].append(name)
+        recipes.append((name, random.choice(professions), True, ingredients))
+    materials = [name for layer in layers for name in layer]
+    items: List[str] = []
+    for index in range(int(ITEMS * scale)):
+        name = f"Synthetic Item {index}"
+        ingredients = [(random.randint(1, 5), random.choice(layers[-1]))]
+        ingredients += [(random.randint(1, 5), random.choice(materials)) for _ in range(random.randint(0, 2))]
+        ingredients += [(random.randint(1, 20), random.choice(resources)[0]) for _ in range(random.randint(1, 3))]
+        items.append(name)
+        recipes.append((name, random.choice(professions), False, ingredients))
+    with open(f"{output_dir}/MW Recipes.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(_pad(["Profession", "Name", "Tool", ".", "Consumes", "Produces", "", "Prof", "Focus"], 69))
+        for name, profession, can_dab_hand, ingredients in recipes:
+            proficiency, focus = random.choice(REQUIREMENTS)
+            commission = round(random.uniform(0.1, 3), 4)
+            for position, (quantity, ingredient) in enumerate(ingredients):
+                if position == 0:
+                    row = [profession, name, "#N/A", f"{quantity}x", ingredient,
+                           f"{random.randint(1, 3) if can_dab_hand else 1}x", name, proficiency, focus]
+                    row = _pad(row, 16) + [commission, "Yes" if can_dab_hand else "No",
+                                           f"Synthetic Masterwork - {profession} I"]
+                else:
+                    row = [profession, "", "", f"{quantity}x", ingredient]
+                writer.writerow(_pad(row, 69))
+
+    # Some items are weapons and commissions. The loaders skip the last recipe in the
+    # file, the same as the real data, so it is left out of both
+    with open(f"{output_dir}/MW Items.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Profession", "MW", "PRODUCTS", "AH price", "AH price +1", "Class", "Slot", "INFORMATION"])
+        for name in items[:-1:10]:
+            writer.writerow(["", "Synthetic MW", name, "", "", random.choice(CLASSES),
+                             random.choice(["Weapon", "Off-hand"]), ""])
+    commissions = 0
+    with open(f"{output_dir}/Commissions.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Profession", "Consumes", "Produces", "Commission"])
+        for name in (materials + items[:-1])[::10]:
+            writer.writerow(["", "", f"1x [{name}]", random.randint(100, 2000)])
+            commissions += 1
+
+    artisan_count = 0
+    with open(f"{output_dir}/Artisans.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Profession", "Name", "Rarity", "Skill", "%", "Commission", "Speed", "Proficiency", "Focus"])
+        writer.writerow(["Alchemist", "Beatrice", "Epic", "Recycle", 25, 0, 0, 388, 450])
+        artisan_count += 1
+        for artisan_type in sorted(set(ARTISAN_TYPES.values())) + ["Adventurer", "Any"]:
+            count = int(ARTISANS_PER_TYPE * roster_scale) if artisan_type != "Any" else 1
+            for index in range(count):
+                writer.writerow([
+                    artisan_type, f"Synthetic {artisan_type} {index}", random.choice(RARITIES),
+                    random.choice(SKILLS), random.choice([5, 10, 15, 20, 25]), 0, 0,
+                    random.randint(300, 450), random.randint(300, 450)
+                ])
+                artisan_count += 1
+
+    with open(f"{output_dir}/Tools.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Profession", "Tool", "Proficiency", "Focus", "%", "Skill", "Obtain"])
+        writer.writerow(["Alchemy", "Forgehammer of Gond", "600.00", 600, "", "", ""])
+        for index in range(tools - 1):
+            skill = random.choice(SKILLS + ["", ""])
+            writer.writerow([
+                random.choice(professions), f"Synthetic Tool {index}", random.randint(300, 600),
+                random.randint(300, 600), random.choice([5, 10]) if skill != "" else "", skill, ""
+            ])
+
+    with open(f"{output_dir}/Supplements.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Supplement", "Proficiency", "Focus", "%", "Skill", "Price in AD"])
+        writer.writerow(["Wintergreen Tea +1", 0, 90, "", "", ""])
+        for name in supplements[1:]:
+            skill = random.choice(SKILLS + [""])
+            writer.writerow([
+                name, random.choice([0, 0, 50, 90]), random.choice([0, 90, 125, 150]),
+                random.choice([10, 20, 30]) if skill != "" else "", skill, ""
+            ])
+
+    counts = {
+        "resources": len(resources), "materials": len(materials), "items": len(items),
+        "artisans": artisan_count, "tools": tools, "supplements": len(supplements),
+        "commissions": commissions
+    }
+    logger.info(f"Generated synthetic catalogue in {output_dir}: {counts}.")
+    return counts
@@ -1,7 +1,7 @@
 
 import logging
 import os
-from typing import List, Tuple
+from typing import Iterable, List, Set, Tuple
 
 import Modules.objects.item as item
 
@@ -40,60 +40,101 @@ def aggregate_tuple_lists(target: List[Tuple], source: List[Tuple]):
     """
     Combine two lists of Tuple[float, str] by adding the number for matching strings.
     """
+    # Index the target by name so each source entry is matched in constant time
+    index = {}
+    for target_entry in target:
+        index.setdefault(target_entry[1], target_entry)
     for source_entry in source:
-                matches = list(filter(lambda output_entry: output_entry[1] == source_entry[1], target))
-                if len(matches) > 0:
-                    matches[0][0] += source_entry[0]
-                else:
-                    target.append(source_entry)
+        match = index.get(source_entry[1])
+        if match is not None:
+            match[0] += source_entry[0]
+        else:
+            target.append(source_entry)
+            index[source_entry[1]] = source_entry
 
-def load_all_files():
+def get_dependents(names: Iterable[str]) -> Set[str]:
+    """
+    Find every crafted item and material that uses any of the named objects, directly
+    or through other crafted ingredients.
+
+    Returns:
+        Set[str]: The names of the dependent items and materials, not including names.
+    """
+    from Modules.objects.material import MWMaterial
+
+    # Who uses each ingredient
+    users = {}
+    for craftable in list(item.MWItem.OBJECTS.values()) + list(MWMaterial.OBJECTS.values()):
+        for _, ingredient in craftable.recipe:
+            if ingredient[-3:] == " +1":
+                ingredient = ingredient[:-3]
+            users.setdefault(ingredient, set()).add(craftable.name)
+    output: Set[str] = set()
+    pending = list(names)
+    while len(pending) > 0:
+        for user in users.get(pending.pop(), ()):
+            if user not in output:
+                output.add(user)
+                pending.append(user)
+    return output
+
+def load_all_files(input_dir: str = None):
     """
     Loads all the data files containing resources, recipes, artisans etc.
+
+    Reads from the Input folder unless another folder with the same files is given.
     """
     from Modules.objects.recipe import Artisan, Tool, Supplement
     from Modules.objects.item import MWItem, MWResource
     from Modules.objects.material import MWMaterial
     from Modules.objects.weapon import MWWeapon
     
-    cwd = os.path.dirname(os.path.dirname(__file__))
+    # Anything ranked so far was ranked with the old data
+    MWItem.RANKINGS.invalidate()
+
+    if input_dir is None:
+        input_dir = f"{os.path.dirname(os.path.dirname(__file__))}/Input"
     
     # Load resources
-    resource_loc = f"{cwd}/Input/Resources.csv"
+    resource_loc = f"{input_dir}/Resources.csv"
     logger.info(f"Loading resources from {resource_loc}.")
     MWResource.load_csv(resource_loc)
 
     # Load materials
-    material_loc = f"{cwd}/Input/MW Recipes.csv"
+    material_loc = f"{input_dir}/MW Recipes.csv"
     logger.info(f"Loading materials from {material_loc}.")
     MWMaterial.load_csv(material_loc)
 
     # Load items
-    items_loc = f"{cwd}/Input/MW Recipes.csv"
+    items_loc = f"{input_dir}/MW Recipes.csv"
     logger.info(f"Loading materials from {items_loc}.")
     MWItem.load_csv(items_loc)
 
     # Load weapons
-    weapons_loc = f"{cwd}/Input/MW Items.csv"
+    weapons_loc = f"{input_dir}/MW Items.csv"
     logger.info(f"Loading weapons from {weapons_loc}.")
     MWWeapon.load_csv(weapons_loc)
 
     # Load artisans
-    artisan_loc = f"{cwd}/Input/Artisans.csv"
+    artisan_loc = f"{input_dir}/Artisans.csv"
     logger.info(f"Loading artisans from {artisan_loc}.")
     Artisan.load_csv(artisan_loc)
 
     # Load tools
-    tools_loc = f"{cwd}/Input/Tools.csv"
+    tools_loc = f"{input_dir}/Tools.csv"
     logger.info(f"Loading tools from {tools_loc}.")
     Tool.load_csv(tools_loc)
 
     # Load supplements
-    supplement_loc = f"{cwd}/Input/Supplements.csv"
+    supplement_loc = f"{input_dir}/Supplements.csv"
     logger.info(f"Loading supplements from {supplement_loc}.")
     Supplement.load_csv(supplement_loc)
     
     # Load commission items
-    commission_loc = f"{cwd}/Input/Commissions.csv"
+    commission_loc = f"{input_dir}/Commissions.csv"
     logger.info(f"Loading commissions from {commission_loc}.")
-    item.CommissionItem.load_csv(commission_loc)
\ No newline at end of file
+    item.CommissionItem.load_csv(commission_loc)
+
+    # Index the names for lookups that don't need to be exact
+    from Modules.names import build_name_index
+    build_name_index()
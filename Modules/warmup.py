@@ -0,0 +1,98 @@
+from __future__ import annotations
+from collections import Counter
+import logging
+from threading import Event, Thread
+import time
+from typing import List, Tuple
+
+import Modules.objects.item as item
+from Modules.util import find_mw_object
+
+logger = logging.getLogger(__name__)
+
+def most_used_materials(count: int) -> List[str]:
+    """
+    Returns:
+        List[str]: The crafted materials used in the most recipes, most used first.
+    """
+    from Modules.objects.material import MWMaterial
+    uses = Counter()
+    for craftable in list(item.MWItem.OBJECTS.values()) + list(MWMaterial.OBJECTS.values()):
+        for _, name in craftable.recipe:
+            ingredient = find_mw_object(name, assume_resource=False)
+            if isinstance(ingredient, item.MWItem):
+                uses[ingredient.name] += 1
+    return [name for name, _ in uses.most_common(count)]
+
+def warm_up_order(names: List[str]) -> List[Tuple[str, bool]]:
+    """
+    Order the rankings needed for some items so every ingredient comes before the items
+    made from it. The items themselves are ranked at both qualities, their
+    ingredients only at normal quality as that is all recipes use.
+
+    Returns:
+        List[Tuple[str, bool]]: Names and high quality flags, in the order to rank them.
+    """
+    output: List[Tuple[str, bool]] = []
+    visited = set()
+    for name in names:
+        mw_object = find_mw_object(name, assume_resource=False)
+        if not isinstance(mw_object, item.MWItem):
+            logger.warning(f"Can't warm up {name}, it isn't a crafted item.")
+            continue
+        if mw_object.name not in visited:
+            visited.add(mw_object.name)
+            stack = [(mw_object, iter(mw_object.recipe))]
+            while len(stack) > 0:
+                current, ingredients = stack[-1]
+                for _, ingredient_name in ingredients:
+                    ingredient = find_mw_object(ingredient_name, assume_resource=False)
+                    if isinstance(ingredient, item.MWItem) and ingredient.name not in visited:
+                        visited.add(ingredient.name)
+                        stack.append((ingredient, iter(ingredient.recipe)))
+                        break
+                else:
+                    stack.pop()
+                    output.append((current.name, False))
+        if (mw_object.name, True) not in output:
+            output.append((mw_object.name, True))
+    return output
+
+class WarmUp(Thread):
+    """
+    Ranks setups in the background so later queries are answered from the memo.
+
+    Rankings are worked through in dependency order. Call pause() while answering a
+    user query, the warm-up stops before its next ranking (one already underway is
+    shared with the query if it needs it) and carries on after resume().
+    """
+    def __init__(self, names: List[str]):
+        super().__init__(daemon=True)
+        self.order = warm_up_order(names)
+        self.done = 0
+        self.running = Event()
+        self.running.set()
+        self.stopped = False
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def stop(self):
+        self.stopped = True
+        self.running.set()
+
+    def run(self):
+        start = time.time()
+        for name, high_quality in self.order:
+            self.running.wait()
+            if self.stopped:
+                return
+            try:
+                find_mw_object(name).get_ranking(high_quality)
+            except Exception as e:
+                logger.warning(f"Warm up of {name} failed: {e}.")
+            self.done += 1
+        logger.debug(f"Warmed up {self.done} rankings in {round(time.time() - start, 1)}s.")
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import csv
+import logging
+import os
+from threading import Event, Thread
+from typing import Callable, Dict, List, Set, Tuple
+
+from Modules.constants import ARTISAN_TYPES, PROFESSIONS
+import Modules.engine as engine
+import Modules.objects.item as item
+import Modules.objects.recipe as recipe
+from Modules.names import build_name_index
+from Modules.util import get_dependents
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = {
+    "Resources.csv": 1,
+    "Artisans.csv": 1,
+    "Tools.csv": 1,
+    "Supplements.csv": 0
+}
+"""The files that can be updated live and the column of the name identifying each row."""
+
+Rows = Dict[str, Tuple[str, ...]]
+
+def read_rows(file_loc: str, key_column: int) -> Rows:
+    """
+    Returns:
+        Dict[str, Tuple[str, ...]]: Each row of a CSV file after the header, by its name.
+    """
+    with open(file_loc) as f:
+        csvreader = csv.reader(f)
+        header = next(csvreader)
+        return {row[key_column]: tuple(row) for row in csvreader if len(row) > key_column}
+
+def diff_rows(old: Rows, new: Rows) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Returns:
+        Tuple[List[str], List[str], List[str]]: The names of the rows added, changed and removed.
+    """
+    added = [name for name in new if name not in old]
+    changed = [name for name in new if name in old and new[name] != old[name]]
+    removed = [name for name in old if name not in new]
+    return added, changed, removed
+
+def update_slots(target, source):
+    """Copy every field of source into target, so everything holding target sees the change."""
+    for slot in type(target).__slots__:
+        setattr(target, slot, getattr(source, slot))
+
+class InputWatcher(Thread):
+    """
+    Keeps the loaded catalogue in step with edits to the Input folder while running.
+
+    Polls the prices, artisans, tools and supplements files. When one changes it is
+    diffed row by row against the last version read, only the rows that changed are
+    applied to the loaded objects, and only the rankings that depend on them are
+    dropped. Start it straight after load_all_files so the first version read is the
+    one loaded. Changes to recipes need a restart.
+
+    on_change is called with the names of the dropped items after every change, or None
+    when everything was dropped, for anything else caching results.
+    """
+    def __init__(self, input_dir: str = None, interval: float = 0.5,
+                 on_change: Callable[[Set[str]], None] = None):
+        super().__init__(daemon=True)
+        if input_dir is None:
+            input_dir = f"{os.path.dirname(os.path.dirname(__file__))}/Input"
+        self.input_dir = input_dir
+        self.interval = interval
+        self.on_change = on_change
+        self.stopped = Event()
+        self.rows: Dict[str, Rows] = {}
+        self.stats: Dict[str, Tuple[float, int]] = {}
+        for file_name, key_column in KEY_COLUMNS.items():
+            file_loc = f"{input_dir}/{file_name}"
+            self.stats[file_name] = self.get_stat(file_loc)
+            self.rows[file_name] = read_rows(file_loc, key_column)
+        recipes_loc = f"{input_dir}/MW Recipes.csv"
+        self.recipes_stat = self.get_stat(recipes_loc)
+
+    @staticmethod
+    def get_stat(file_loc: str) -> Tuple[float, int]:
+        stat = os.stat(file_loc)
+        return stat.st_mtime_ns, stat.st_size
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Most likely a file caught half written, try again next time
+                logger.warning(f"Couldn't apply changes from {self.input_dir}: {e}.")
+
+    def check(self):
+        """
+        Apply any changes made to the watched files since they were last read.
+        """
+        recipes_stat = self.get_stat(f"{self.input_dir}/MW Recipes.csv")
+        if recipes_stat != self.recipes_stat:
+            self.recipes_stat = recipes_stat
+            logger.warning("MW Recipes.csv changed, restart to use the new recipes.")
+        for file_name, key_column in KEY_COLUMNS.items():
+            file_loc = f"{self.input_dir}/{file_name}"
+            stat = self.get_stat(file_loc)
+            if stat == self.stats[file_name]:
+                continue
+            rows = read_rows(file_loc, key_column)
+            added, changed, removed = diff_rows(self.rows[file_name], rows)
+            self.stats[file_name] = stat
+            self.rows[file_name] = rows
+            if len(added) + len(changed) + len(removed) == 0:
+                continue
+            logger.info(
+                f"{file_name} changed: {len(added)} added, {len(changed)} changed, {len(removed)} removed."
+            )
+            if file_name == "Resources.csv":
+                dependents = self.apply_resources(rows, added + changed, removed)
+            elif file_name == "Artisans.csv":
+                dependents = self.apply_artisans(file_loc, rows, added, changed, removed)
+            elif file_name == "Tools.csv":
+                dependents = self.apply_tools(rows, added, changed, removed)
+            else:
+                dependents = self.apply_supplements(rows, added, changed, removed)
+            if len(added) + len(removed) > 0:
+                build_name_index()
+            self.invalidate(dependents)
+
+    def invalidate(self, dependents: Set[str]):
+        """
+        Drop the rankings of the named items, or of everything if dependents is None.
+        """
+        if dependents is None:
+            item.MWItem.RANKINGS.invalidate()
+        else:
+            dropped = item.MWItem.RANKINGS.discard(lambda key: key[0] in dependents)
+            logger.info(f"Dropped {dropped} rankings of {len(dependents)} dependent items.")
+        if self.on_change is not None:
+            self.on_change(dependents)
+
+    def apply_resources(self, rows: Rows, updated: List[str], removed: List[str]) -> Set[str]:
+        """
+        Returns:
+            Set[str]: The items depending on the changed prices, or None if all of them do.
+        """
+        names = set(removed)
+        for name in removed:
+            item.MWResource.OBJECTS.pop(name, None)
+        for name in updated:
+            row = list(rows[name])
+            if any(prof in row[6] for prof in PROFESSIONS):
+                # Materials aren't resources, the same as MWResource.load_csv
+                continue
+            resource = item.MWResource(row)
+            if name in item.MWResource.OBJECTS:
+                if item.MWResource.OBJECTS[name].price == resource.price:
+                    continue
+                item.MWResource.OBJECTS[name].price = resource.price
+            else:
+                item.MWResource.OBJECTS[name] = resource
+            names.add(name)
+        supplements = [
+            supplement for supplement in recipe.Supplement.OBJECTS.values()
+            if supplement.object.name in names
+            or any(ingredient in names for _, ingredient in getattr(supplement.object, "recipe", []))
+        ]
+        for supplement in supplements:
+            supplement.supplement_recipe = None
+        if len(supplements) > 0:
+            # Every ranking prices every supplement, so all of them change
+            return None
+        return get_dependents(names)
+
+    def apply_artisans(self, file_loc: str, rows: Rows, added: List[str], changed: List[str],
+                       removed: List[str]) -> Set[str]:
+        """
+        Returns:
+            Set[str]: The items depending on the changed artisans, or None if all of them do.
+        """
+        artisans = {
+            artisan.name: artisan
+            for artisans in recipe.Artisan.OBJECTS.values() for artisan in artisans
+        }
+        artisan_types = {rows[name][0] for name in added + changed}
+        artisan_types |= {artisans[name].profession for name in removed if name in artisans}
+        if len(added) + len(removed) > 0:
+            # Artisans are listed in file order, so rebuild the lists
+            recipe.Artisan.load_csv(file_loc)
+        else:
+            for name in changed:
+                update_slots(artisans[name], recipe.Artisan(list(rows[name])))
+            recipe.Artisan.STATS = {
+                artisan_type: recipe.SetupStats(type_artisans)
+                for artisan_type, type_artisans in recipe.Artisan.OBJECTS.items()
+            }
+            # Changed in place, so the shared setup tables can't tell
+            engine.SetupTable.invalidate()
+        crafting_artisan = recipe.Supplement.get_crafting_setup()[0]
+        if "Any" in artisan_types or crafting_artisan.name in added + changed + removed:
+            # Supplements are crafted by an artisan, so every item's supplement costs change
+            for supplement in recipe.Supplement.OBJECTS.values():
+                supplement.supplement_recipe = None
+            return None
+        names = {
+            craftable.name
+            for craftable in list(item.MWItem.OBJECTS.values()) + self.get_materials()
+            if ARTISAN_TYPES.get(craftable.profession) in artisan_types
+        }
+        return names | get_dependents(names)
+
+    def apply_tools(self, rows: Rows, added: List[str], changed: List[str], removed: List[str]) -> Set[str]:
+        """
+        Every setup uses a tool, so any change drops every ranking.
+
+        Returns:
+            Set[str]: None, as every item depends on the tools.
+        """
+        tools = recipe.Tool.OBJECTS
+        for name in changed:
+            update_slots(tools[name], recipe.Tool(list(rows[name])))
+        if len(added) + len(removed) > 0:
+            recipe.Tool.OBJECTS = {
+                name: tools[name] if name in tools else recipe.Tool(list(row)) for name, row in rows.items()
+            }
+        engine.SetupTable.invalidate()
+        for supplement in recipe.Supplement.OBJECTS.values():
+            supplement.supplement_recipe = None
+        return None
+
+    def apply_supplements(self, rows: Rows, added: List[str], changed: List[str],
+                          removed: List[str]) -> Set[str]:
+        """
+        Every setup uses a supplement, so any change drops every ranking.
+
+        Returns:
+            Set[str]: None, as every item depends on the supplements.
+        """
+        supplements = recipe.Supplement.OBJECTS
+        for name in changed:
+            update_slots(supplements[name], recipe.Supplement(list(rows[name])))
+        if len(added) + len(removed) > 0:
+            recipe.Supplement.OBJECTS = {
+                name: supplements[name] if name in supplements else recipe.Supplement(list(row))
+                for name, row in rows.items()
+            }
+        engine.SetupTable.invalidate()
+        for supplement in recipe.Supplement.OBJECTS.values():
+            supplement.supplement_recipe = None
+        return None
+
+    @staticmethod
+    def get_materials() -> List[item.MWItem]:
+        from Modules.objects.material import MWMaterial
+        return list(MWMaterial.OBJECTS.values())
@@ -0,0 +1,68 @@
+"""
+Memory benchmark for cached recipe rankings.
+
+Computes the rankings of every item in the catalogue (or the first N given on the command
+line), then compares the memory needed to hold them as RecipeRanking records against
+holding every setup as a full [MWRecipe, cost] list.
+"""
+
+import sys
+import time
+import logging
+import numpy as np
+from Modules.objects.recipe import *
+from Modules.objects.item import MWItem
+from Modules.objects.material import MWMaterial
+from Modules.util import load_all_files
+
+logging.getLogger().setLevel(logging.INFO)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+def deep_size(obj, seen: set = None) -> int:
+    """
+    Measure the bytes used by a ranking and everything it owns.
+
+    Items, artisans, tools, supplements and names are shared with the catalogue
+    so they aren't counted.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, (str, MWItem, Artisan, Tool, Supplement)):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(deep_size(entry, seen) for entry in obj)
+    elif isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, slot, None), seen) for slot in obj.__slots__)
+    return size
+
+load_all_files()
+craftables = list(MWItem.OBJECTS.values()) + list(MWMaterial.OBJECTS.values())
+if len(sys.argv) > 1:
+    craftables = craftables[:int(sys.argv[1])]
+
+start = time.time()
+rankings: List[RecipeRanking] = []
+for craftable in craftables:
+    for high_quality in [False, True]:
+        rankings.append(craftable.get_ranking(high_quality))
+logger.info(f"Ranked {len(craftables)} items in {round(time.time() - start, 1)}s.")
+
+setups = sum(len(ranking) for ranking in rankings)
+compact_size = sum(deep_size(ranking) for ranking in rankings)
+# Craft every setup again to get the full lists rankings used to be held as
+full_size = 0
+for ranking in rankings:
+    full_size += deep_size(list(ranking))
+
+print(f"\n{len(rankings)} rankings, {setups:,} setups")
+print("------------------------------------------------------------------------------------------------------------------------------------------------")
+print(f"Full recipe lists:  {'{:,}'.format(full_size)} bytes ({round(full_size / setups)} per setup)")
+print(f"Ranking records:    {'{:,}'.format(compact_size)} bytes ({round(compact_size / setups)} per setup)")
+print(f"Reduction:          {round(full_size / compact_size, 1)}x")
@@ -0,0 +1,131 @@
+"""
+Scaling benchmark on synthetic catalogues.
+
+Generates catalogues at several multiples of the real data's size, recipe depths, tool
+counts and roster sizes (multiples of the artisans and supplements), then times each entry
+point and measures the peak memory it allocates. Pass the scales, depths, tool counts and
+roster sizes to try on the command line, e.g. `python benchmark_scaling.py 1,10,30 2,4 1,3 1,2`.
+
+Ranking every setup the way MWItem.get_optimal_recipe does is far too slow to do for the
+whole of a large catalogue. It is timed over a few sample items and commissions, the latter
+through CommissionItem.calculate_rank as commissions.py does, and the costs are checked
+against the engine's. Ranking every commission from the engine's costs is timed in full.
+"""
+
+import sys
+import time
+import itertools
+import shutil
+import logging
+import tempfile
+import tracemalloc
+from typing import Callable, Dict
+from Modules.objects.recipe import *
+from Modules.objects.item import CommissionItem, MWItem, MWResource
+from Modules.objects.material import MWMaterial
+from Modules.engine import CostEngine, SetupTable
+from Modules.synthetic import generate_catalogue
+from Modules.util import load_all_files
+
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+SAMPLES = 3
+SCENARIOS = 16
+
+def measure(stage: Callable) -> Tuple[float, float]:
+    """
+    Run a stage once timed, then again to measure its memory as tracemalloc slows it down.
+
+    Returns:
+        Tuple[float, float]: The seconds taken and the peak MB allocated.
+    """
+    start = time.perf_counter()
+    stage()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return seconds, peak
+
+def benchmark(scale: float, depth: int, tools: int, roster_scale: float) -> Dict[str, Tuple[float, float]]:
+    input_dir = tempfile.mkdtemp()
+    results: Dict[str, Tuple[float, float]] = {}
+    state = {}
+    try:
+        results["generate"] = measure(lambda: generate_catalogue(input_dir, scale, depth, roster_scale, tools))
+        results["load"] = measure(lambda: load_all_files(input_dir))
+        def compile_engine():
+            # From cold, not reusing the setup tables shared between engines
+            SetupTable.invalidate()
+            state.update(engine=CostEngine())
+        results["compile"] = measure(compile_engine)
+        cost_engine: CostEngine = state["engine"]
+        results["evaluate"] = measure(lambda: state.update(evaluation=cost_engine.evaluate()))
+        prices = np.tile(cost_engine.get_prices(), (SCENARIOS, 1))
+        prices *= np.random.default_rng(1).uniform(0.8, 1.2, prices.shape)
+        results[f"evaluate x{SCENARIOS}"] = measure(lambda: cost_engine.evaluate(prices))
+
+        evaluation = state["evaluation"]
+        def rank_commissions():
+            rankings = [
+                (float(evaluation.get_cost(commission.object.name)[0]) / commission.commission_value, commission)
+                for commission in CommissionItem.OBJECTS.values()
+            ]
+            rankings.sort(key=lambda rank: rank[0])
+        results["commissions (engine)"] = measure(rank_commissions)
+
+        # A spread of items deep and shallow in the recipe tree
+        items = list(MWItem.OBJECTS.values())
+        samples = items[::max(len(items) // SAMPLES, 1)][:SAMPLES]
+        def rank_samples():
+            MWItem.RANKINGS.invalidate()
+            for sample in samples:
+                recipe = sample.get_optimal_recipe(False)
+                expected = float(evaluation.get_cost(sample.name)[0])
+                if abs(recipe.get_cost() - expected) > 1e-6 * max(expected, 1):
+                    logger.warning(f"{sample.name} costs {recipe.get_cost()} ranked but {expected} evaluated.")
+        seconds, peak = measure(rank_samples)
+        results["reference / item"] = (seconds / len(samples), peak)
+
+        # The path commissions.py takes, ranking each commission's item from cold
+        commissions = list(CommissionItem.OBJECTS.values())
+        commission_samples = commissions[::max(len(commissions) // SAMPLES, 1)][:SAMPLES]
+        def rank_commission_samples():
+            MWItem.RANKINGS.invalidate()
+            for commission in commission_samples:
+                rank = commission.calculate_rank()
+                expected = float(evaluation.get_cost(commission.object.name)[0]) / commission.commission_value
+                if abs(rank[1] - expected) > 1e-6 * max(expected, 1):
+                    logger.warning(f"{commission.name} ranks at {rank[1]} but {expected} evaluated.")
+        seconds, peak = measure(rank_commission_samples)
+        results["commissions / item"] = (seconds / max(len(commission_samples), 1), peak)
+    finally:
+        shutil.rmtree(input_dir)
+    return results
+
+scales = [1, 10, 30, 100]
+depths = [3]
+tool_counts = [1]
+roster_scales = [1]
+if len(sys.argv) > 1:
+    scales = [float(scale) for scale in sys.argv[1].split(",")]
+if len(sys.argv) > 2:
+    depths = [int(depth) for depth in sys.argv[2].split(",")]
+if len(sys.argv) > 3:
+    tool_counts = [int(tools) for tools in sys.argv[3].split(",")]
+if len(sys.argv) > 4:
+    roster_scales = [float(roster_scale) for roster_scale in sys.argv[4].split(",")]
+
+for depth, tools, roster_scale, scale in itertools.product(depths, tool_counts, roster_scales, scales):
+    results = benchmark(scale, depth, tools, roster_scale)
+    print("-"*144)
+    print(f"Scale {scale}x, depth {depth}, {tools} tools, roster {roster_scale}x: {len(MWItem.OBJECTS):,} items, "
+          f"{len(MWMaterial.OBJECTS):,} materials, {len(MWResource.OBJECTS):,} resources, "
+          f"{sum(len(artisans) for artisans in Artisan.OBJECTS.values()):,} artisan slots, "
+          f"{len(Supplement.OBJECTS):,} supplements")
+    for stage, (seconds, peak) in results.items():
+        print(f"{stage:<24}{round(seconds * 1000, 1):>12,} ms{round(peak, 1):>12,} MB")
+print("-"*144)
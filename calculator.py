@@ -1,8 +1,17 @@
 import os
 import logging
 import traceback
+from typing import Dict, Set
 from Modules.objects.recipe import *
 from Modules.objects.item import MWItem
+from Modules.engine import CostEngine
+from Modules.constants import WARM_UP_ITEMS, WARM_UP_MATERIALS
+from Modules.memo import Cancelled
+from Modules.names import NameIndex
+from Modules.query import Query
+from Modules.simulation import CraftSimulator
+from Modules.warmup import WarmUp, most_used_materials
+from Modules.watcher import InputWatcher
 from Modules.util import find_mw_object, load_all_files
 
 cwd = os.path.dirname(__file__)
@@ -19,33 +28,138 @@ balm = Supplement.OBJECTS.get("Wintergreen Balm +1")
 bounty = Supplement.OBJECTS.get("Distilled Philosopher's Bounty")
 hammer = Tool.OBJECTS.get("Forgehammer of Gond")
 
-find_mw_object("Living Feywood").craft(
-    Artisan.OBJECTS.get("Artificer")[0],
-    hammer,
-    Supplement.OBJECTS.get("Maker's Bounty")
+# Rank popular items and materials in the background while waiting for input
+warm_up = WarmUp(WARM_UP_ITEMS + most_used_materials(WARM_UP_MATERIALS))
+# Only report calculations the user is waiting on
+logging.getLogger().handlers[-1].addFilter(
+    lambda record: (
+        record.levelno >= logging.WARNING or not warm_up.running.is_set()
+        or record.name not in ["Modules.objects.item", "Modules.warmup"]
+    )
 )
+warm_up.start()
+
+# Built on the first sensitivity query
+evaluation = None
+
+def drop_evaluation(dependents: Set[str]):
+    global evaluation
+    evaluation = None
+
+# Pick up edits to prices, artisans, tools and supplements without restarting
+watcher = InputWatcher(on_change=drop_evaluation)
+watcher.start()
+
+QUERY_PREFIXES = ["sens ", "sim "]
+
+def parse_stock(text: str) -> Dict[str, float]:
+    """
+    Read the stock of some ingredients or supplements, e.g. "Wintergreen Balm +1=200, Feywood Log=50".
+
+    Returns:
+        Dict[str, float]: The quantity in stock of each named entry.
+    """
+    output: Dict[str, float] = {}
+    for entry in text.split(","):
+        name, _, quantity_str = entry.partition("=")
+        name = name.strip()
+        if name == "":
+            continue
+        # Same name with different capitalisation or punctuation
+        name = NameIndex.INDEX.lookup(name) or name
+        output[name] = float(quantity_str.replace(",", "").strip())
+    return output
+
+def complete(text: str, state: int) -> str:
+    """
+    Tab-complete an item name after any query prefixes, e.g. "sim 5x Living F".
+    """
+    prefix = ""
+    for query_prefix in QUERY_PREFIXES:
+        if text[len(prefix):].startswith(query_prefix):
+            prefix += query_prefix
+    if prefix.endswith("sim "):
+        quantity_str, x, _ = text[len(prefix):].partition("x ")
+        if quantity_str.isdigit():
+            prefix += quantity_str + x
+    matches = [prefix + name for name in NameIndex.INDEX.complete(text[len(prefix):])]
+    return matches[state] if state < len(matches) else None
+
+# Tab completion needs readline, which isn't available everywhere (e.g. Windows)
+try:
+    import readline
+    readline.set_completer(complete)
+    readline.set_completer_delims("")
+    readline.parse_and_bind("tab: complete")
+except ImportError:
+    pass
 
 # Take command line input to find base cost of given item
 while True:
     try:
         input_name = input("\nEnter an item name: ").strip()
+        # Queries take priority over the warm up
+        warm_up.pause()
         if input_name == "q":
+            warm_up.stop()
+            watcher.stop()
             print("Exiting.")
             break
         else:
+            # Prefix a query with "sim" to simulate the cost spread, e.g. "sim 50x Hardened Feywood"
+            simulate = False
+            sensitivity = False
+            quantity = 1
+            # Prefix a query with "sens" to see which resource prices the cost depends on
+            if input_name[:5] == "sens ":
+                sensitivity = True
+                input_name = input_name[5:].strip()
+            if input_name[:4] == "sim ":
+                simulate = True
+                input_name = input_name[4:].strip()
+                quantity_str, _, name_str = input_name.partition("x ")
+                if quantity_str.isdigit():
+                    quantity = int(quantity_str)
+                    input_name = name_str.strip()
             high_quality = False
             if input_name[-3:] == " +1":
                 high_quality = True
                 input_name = input_name[:-3]
             # Check for item by name
             item = find_mw_object(input_name, assume_resource=False)
+            if item is None and NameIndex.INDEX.lookup(input_name) is not None:
+                # Same name with different capitalisation or punctuation
+                item = find_mw_object(NameIndex.INDEX.lookup(input_name), assume_resource=False)
             if item is None:
-                logger.error(f"Invalid input {input_name}")
+                suggestions = [name for name, _ in NameIndex.INDEX.search(input_name)]
+                if len(suggestions) > 0:
+                    logger.error(f"Invalid input {input_name}. Did you mean: {', '.join(suggestions)}?")
+                else:
+                    logger.error(f"Invalid input {input_name}.")
                 continue
+            elif sensitivity:
+                if evaluation is None:
+                    evaluation = CostEngine().evaluate()
+                evaluation.pretty_print_sensitivity(item.name, high_quality)
+            elif simulate:
+                # Long calculations run in the background, Ctrl-C cancels just this query
+                optimal_recipe = Query(item.get_optimal_recipe, high_quality).start().wait()
+                simulation = CraftSimulator(optimal_recipe).simulate(quantity)
+                # Optionally give what's in stock to see the chance of running out
+                stock = parse_stock(input("Stock on hand, e.g. Wintergreen Balm +1=200 (Enter to skip): "))
+                for name in stock:
+                    if name not in simulation.shortfall_chance(stock):
+                        logger.warning(f"{name} isn't used crafting {item.name}, ignoring its stock.")
+                simulation.pretty_print(stock)
             else:
                 # Found item by name. Print it's recipe
-                result: List[MWRecipe] = item.get_optimal_recipes(high_quality=high_quality)
+                result: List[MWRecipe] = Query(item.get_optimal_recipes, high_quality).start().wait()
                 MWRecipe.pretty_print_list(result)
+                MWRecipe.pretty_print_frontier(item.get_pareto_recipes(high_quality=high_quality))
+    except Cancelled:
+        print("Cancelled. Materials already worked out are kept for the next query.")
     except Exception as e:
         print(f"Error: {e}.")
-        traceback.format_exc()
\ No newline at end of file
+        traceback.format_exc()
+    finally:
+        warm_up.resume()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 import logging
 import traceback
 import itertools
@@ -7,6 +8,8 @@ from Modules.objects.item import CommissionItem, MWItem, MWResource
 from Modules.objects.material import MWMaterial
 
 from Modules.objects.recipe import *
+from Modules.engine import QUALITIES, CostEngine, CostEvaluation
+from Modules.store import save_store
 from Modules.util import find_mw_object, load_all_files
 
 cwd = os.path.dirname(__file__)
@@ -16,6 +19,28 @@ logger = logging.getLogger(__name__)
 
 load_all_files()
 
+# Optimal cost and setup of every item, normal and +1, in one pass
+evaluation: CostEvaluation = CostEngine().evaluate()
+
+# python csv_converter.py --sqlite writes a queryable database instead of the CSV files
+if "--sqlite" in sys.argv[1:]:
+    save_store("./output/catalogue.db", evaluation)
+    sys.exit()
+
+optimal_header = [
+    f"{quality}{field}" for quality in ["normal", "highQuality"]
+    for field in ["Cost", "Attempts", "NormalResults", "HighQualityResults", "Artisan", "Tool", "Supplement"]
+]
+
+def optimal_columns(craftable: MWItem) -> List:
+    columns = []
+    for high_quality in QUALITIES:
+        artisan, tool, supplement = evaluation.get_setup(craftable.name, high_quality)
+        columns += [float(evaluation.get_cost(craftable.name, high_quality)[0])]
+        columns += list(evaluation.get_outcome(craftable.name, high_quality))
+        columns += [artisan.name, tool.name, supplement.name]
+    return columns
+
 # Output materials
 materials = list(MWMaterial.OBJECTS.values())
 with open("./output/materials.csv", "w", newline="") as f:
@@ -30,19 +55,18 @@ with open("./output/materials.csv", "w", newline="") as f:
         "profession",
         "commission",
         "recipe"
-    ])
-    for material in materials:
-        writer.writerow([
-            material.name,
-            material.quantity,
-            material.can_dab_hand,
-            material.proficiency,
-            material.focus,
-            material.unlock,
-            material.profession,
-            material.commission,
-            f"{material.recipe}"
-        ])
+    ] + optimal_header)
+    writer.writerows([
+        material.name,
+        material.quantity,
+        material.can_dab_hand,
+        material.proficiency,
+        material.focus,
+        material.unlock,
+        material.profession,
+        material.commission,
+        f"{material.recipe}"
+    ] + optimal_columns(material) for material in materials)
 
 # Output artisans
 artisans = list(itertools.chain(*Artisan.OBJECTS.values()))
@@ -90,19 +114,18 @@ with open("./output/items.csv", "w", newline="") as f:
         "profession",
         "commission",
         "recipe"
-    ])
-    for item in items:
-        writer.writerow([
-            item.name,
-            item.quantity,
-            item.can_dab_hand,
-            item.proficiency,
-            item.focus,
-            item.unlock,
-            item.profession,
-            item.commission,
-            json.dumps(item.recipe)
-        ])
+    ] + optimal_header)
+    writer.writerows([
+        item.name,
+        item.quantity,
+        item.can_dab_hand,
+        item.proficiency,
+        item.focus,
+        item.unlock,
+        item.profession,
+        item.commission,
+        json.dumps(item.recipe)
+    ] + optimal_columns(item) for item in items)
 
 # Output resources
 resources = list(MWResource.OBJECTS.values())
@@ -154,4 +177,65 @@ with open("./output/tools.csv", "w", newline="") as f:
             tool.focus,
             tool.dab_hand_chance,
             tool.recycle_chance
-        ])
\ No newline at end of file
+        ])
+
+# python csv_converter.py --npz also writes the items, materials and resources as columns
+# in output/export.npz, which loads much faster than the CSVs (np.load)
+craftables = list(MWItem.OBJECTS.values()) + list(MWMaterial.OBJECTS.values())
+if "--npz" in sys.argv[1:]:
+    indices = [evaluation.engine.craftable_index[craftable.name] for craftable in craftables]
+    setups = [[evaluation.get_setup(craftable.name, high_quality) for craftable in craftables]
+              for high_quality in QUALITIES]
+    outcomes = np.array([[evaluation.get_outcome(craftable.name, high_quality) for craftable in craftables]
+                         for high_quality in QUALITIES])
+    np.savez(
+        "./output/export.npz",
+        name=np.array([craftable.name for craftable in craftables]),
+        is_material=np.array([isinstance(craftable, MWMaterial) for craftable in craftables]),
+        profession=np.array([str(craftable.profession) for craftable in craftables]),
+        quantity=np.array([craftable.quantity for craftable in craftables]),
+        proficiency=np.array([craftable.proficiency for craftable in craftables]),
+        focus=np.array([craftable.focus for craftable in craftables]),
+        commission=np.array([craftable.commission for craftable in craftables]),
+        # Shape (2, items), normal quality then +1
+        cost=evaluation.unit_cost[:, 0, indices],
+        attempts=outcomes[:, :, 0],
+        normal_results=outcomes[:, :, 1],
+        high_quality_results=outcomes[:, :, 2],
+        artisan=np.array([[setup[0].name for setup in quality] for quality in setups]),
+        tool=np.array([[setup[1].name for setup in quality] for quality in setups]),
+        supplement=np.array([[setup[2].name for setup in quality] for quality in setups]),
+        resource_name=np.array(list(MWResource.OBJECTS.keys())),
+        resource_price=np.array([resource.price for resource in MWResource.OBJECTS.values()])
+    )
+
+# Output the pareto frontier of setups for every craftable item
+with open("./output/frontiers.csv", "w", newline="") as f:
+    writer = csv.writer(f, delimiter="|")
+    writer.writerow([
+        "name",
+        "highQuality",
+        "cost",
+        "attempts",
+        "normalResults",
+        "highQualityResults",
+        "artisan",
+        "tool",
+        "supplement"
+    ])
+    # Frontiers come from the evaluation's setup costs, so no item is ranked again
+    engine = evaluation.engine
+    for craftable in craftables:
+        index = engine.craftable_index[craftable.name]
+        table = engine.tables[index]
+        for high_quality in QUALITIES:
+            quality = int(high_quality)
+            writer.writerows([
+                craftable.name,
+                high_quality,
+                cost,
+                float(table.attempts[quality, setup]),
+                float(table.normal_results[quality, setup]),
+                float(table.high_quality_results[quality, setup]),
+                *(entry.name for entry in engine.get_setup(index, setup))
+            ] for setup, cost in evaluation.get_pareto_setups(craftable.name, high_quality))
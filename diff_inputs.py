@@ -0,0 +1,28 @@
+"""
+Report what changed between two Input folders, e.g. `python diff_inputs.py "Old Input" Input`.
+
+Lists the rows added, changed and removed in every file, the resource prices that moved
+and the items whose optimal cost or setup changed, biggest change first. Only items
+depending on something that changed are recalculated. The second folder defaults to
+Input, and a third argument sets how many of each to list (20 by default).
+"""
+
+import os
+import sys
+import logging
+from Modules.objects.recipe import *
+from Modules.diff import CatalogueDiff
+
+cwd = os.path.dirname(__file__)
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+if len(sys.argv) < 2:
+    logger.error("Give the folder to compare against, and optionally the folder to compare (default Input).")
+    sys.exit(1)
+old_dir = sys.argv[1]
+new_dir = sys.argv[2] if len(sys.argv) > 2 else f"{cwd}/Input"
+count = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+CatalogueDiff(old_dir, new_dir).pretty_print(count)
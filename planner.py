@@ -0,0 +1,46 @@
+import os
+import logging
+import traceback
+from Modules.objects.recipe import *
+from Modules.objects.weapon import MWWeapon
+from Modules.planner import parse_order_line, plan_order
+from Modules.util import find_mw_object, load_all_files
+
+cwd = os.path.dirname(__file__)
+logging.getLogger().setLevel(logging.DEBUG)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+load_all_files()
+
+# Take command line input to build up an order, then plan it
+# Lines are items (e.g. "50x Hardened Feywood", "Fey'd Leaf Branches +1"),
+# a class name for its main and off-hand, or * for the weapons of every class.
+# An empty line plans the order so far.
+order: Recipe = []
+while True:
+    try:
+        input_line = input("\nEnter an order line (empty line to plan): ").strip()
+        if input_line == "q":
+            print("Exiting.")
+            break
+        if input_line == "":
+            if len(order) == 0:
+                continue
+            plan_order(order).pretty_print()
+            order = []
+            continue
+        quantity, name = parse_order_line(input_line)
+        if name == "*":
+            weapon_list = [j for sub in MWWeapon.OBJECTS.values() for j in sub]
+        else:
+            weapon_list = MWWeapon.OBJECTS.get(name)
+        if weapon_list is not None:
+            order += [[quantity, weapon.name] for weapon in weapon_list]
+        elif find_mw_object(name[:-3] if name[-3:] == " +1" else name, assume_resource=False) is not None:
+            order.append([quantity, name])
+        else:
+            logger.error(f"Invalid input {input_line}")
+    except Exception as e:
+        print(f"Error: {e}.")
+        traceback.format_exc()
@@ -0,0 +1,22 @@
+import os
+import logging
+from Modules.objects.recipe import *
+from Modules.engine import CostEngine
+from Modules.leaderboard import Leaderboard, load_sell_prices
+from Modules.util import load_all_files
+
+cwd = os.path.dirname(__file__)
+logging.getLogger().setLevel(logging.INFO)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+load_all_files()
+
+# Sell prices are the "AH price" and "AH price +1" columns of MW Items.csv
+sell_prices = load_sell_prices(f"{cwd}/Input/MW Items.csv")
+if len(sell_prices) == 0:
+    logger.error("No AH prices in MW Items.csv, fill in the items you want to compare.")
+else:
+    leaderboard = Leaderboard(CostEngine(), sell_prices)
+    leaderboard.pretty_print(20, "margin")
+    leaderboard.pretty_print(20, "margin_per_attempt")
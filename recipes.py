@@ -7,12 +7,14 @@ Superceded by calculator.py
 
 import os
 import logging
+from typing import List
 from Modules.objects.recipe import *
 from Modules.constants import Recipe
 from Modules.objects.item import MWItem, MWObject, MWResource
 from Modules.objects.material import MWMaterial
 from Modules.objects.weapon import MWWeapon
-from Modules.util import find_mw_object
+from Modules.surface import StatsSurface, stat_grid
+from Modules.util import aggregate_tuple_lists, find_mw_object
 
 cwd = os.path.dirname(__file__)
 logging.getLogger().setLevel(logging.DEBUG)
@@ -29,6 +31,36 @@ def print_name_with_recipe(name: str, recipe: Recipe):
         cost += entry[0] * find_mw_object(entry[1]).price
     print(f"\nTotal AD cost: {'{:,}'.format(round(cost))}")
 
+def find_objects(input_name: str) -> List[MWObject]:
+    """
+    Returns:
+        List[MWObject]: The named item, or the weapons of the named class (* for every
+            class), or None if there is neither.
+    """
+    item = find_mw_object(input_name, assume_resource=False)
+    if item is not None:
+        return [item]
+    if input_name == "*":
+        # Sum weapons for all classes
+        return [j for sub in MWWeapon.OBJECTS.values() for j in sub]
+    # Fetch specific classes weapons
+    return MWWeapon.OBJECTS.get(input_name)
+
+def print_cost_surface(objects: List[MWObject], **stats):
+    """
+    Print the cost of crafting the objects with the other stats as configured, as the
+    success and recycle chances of this step vary.
+    """
+    success_chances = np.round(np.linspace(0.5, 1, 6), 2)
+    recycle_chances = np.round(np.linspace(0, 0.5, 6), 2)
+    grid = stat_grid(success_chance=success_chances, recycle_chance=recycle_chances)
+    costs = StatsSurface(objects).get_cost(**{**stats, **grid})
+    print(f"\n {' + '.join(map(lambda entry: entry.name, objects))}")
+    print("-------------------------------------")
+    print("Success \\ recycle" + "".join(f"{chance:>14}" for chance in recycle_chances))
+    for success_chance, row in zip(success_chances, costs):
+        print(f"{success_chance:<17}" + "".join(f"{'{:,}'.format(round(cost)):>14}" for cost in row))
+
 # Success and +1 chances.
 # Low means not using a related supplement. High means using the best related supplement
 SUCCESS_HIGH = 0.8
@@ -80,18 +112,25 @@ while True:
             auxillary_success_chance = float(input("Enter the chance to succeed previous steps: ").strip())
             auxillary_dab_chance = float(input("Enter the chance to dab hand previous steps: ").strip())
             auxillary_recycle_chance = float(input("Enter the chance to recycle previous steps: ").strip())
+        elif input_name.startswith("surface "):
+            # Cost over a grid of success and recycle chances for an item or weapon class
+            objects = find_objects(input_name[len("surface "):].strip())
+            if objects is None:
+                logger.error(f"Invalid input {input_name}")
+            else:
+                print_cost_surface(
+                    objects,
+                    dab_chance=dab_chance,
+                    auxillary_success_chance=auxillary_success_chance,
+                    auxillary_dab_chance=auxillary_dab_chance,
+                    auxillary_recycle_chance=auxillary_recycle_chance
+                )
         else:
             # Check for item by name
             item = find_mw_object(input_name, assume_resource=False)
             if item is None:
                 # Check for weapons by class
-                class_name = input_name
-                if class_name == "*":
-                    # Sum weapons for all classes
-                    weapon_list = [j for sub in MWWeapon.OBJECTS.values() for j in sub]
-                else:
-                    # Fetch specific classes weapons
-                    weapon_list = MWWeapon.OBJECTS.get(class_name)
+                weapon_list = find_objects(input_name)
                 if weapon_list is None:
                     logger.error(f"Invalid input {input_name}")
                 else:
@@ -106,12 +145,7 @@ while True:
                             auxillary_dab_chance=auxillary_dab_chance,
                             auxillary_recycle_chance=auxillary_recycle_chance
                         )
-                        for base_entry in this_recipe:
-                            matches = list(filter(lambda output_entry: output_entry[1] == base_entry[1], output))
-                            if len(matches) > 0:
-                                matches[0][0] += base_entry[0]
-                            else:
-                                output.append(base_entry)
+                        aggregate_tuple_lists(output, this_recipe)
                     print_name_with_recipe(f"{' + '.join(list(map(lambda weapon: weapon.name, weapon_list)))}", output)
             else:
                 # Found item by name. Print it's recipe
@@ -0,0 +1,250 @@
+"""
+Differential check of the optimised code paths against the original implementations.
+
+The original recursive code is the reference: MWItem.get_optimal_recipe (crafting every
+setup with MWItem.craft), Supplement.craft, calculate_multiplier and, for the setup tables
+shared by recipes with the same requirements, MWItem.calculate_outcome. Price histories
+are checked against keeping every snapshot in full. Each optimised path
+is run on the same data and every cost, setup, attempts and normal/+1 result is compared
+within a relative tolerance. Both sides are timed so the speedup is measured on exactly
+the work that was verified.
+
+Runs on the real Input folder and then on randomised synthetic catalogues. Pass the number
+of synthetic catalogues and optionally how many items to check per catalogue (all by
+default), e.g. `python verify_engines.py 5 20`. Exits with status 1 if anything disagrees.
+"""
+
+import sys
+import time
+import shutil
+import logging
+import tempfile
+from datetime import date, timedelta
+from typing import Any, Callable, Dict
+from Modules.objects.recipe import *
+from Modules.objects.item import MWItem
+from Modules.objects.material import MWMaterial
+from Modules.engine import QUALITIES, CostEngine, SetupTable
+from Modules.history import PriceHistory
+from Modules.multiplier import QUALITY_MODES, calculate_multiplier, sweep
+from Modules.synthetic import generate_catalogue
+from Modules.util import load_all_files
+
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger().addHandler(logging.StreamHandler())
+logger = logging.getLogger(__name__)
+
+TOLERANCE = 1e-9
+
+def close(reference: float, optimised: float) -> bool:
+    return abs(reference - optimised) <= TOLERANCE * max(abs(reference), 1)
+
+def timed(function: Callable) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    output = function()
+    return output, time.perf_counter() - start
+
+def check_multipliers() -> Dict[str, float]:
+    """
+    Compare every multiplier table against calculate_multiplier, combo by combo.
+    """
+    requirements = [(1400, 1400), (1050, 1126)]
+    tables, optimised_time = timed(lambda: sweep(requirements=requirements))
+    compared = 0
+    mismatches = 0
+    reference_time = 0
+    for table in tables.values():
+        for can_dab_hand in [True, False]:
+            for high_quality in QUALITY_MODES:
+                for requirement, (proficiency, focus) in enumerate(requirements):
+                    values = table.get_table(can_dab_hand, high_quality, requirement)
+                    start = time.perf_counter()
+                    reference = [
+                        calculate_multiplier(artisan, tool, supplement, can_dab_hand, high_quality, proficiency, focus)
+                        for artisan in table.artisans for tool in table.tools for supplement in table.supplements
+                    ]
+                    reference_time += time.perf_counter() - start
+                    for expected, actual in zip(reference, values.ravel()):
+                        compared += 1
+                        if not close(expected, float(actual)):
+                            mismatches += 1
+    return {"compared": compared, "mismatches": mismatches, "ties": 0,
+            "reference": reference_time, "optimised": optimised_time}
+
+def check_setup_tables(cost_engine: CostEngine) -> Dict[str, float]:
+    """
+    Compare every shared setup table against MWItem.calculate_outcome, setup by setup.
+    """
+    # One recipe of each requirement class
+    classes = {}
+    for craftable, artisan_type in zip(cost_engine.craftables, cost_engine.artisan_type):
+        key = (artisan_type, craftable.proficiency, craftable.focus, craftable.can_dab_hand)
+        classes.setdefault(key, craftable)
+    SetupTable.invalidate()
+    tables, optimised_time = timed(lambda: {key: SetupTable.get(*key) for key in classes})
+    compared = 0
+    mismatches = 0
+    reference_time = 0
+    for key, craftable in classes.items():
+        artisan_type = key[0]
+        table = tables[key]
+        artisan_index, tool_index, supplement_index = cost_engine.setups[artisan_type]
+        for high_quality in QUALITIES:
+            start = time.perf_counter()
+            reference = [
+                craftable.calculate_outcome(
+                    cost_engine.artisans[artisan_type][artisan], cost_engine.tools[tool],
+                    cost_engine.supplements[supplement], high_quality
+                )
+                for artisan, tool, supplement in zip(artisan_index, tool_index, supplement_index)
+            ]
+            reference_time += time.perf_counter() - start
+            actual = zip(
+                table.multiplier[int(high_quality)], table.attempts[int(high_quality)],
+                table.failures[int(high_quality)], table.normal_results[int(high_quality)],
+                table.high_quality_results[int(high_quality)]
+            )
+            for expected, values in zip(reference, actual):
+                compared += 1
+                if not all(close(value, float(other)) for value, other in zip(expected, values)):
+                    mismatches += 1
+    return {"compared": compared, "mismatches": mismatches, "ties": 0,
+            "reference": reference_time, "optimised": optimised_time}
+
+def check_history(cost_engine: CostEngine, snapshots: int = 30) -> Dict[str, float]:
+    """
+    Add snapshots in random order to a PriceHistory, replacing some (including ones in
+    the middle), and compare every date's prices against the snapshots kept in full.
+    """
+    rng = np.random.default_rng(len(cost_engine.resource_names))
+    base = cost_engine.get_prices()
+    history = PriceHistory(cost_engine.resource_names)
+    reference: Dict[date, np.ndarray] = {}
+    optimised_time = 0
+    for _ in range(snapshots):
+        snapshot_date = date(2020, 1, 1) + timedelta(days=int(rng.integers(snapshots // 2)))
+        prices = base.copy()
+        moved = rng.random(len(prices)) < 0.1
+        prices[moved] *= rng.uniform(0.5, 1.5, moved.sum())
+        reference[snapshot_date] = prices
+        _, seconds = timed(lambda: history.add_snapshot(snapshot_date, prices))
+        optimised_time += seconds
+    expected, reference_time = timed(lambda: np.array([reference[d] for d in sorted(reference)]))
+    actual, seconds = timed(history.get_matrix)
+    optimised_time += seconds
+    mismatches = sum(
+        not np.array_equal(row, history.get_prices(d)) or not np.array_equal(row, other)
+        for d, row, other in zip(sorted(reference), expected, actual)
+    )
+    if sorted(reference) != history.dates:
+        mismatches += 1
+    return {"compared": len(reference), "mismatches": mismatches, "ties": 0,
+            "reference": reference_time, "optimised": optimised_time}
+
+def check_supplements(cost_engine: CostEngine) -> Dict[str, float]:
+    """
+    Compare the engine's supplement costs against Supplement.craft.
+    """
+    costs, optimised_time = timed(lambda: cost_engine.get_supplement_costs(np.atleast_2d(cost_engine.get_prices()))[0])
+    def reference():
+        output = []
+        for supplement in cost_engine.supplements:
+            supplement.supplement_recipe = None
+            output.append(supplement.craft(1).get_cost())
+        return output
+    expected, reference_time = timed(reference)
+    mismatches = sum(not close(cost, float(actual)) for cost, actual in zip(expected, costs))
+    return {"compared": len(costs), "mismatches": mismatches, "ties": 0,
+            "reference": reference_time, "optimised": optimised_time}
+
+def check_engine(cost_engine: CostEngine, samples: int = None) -> Dict[str, float]:
+    """
+    Compare the engine's optimal cost, setup, attempts and results of every item (or
+    samples of them spread through the catalogue) against get_optimal_recipe.
+
+    Setups costing the same are ties, which either side may pick, so only their costs
+    are compared.
+    """
+    # The engine always costs every item, so when sampling the speedup is understated
+    evaluation, optimised_time = timed(cost_engine.evaluate)
+    craftables = list(MWItem.OBJECTS.values()) + list(MWMaterial.OBJECTS.values())
+    if samples is not None and samples < len(craftables):
+        craftables = craftables[::len(craftables) // samples][:samples]
+    MWItem.RANKINGS.invalidate()
+    compared = 0
+    mismatches = 0
+    ties = 0
+    reference_time = 0
+    for craftable in craftables:
+        for high_quality in QUALITIES:
+            reference, seconds = timed(lambda: craftable.get_optimal_recipe(high_quality))
+            reference_time += seconds
+            compared += 1
+            cost = float(evaluation.get_cost(craftable.name, high_quality)[0])
+            artisan, tool, supplement = evaluation.get_setup(craftable.name, high_quality)
+            if not close(reference.get_cost(), cost):
+                mismatches += 1
+                logger.warning(
+                    f"{craftable.name}{' +1' if high_quality else ''}: reference costs "
+                    f"{reference.get_cost()}, engine {cost}."
+                )
+            elif (reference.artisan, reference.tool, reference.supplement) != (artisan, tool, supplement):
+                ties += 1
+            else:
+                outcome = (reference.attempts, reference.normal_results, reference.high_quality_results)
+                actual = evaluation.get_outcome(craftable.name, high_quality)
+                if not all(close(expected, value) for expected, value in zip(outcome, actual)):
+                    mismatches += 1
+                    logger.warning(
+                        f"{craftable.name}{' +1' if high_quality else ''}: reference attempts and "
+                        f"results {outcome}, engine {actual}."
+                    )
+    return {"compared": compared, "mismatches": mismatches, "ties": ties,
+            "reference": reference_time, "optimised": optimised_time}
+
+def verify(label: str, samples: int = None) -> int:
+    """
+    Run every check on the loaded catalogue and print the results.
+
+    Returns:
+        int: The number of disagreements.
+    """
+    cost_engine, compile_time = timed(CostEngine)
+    results = {
+        "multipliers": check_multipliers(),
+        "setup tables": check_setup_tables(cost_engine),
+        "supplements": check_supplements(cost_engine),
+        "history": check_history(cost_engine),
+        "engine": check_engine(cost_engine, samples)
+    }
+    print("-"*144)
+    print(f"{label} (engine compiled in {round(compile_time * 1000, 1):,} ms)")
+    for check, result in results.items():
+        speedup = result["reference"] / max(result["optimised"], 1e-9)
+        print(
+            f"{check:<14}{result['compared']:>10,} compared{result['mismatches']:>6,} mismatched"
+            f"{result['ties']:>6,} ties   reference {round(result['reference'] * 1000, 1):>12,} ms"
+            f"   optimised {round(result['optimised'] * 1000, 1):>10,} ms   {round(speedup, 1):>10,}x"
+        )
+    return sum(result["mismatches"] for result in results.values())
+
+catalogues = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+samples = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+load_all_files()
+failures = verify("Input", samples)
+for seed in range(1, catalogues + 1):
+    # Small catalogues with varied depths, rosters and tools, as the reference is slow
+    input_dir = tempfile.mkdtemp()
+    try:
+        depth = 1 + seed % 4
+        generate_catalogue(input_dir, scale=0.2, depth=depth, roster_scale=0.3, tools=1 + seed % 3, seed=seed)
+        load_all_files(input_dir)
+        failures += verify(f"Synthetic catalogue {seed} (depth {depth})", samples)
+    finally:
+        shutil.rmtree(input_dir)
+print("-"*144)
+if failures > 0:
+    print(f"{failures} disagreements with the reference.")
+    sys.exit(1)
+print("Everything agrees with the reference.")